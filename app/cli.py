@@ -0,0 +1,71 @@
+# app/cli.py
+# (新增) 管理用的命令列工具
+#
+# 用法:
+#   python -m app.cli job-digest --limit 10 --chunk-size 500 --output digest.ndjson
+#   python -m app.cli job-digest --user-id <user_id> --user-id <user_id>
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from typing import List, Optional
+
+from app.core.database import AsyncSessionLocal, engine
+from app.services.recommendation_service import RecommendationService
+from app.utils.scoring_pool import scoring_pool
+
+# --- 匯入所有 Model 檔案，確保 SQLAlchemy 關聯可以正確解析 ---
+from app.models import user  # noqa: F401
+from app.models import employer_profile  # noqa: F401
+from app.models import freelancer_profile  # noqa: F401
+from app.models import skill_tag  # noqa: F401
+from app.models import project  # noqa: F401
+from app.models import proposal  # noqa: F401
+from app.models import contract  # noqa: F401
+from app.models import notification  # noqa: F401
+from app.models import message  # noqa: F401
+
+logger = logging.getLogger(__name__)
+
+
+async def job_digest(args: argparse.Namespace) -> None:
+    """批次計算自由工作者的案件推薦，每位使用者輸出一行 JSON (NDJSON)"""
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    count = 0
+    try:
+        async with AsyncSessionLocal() as db:
+            service = RecommendationService(db)
+            async for chunk in service.iter_job_recommendations_batch(
+                user_ids=args.user_id, limit=args.limit, chunk_size=args.chunk_size
+            ):
+                for row in chunk:
+                    output.write(json.dumps(row, ensure_ascii=False) + "\n")
+                count += len(chunk)
+                output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        scoring_pool.shutdown()
+        await engine.dispose()
+    logger.info(f"Job digest finished: {count} users")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    digest = subparsers.add_parser("job-digest", help="批次產生自由工作者的案件推薦 (NDJSON)")
+    digest.add_argument("--user-id", action="append", help="只計算指定的使用者 (可重複)")
+    digest.add_argument("--limit", type=int, default=10, help="每位使用者的推薦數量")
+    digest.add_argument("--chunk-size", type=int, default=500, help="每批處理的使用者數量")
+    digest.add_argument("--output", help="輸出檔案 (預設輸出到 stdout)")
+
+    args = parser.parse_args(argv)
+    engine.echo = False
+    if args.command == "job-digest":
+        asyncio.run(job_digest(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+# app/core/chat_broker.py
+# (新增) 聊天訊息的跨 process 發布 / 訂閱 (多個 uvicorn worker 之間的即時廣播)
+#
+# ConnectionManager 只認得自己 process 內的 WebSocket；廣播改為交給 broker：
+#   - InProcessBroker: 單一 worker (預設)，直接送給本機的連線
+#   - RedisBroker:     以 Redis 協定 (RESP) 的 PUBLISH / SUBSCRIBE 在 worker 之間轉送，
+#                      可連到 Redis 或任何相容的伺服器 (TCP 或 Unix socket)
+#
+# 每則訊息只編碼一次並發布一次，每個 worker (node) 收到一次後再分送給自己的連線；
+# 發布者自己的連線直接在本機送出 (不等 broker 繞一圈)，收到自己發布的訊息時略過。
+#
+# 訊息格式 (一個字串): "<node_id>\n<kind>\n<key>\n<message_json>"
+#   kind = "r" (聊天室廣播，key 為 room_id) 或 "u" (推播給使用者，key 為 user_id)
+import asyncio
+import logging
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+KIND_ROOM = "r"
+KIND_USER = "u"
+
+DEFAULT_CHANNEL = "freelancer_match:chat"
+
+# 本機分送函式: (kind, key, message_json) -> 排入的本機連線數
+DeliverFunc = Callable[[str, str, str], int]
+
+
+def encode_envelope(node_id: str, kind: str, key: str, message_json: str) -> str:
+    return f"{node_id}\n{kind}\n{key}\n{message_json}"
+
+
+def decode_envelope(payload: str) -> Tuple[str, str, str, str]:
+    """回傳 (node_id, kind, key, message_json)；格式錯誤時拋出 ValueError"""
+    node_id, kind, key, message_json = payload.split("\n", 3)
+    return node_id, kind, key, message_json
+
+
+class InProcessBroker:
+    """單一 process：發布即直接在本機分送"""
+
+    def __init__(self):
+        self.node_id = uuid.uuid4().hex[:12]
+        self._deliver: Optional[DeliverFunc] = None
+        self.published_total = 0
+
+    def bind(self, deliver: DeliverFunc) -> None:
+        self._deliver = deliver
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def publish(self, kind: str, key: str, message_json: str) -> int:
+        """回傳本機排入的連線數"""
+        self.published_total += 1
+        if self._deliver is None:
+            return 0
+        return self._deliver(kind, key, message_json)
+
+    def stats(self) -> Dict:
+        return {"backend": "in-process", "node_id": self.node_id, "published_total": self.published_total}
+
+
+# --- Redis 協定 (RESP) ---
+
+def encode_command(*args) -> bytes:
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+async def read_reply(reader: asyncio.StreamReader):
+    """讀取一個 RESP 回應 (錯誤回應拋出 RedisProtocolError)"""
+    line = await reader.readuntil(b"\r\n")
+    prefix, body = line[:1], line[1:-2]
+    if prefix == b"+":
+        return body.decode("utf-8")
+    if prefix == b"-":
+        raise RedisProtocolError(body.decode("utf-8"))
+    if prefix == b":":
+        return int(body)
+    if prefix == b"$":
+        length = int(body)
+        if length < 0:
+            return None
+        data = await reader.readexactly(length + 2)
+        return data[:-2]
+    if prefix == b"*":
+        length = int(body)
+        if length < 0:
+            return None
+        return [await read_reply(reader) for _ in range(length)]
+    raise RedisProtocolError(f"unexpected reply: {line!r}")
+
+
+class RedisProtocolError(Exception):
+    pass
+
+
+async def open_connection(url: str) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    """redis://[:password@]host:port/db 或 unix:///path/to/socket"""
+    parsed = urlparse(url)
+    if parsed.scheme == "unix":
+        reader, writer = await asyncio.open_unix_connection(parsed.path)
+    elif parsed.scheme in ("redis", "tcp"):
+        reader, writer = await asyncio.open_connection(parsed.hostname or "localhost", parsed.port or 6379)
+    else:
+        raise ValueError(f"unsupported broker url: {url}")
+    if parsed.password:
+        writer.write(encode_command("AUTH", parsed.password))
+        await writer.drain()
+        await read_reply(reader)
+    return reader, writer
+
+
+class RedisBroker:
+    """
+    以 PUBLISH / SUBSCRIBE 在多個 worker 之間轉送聊天訊息
+
+    - 發布：publish() 只把訊息放進佇列，由 publisher task 將目前累積的訊息一次寫出 (pipeline)
+    - 訂閱：subscriber task 持續讀取頻道，連線中斷時延遲後重新連線
+    broker 無法連線時，本機的連線仍會收到訊息 (只是其他 worker 收不到)
+    """
+
+    def __init__(self, url: str, channel: str = DEFAULT_CHANNEL, reconnect_seconds: float = 1.0,
+                 max_pending: int = 10000):
+        self.url = url
+        self.channel = channel
+        self.reconnect_seconds = reconnect_seconds
+        self.node_id = uuid.uuid4().hex[:12]
+        self._deliver: Optional[DeliverFunc] = None
+        self._pending: "asyncio.Queue[bytes]" = asyncio.Queue(maxsize=max_pending)
+        self._tasks: List[asyncio.Task] = []
+        self.subscribed = asyncio.Event()
+        self.published_total = 0
+        self.received_total = 0
+        self.dropped_total = 0
+        self.errors_total = 0
+
+    def bind(self, deliver: DeliverFunc) -> None:
+        self._deliver = deliver
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._run_forever(self._subscribe_loop, "subscriber")),
+            asyncio.create_task(self._run_forever(self._publish_loop, "publisher")),
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self.subscribed.clear()
+
+    async def publish(self, kind: str, key: str, message_json: str) -> int:
+        """回傳本機排入的連線數 (其他 worker 的連線由各自的 subscriber 分送)"""
+        # 本機的連線直接送出
+        delivered = self._deliver(kind, key, message_json) if self._deliver is not None else 0
+        payload = encode_envelope(self.node_id, kind, key, message_json).encode("utf-8")
+        try:
+            self._pending.put_nowait(encode_command("PUBLISH", self.channel, payload))
+            self.published_total += 1
+        except asyncio.QueueFull:
+            # broker 長時間無法連線：不無限累積
+            self.dropped_total += 1
+        return delivered
+
+    async def _run_forever(self, run: Callable[[], Awaitable[None]], name: str) -> None:
+        while True:
+            try:
+                await run()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors_total += 1
+                logger.warning(f"Chat broker {name} disconnected ({e}); retrying in {self.reconnect_seconds}s")
+            await asyncio.sleep(self.reconnect_seconds)
+
+    async def _publish_loop(self) -> None:
+        reader, writer = await open_connection(self.url)
+        try:
+            command = await self._pending.get()
+            while True:
+                # 一次寫出目前累積的所有 PUBLISH，再讀回對應數量的回應
+                batch = [command]
+                while not self._pending.empty() and len(batch) < 512:
+                    batch.append(self._pending.get_nowait())
+                writer.write(b"".join(batch))
+                await writer.drain()
+                for _ in batch:
+                    await read_reply(reader)
+                command = await self._pending.get()
+        finally:
+            writer.close()
+
+    async def _subscribe_loop(self) -> None:
+        reader, writer = await open_connection(self.url)
+        try:
+            writer.write(encode_command("SUBSCRIBE", self.channel))
+            await writer.drain()
+            while True:
+                reply = await read_reply(reader)
+                if not isinstance(reply, list) or not reply:
+                    continue
+                kind = reply[0]
+                if kind == b"subscribe":
+                    self.subscribed.set()
+                elif kind == b"message" and len(reply) == 3:
+                    self._on_message(reply[2])
+        finally:
+            self.subscribed.clear()
+            writer.close()
+
+    def _on_message(self, payload: bytes) -> None:
+        try:
+            node_id, kind, key, message_json = decode_envelope(payload.decode("utf-8"))
+        except ValueError:
+            self.errors_total += 1
+            return
+        if node_id == self.node_id:
+            return  # 自己發布的訊息已在本機送出
+        self.received_total += 1
+        if self._deliver is not None:
+            self._deliver(kind, key, message_json)
+
+    def stats(self) -> Dict:
+        return {
+            "backend": "redis",
+            "node_id": self.node_id,
+            "channel": self.channel,
+            "subscribed": self.subscribed.is_set(),
+            "pending": self._pending.qsize(),
+            "published_total": self.published_total,
+            "received_total": self.received_total,
+            "dropped_total": self.dropped_total,
+            "errors_total": self.errors_total,
+        }
+
+
+def create_broker(url: str = "", channel: str = DEFAULT_CHANNEL):
+    """url 為空字串時使用單一 process 的 InProcessBroker"""
+    if not url:
+        return InProcessBroker()
+    return RedisBroker(url, channel=channel)
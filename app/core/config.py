@@ -11,6 +11,53 @@ class Settings(BaseSettings):
     JWT_ALGORITHM: str = "HS256"
     # 存取令牌過期時間（分鐘）
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
+
+    # (新增) 推薦系統：技能標籤倒排索引的完整重新載入週期（秒）
+    # 多個 worker 各自維護索引，定期重載以納入其他 worker 的異動
+    RECOMMENDER_INDEX_REFRESH_SECONDS: int = 300
+    # (新增) 推薦系統：計分引擎 ("python" 逐筆迴圈 / "numpy" 稀疏矩陣批次計算，需安裝 numpy、scipy)
+    RECOMMENDER_ENGINE: str = "python"
+    # (新增) 推薦結果快取：最多保存幾位使用者的結果、存活秒數
+    RECOMMENDATION_CACHE_MAX_ENTRIES: int = 2048
+    RECOMMENDATION_CACHE_TTL_SECONDS: int = 120
+    # (新增) 推薦結果快取：每次計算至少保留前幾名，讓後續分頁可直接由快取回應
+    RECOMMENDATION_CACHE_DEPTH: int = 100
+    # (新增) 推薦計分 process pool 的 worker 數量 (0 表示停用，在 event loop 中直接計分)
+    RECOMMENDER_POOL_WORKERS: int = 0
+    # (新增) 候選項目少於此數量時不送入 process pool (序列化成本高於計分本身)
+    RECOMMENDER_POOL_INLINE_THRESHOLD: int = 5000
+    # (新增) 物化的案件推薦清單：最多保存幾位工作者、清單最長使用秒數 (之後重新完整計算)
+    RECOMMENDER_JOB_LISTS_MAX_ENTRIES: int = 10000
+    RECOMMENDER_JOB_LISTS_MAX_AGE_SECONDS: int = 300
+    # (新增) 推薦系統：依工作者技能的熟悉度 (familiarity_level) 加權計分
+    RECOMMENDER_WEIGHTED_SCORING: bool = False
+    # (新增) cursor 分頁的排序快照：最多保存幾份、存活秒數、重新計分時每份保存的名次數
+    RECOMMENDER_SNAPSHOT_MAX_ENTRIES: int = 4096
+    RECOMMENDER_SNAPSHOT_TTL_SECONDS: int = 600
+    RECOMMENDER_SNAPSHOT_DEPTH: int = 500
+    # (新增) 多個 worker 共用的 mmap 推薦資料目錄 (標籤詞彙、相似度表、倒排索引；需安裝 numpy)
+    # 空字串表示停用 (每個 worker 各自從資料庫建立)
+    RECOMMENDER_SHARED_MATRIX_DIR: str = ""
+    # (新增) 啟動時在背景預熱推薦系統 (完成前 /health/ready 回傳 503)，失敗後的重試間隔秒數
+    RECOMMENDER_WARMUP_ENABLED: bool = True
+    RECOMMENDER_WARMUP_RETRY_SECONDS: int = 10
+    # (新增) WebSocket：每條連線的送出佇列上限，以及佇列滿時的處理方式 ("disconnect" / "drop")
+    WS_SEND_QUEUE_SIZE: int = 256
+    WS_SLOW_CONSUMER_POLICY: str = "disconnect"
+    # (新增) 聊天訊息跨 worker 轉送：Redis 協定伺服器位址 (redis://host:port 或 unix:///path)
+    # 空字串表示單一 process (不轉送)
+    CHAT_BROKER_URL: str = ""
+    CHAT_BROKER_CHANNEL: str = "freelancer_match:chat"
+    # (新增) 聊天訊息群組提交：第一則訊息進來後最多等待的毫秒數、每批最多幾則
+    CHAT_WRITE_BATCH_DELAY_MS: float = 5.0
+    CHAT_WRITE_BATCH_MAX_SIZE: int = 200
+    # (新增) 每條 WebSocket 連線最多同時處理 (等待寫入) 幾則訊息
+    CHAT_MAX_INFLIGHT_PER_CONNECTION: int = 32
+    # (新增) 依模組設定日誌等級與結構化日誌的取樣比例 (格式: "模組=值,模組=值")
+    # 例: LOG_LEVELS="app.repositories=WARNING"
+    #     LOG_SAMPLE_RATES="app.services.recommendation_service=0.05"
+    LOG_LEVELS: str = ""
+    LOG_SAMPLE_RATES: str = ""
     
     # 環境變數檔案 
     class Config:
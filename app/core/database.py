@@ -1,6 +1,7 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.core.config import settings
+from app.core.db_pool_metrics import pool_metrics
 
 # 建立非同步引擎
 engine = create_async_engine(
@@ -9,6 +10,9 @@ engine = create_async_engine(
     echo=True, # (可選) 設為 True 會在 console 印出 SQL 語句
 )
 
+# (新增) 連線池借出 / 歸還計數 (見 /messages/connections/stats)
+pool_metrics.attach(engine.sync_engine)
+
 # 建立非同步 Session
 AsyncSessionLocal = sessionmaker(
     bind=engine,
@@ -0,0 +1,60 @@
+# app/core/db_pool_metrics.py
+# (新增) SQLAlchemy 連線池的借出 / 歸還計數
+#
+# 以 pool 事件 (checkout / checkin) 累計，用來確認長時間開著的 WebSocket
+# 在閒置時不佔用資料庫連線 (checked_out 應只反映正在處理中的請求 / 訊息)。
+import time
+from typing import Dict
+
+from sqlalchemy import event
+
+_CHECKOUT_AT = "checked_out_at"
+
+
+class PoolMetrics:
+    def __init__(self):
+        self.checked_out = 0
+        self.peak_checked_out = 0
+        self.checkouts_total = 0
+        self.connections_opened_total = 0
+        self.hold_seconds_total = 0.0
+        self.max_hold_seconds = 0.0
+
+    def attach(self, sync_engine) -> None:
+        """掛到 engine 的連線池 (AsyncEngine 請傳入 engine.sync_engine)"""
+        event.listen(sync_engine, "connect", self._on_connect)
+        event.listen(sync_engine, "checkout", self._on_checkout)
+        event.listen(sync_engine, "checkin", self._on_checkin)
+
+    def _on_connect(self, dbapi_connection, connection_record) -> None:
+        self.connections_opened_total += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        self.checked_out += 1
+        self.checkouts_total += 1
+        self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+        connection_record.info[_CHECKOUT_AT] = time.perf_counter()
+
+    def _on_checkin(self, dbapi_connection, connection_record) -> None:
+        checked_out_at = connection_record.info.pop(_CHECKOUT_AT, None)
+        if checked_out_at is None:
+            return  # 借出前就失效的連線
+        self.checked_out -= 1
+        held = time.perf_counter() - checked_out_at
+        self.hold_seconds_total += held
+        if held > self.max_hold_seconds:
+            self.max_hold_seconds = held
+
+    def stats(self) -> Dict:
+        return {
+            "checked_out": self.checked_out,
+            "peak_checked_out": self.peak_checked_out,
+            "checkouts_total": self.checkouts_total,
+            "connections_opened_total": self.connections_opened_total,
+            "avg_hold_seconds": self.hold_seconds_total / self.checkouts_total if self.checkouts_total else 0.0,
+            "max_hold_seconds": self.max_hold_seconds,
+        }
+
+
+# 實例化計數 (全域單例，每個 worker 各自累計)
+pool_metrics = PoolMetrics()
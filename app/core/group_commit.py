@@ -0,0 +1,97 @@
+# app/core/group_commit.py
+# (新增) 群組提交 (group commit)：把短時間內多個呼叫端的寫入合併成一次批次寫入
+#
+# 用法:
+#   batcher = GroupCommitBatcher(write_batch, max_delay=0.005, max_batch=200)
+#   result = await batcher.submit(item)   # 該筆資料寫入 (commit) 後才返回
+#
+# - 第一筆資料進來後最多等待 max_delay 秒 (或累積到 max_batch 筆) 就寫出一批
+# - 同一時間只有一批在寫入；寫入期間進來的資料排入下一批，順序與 submit 的順序相同
+# - write_batch(items) 回傳與 items 等長的結果 list；某一筆的結果是 Exception 時，
+#   只有該筆的呼叫端收到例外，write_batch 本身拋出例外時整批的呼叫端都收到該例外
+# - 沒有待寫入的資料時不保留背景 task
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+WriteBatchFunc = Callable[[List[Any]], Awaitable[List[Any]]]
+
+
+class GroupCommitBatcher:
+    def __init__(self, write_batch: WriteBatchFunc, max_delay: float = 0.005, max_batch: int = 200):
+        self.write_batch = write_batch
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        # 結構: [(item, future)]
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        # 批次已滿的通知 (由 flusher task 建立，綁定目前的 event loop)
+        self._full: Optional[asyncio.Event] = None
+        self._flusher: Optional[asyncio.Task] = None
+        # 累計計數
+        self.batches_total = 0
+        self.items_total = 0
+        self.failed_batches_total = 0
+        self.max_batch_seen = 0
+
+    def configure(self, max_delay: float, max_batch: int) -> None:
+        self.max_delay = max_delay
+        self.max_batch = max(1, max_batch)
+
+    async def submit(self, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if self._flusher is None or self._flusher.done() or self._flusher.get_loop() is not loop:
+            self._full = asyncio.Event()
+            self._flusher = loop.create_task(self._flush_loop())
+        elif len(self._pending) >= self.max_batch:
+            self._full.set()
+        return await future
+
+    async def _flush_loop(self) -> None:
+        while self._pending:
+            if len(self._pending) < self.max_batch and self.max_delay > 0:
+                # 等待更多資料加入同一批 (滿了就提早寫出)
+                self._full.clear()
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.max_delay)
+                except asyncio.TimeoutError:
+                    pass
+            batch = self._pending[:self.max_batch]
+            del self._pending[:self.max_batch]
+            await self._write(batch)
+
+    async def _write(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        self.batches_total += 1
+        self.items_total += len(batch)
+        self.max_batch_seen = max(self.max_batch_seen, len(batch))
+        try:
+            results = await self.write_batch([item for item, _ in batch])
+        except Exception as e:
+            self.failed_batches_total += 1
+            logger.error(f"Group commit of {len(batch)} items failed: {e}", exc_info=True)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue  # 呼叫端已取消 (例如連線中斷)；資料仍已寫入
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def stats(self) -> Dict:
+        return {
+            "pending": len(self._pending),
+            "batches_total": self.batches_total,
+            "items_total": self.items_total,
+            "failed_batches_total": self.failed_batches_total,
+            "avg_batch_size": self.items_total / self.batches_total if self.batches_total else 0.0,
+            "max_batch_seen": self.max_batch_seen,
+            "max_delay": self.max_delay,
+            "max_batch": self.max_batch,
+        }
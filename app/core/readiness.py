@@ -0,0 +1,64 @@
+# app/core/readiness.py
+# (新增) Worker 的預熱 / 就緒狀態
+#
+# 啟動時在背景執行推薦系統的預熱 (載入標籤詞彙、建立索引、試算一次推薦)，
+# 完成前 /health/ready 回傳 503，讓 load balancer 只把流量導向已預熱的 worker。
+import time
+from typing import Dict, Optional
+
+STATE_STARTING = "starting"
+STATE_WARMING = "warming"
+STATE_READY = "ready"
+STATE_FAILED = "failed"
+
+
+class WarmupState:
+    def __init__(self):
+        self.state = STATE_STARTING
+        self.attempts = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        # 結構: {步驟名稱: 耗時 (毫秒)}
+        self.steps: Dict[str, float] = {}
+
+    @property
+    def is_ready(self) -> bool:
+        return self.state == STATE_READY
+
+    def begin(self) -> None:
+        self.state = STATE_WARMING
+        self.attempts += 1
+        if self.started_at is None:
+            self.started_at = time.time()
+
+    def succeed(self, steps: Dict[str, float]) -> None:
+        self.state = STATE_READY
+        self.steps = steps
+        self.last_error = None
+        self.finished_at = time.time()
+
+    def fail(self, error: Exception) -> None:
+        # 失敗後維持未就緒，由呼叫端稍後重試
+        self.state = STATE_FAILED
+        self.last_error = f"{type(error).__name__}: {error}"
+
+    def mark_ready(self) -> None:
+        """不需要預熱時 (例如設定停用) 直接視為就緒"""
+        self.succeed({})
+
+    def stats(self) -> Dict:
+        return {
+            "state": self.state,
+            "attempts": self.attempts,
+            "duration_seconds": (
+                round(self.finished_at - self.started_at, 3)
+                if self.finished_at is not None and self.started_at is not None else None
+            ),
+            "steps_ms": self.steps,
+            "last_error": self.last_error,
+        }
+
+
+# 實例化就緒狀態 (全域單例，每個 worker 各自維護)
+warmup_state = WarmupState()
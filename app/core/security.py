@@ -7,7 +7,7 @@ from app.core.config import settings
 from fastapi import Depends, HTTPException, Query, status, WebSocket, WebSocketDisconnect # (修正) 匯入 WebSocket
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.core.database import get_db
+from app.core.database import get_db, AsyncSessionLocal
 from app.schemas.user_schema import TokenData # 確保已匯入
 from app.repositories.user_repo import UserRepository
 from app.models.user import User
@@ -105,10 +105,11 @@ async def get_current_user(
 async def get_current_user_from_websocket_token(
     websocket: WebSocket, # (修正) 傳入 WebSocket 以便處理關閉
     token: str = Query(...), # 從 Query 參數 (?token=...) 讀取
-    db: AsyncSession = Depends(get_db)
 ) -> User:
     """
     (M8.1 修正) WebSocket 專用的 Token 驗證依賴
+    (修改) 不使用 Depends(get_db)：依賴的 session 會維持到 WebSocket 關閉為止，
+    改為只在查詢使用者時開一個短暫的 session
     """
     credentials_exception = WebSocketDisconnect(
         code=status.WS_1008_POLICY_VIOLATION,
@@ -121,8 +122,9 @@ async def get_current_user_from_websocket_token(
         raise credentials_exception
         
     # 步驟 2: (修正) 直接使用 UserRepository，移除 AuthService 依賴
-    user_repo = UserRepository(db)
-    user = await user_repo.get_user_by_id(user_id=token_data.user_id)
+    async with AsyncSessionLocal() as db:
+        user_repo = UserRepository(db)
+        user = await user_repo.get_user_by_id(user_id=token_data.user_id)
     
     if user is None:
         raise credentials_exception
@@ -0,0 +1,116 @@
+# app/core/structured_logging.py
+# (新增) Service 層使用的結構化 / 取樣日誌
+#
+# 用法:
+#   slog = get_structured_logger(__name__)
+#   slog.info("freelancer_recommendations", employer_id=user.user_id, total=total,
+#             top_ids=lambda: top_ids(ranking.ranked, 5))
+#
+# - 每筆日誌是一個事件名稱加上 key=value 欄位 (輸出為一行 JSON)
+# - 格式化延後到 handler 真正輸出時才做；callable 欄位也只在輸出時才呼叫
+# - 未啟用的等級或未被取樣到的事件，只花一次 isEnabledFor 與一次亂數的成本
+# - 等級與取樣比例可依模組 (logger 名稱前綴) 設定，見 settings.LOG_LEVELS / LOG_SAMPLE_RATES
+import json
+import logging
+import random
+from typing import Dict, List, Sequence
+
+
+class _LazyEvent:
+    """logging 的 msg 物件：handler 呼叫 str() 時才序列化欄位"""
+
+    __slots__ = ("event", "fields", "_text")
+
+    def __init__(self, event: str, fields: Dict):
+        self.event = event
+        self.fields = fields
+        self._text = None
+
+    def __str__(self) -> str:
+        # 多個 handler 共用同一筆 record，只格式化一次
+        if self._text is None:
+            payload = {"event": self.event}
+            for key, value in self.fields.items():
+                payload[key] = value() if callable(value) else value
+            self._text = json.dumps(payload, ensure_ascii=False, default=str)
+        return self._text
+
+
+class StructuredLogger:
+    def __init__(self, name: str, sample_rate: float = 1.0):
+        self.name = name
+        self.logger = logging.getLogger(name)
+        # 只套用在 INFO (含) 以下的事件；WARNING 以上一律輸出
+        self.sample_rate = sample_rate
+
+    def log(self, level: int, event: str, **fields) -> None:
+        if not self.logger.isEnabledFor(level):
+            return
+        if level <= logging.INFO and self.sample_rate < 1.0:
+            if self.sample_rate <= 0.0 or random.random() >= self.sample_rate:
+                return
+            fields["sample_rate"] = self.sample_rate
+        self.logger.log(level, _LazyEvent(event, fields))
+
+    def debug(self, event: str, **fields) -> None:
+        self.log(logging.DEBUG, event, **fields)
+
+    def info(self, event: str, **fields) -> None:
+        self.log(logging.INFO, event, **fields)
+
+    def warning(self, event: str, **fields) -> None:
+        self.log(logging.WARNING, event, **fields)
+
+
+# 結構: {logger 名稱: StructuredLogger}
+_loggers: Dict[str, StructuredLogger] = {}
+# 結構: {模組前綴: 取樣比例}
+_sample_rates: Dict[str, float] = {}
+
+
+def get_structured_logger(name: str) -> StructuredLogger:
+    structured = _loggers.get(name)
+    if structured is None:
+        structured = _loggers[name] = StructuredLogger(name, _sample_rate_for(name))
+    return structured
+
+
+def _sample_rate_for(name: str) -> float:
+    """取最長相符的模組前綴 (例如 app.services 套用到 app.services.recommendation_service)"""
+    best, rate = -1, 1.0
+    for prefix, prefix_rate in _sample_rates.items():
+        if (name == prefix or name.startswith(prefix + ".")) and len(prefix) > best:
+            best, rate = len(prefix), prefix_rate
+    return rate
+
+
+def parse_module_settings(value: str) -> Dict[str, str]:
+    """解析 "module=value,module=value" 格式的設定"""
+    result = {}
+    for part in value.split(","):
+        if "=" not in part:
+            continue
+        module, setting = part.split("=", 1)
+        if module.strip():
+            result[module.strip()] = setting.strip()
+    return result
+
+
+def configure_structured_logging(levels: str = "", sample_rates: str = "") -> None:
+    """
+    levels: "app.repositories=WARNING,app.services.recommendation_service=INFO"
+    sample_rates: "app.services.recommendation_service=0.05" (0 ~ 1)
+    """
+    for module, level in parse_module_settings(levels).items():
+        logging.getLogger(module).setLevel(level.upper())
+
+    _sample_rates.clear()
+    for module, rate in parse_module_settings(sample_rates).items():
+        _sample_rates[module] = min(max(float(rate), 0.0), 1.0)
+    for name, structured in _loggers.items():
+        structured.sample_rate = _sample_rate_for(name)
+
+
+def top_ids(items: Sequence, n: int = 5, key=0, start: int = 0) -> List:
+    """items[start:] 前 n 筆的 ID (配合 lambda 延後到輸出時才計算)"""
+    return [item[key] for item in items[start: start + n]]
@@ -1,40 +1,249 @@
-# app/services/message_service.py 內，或 app/core/websocket_manager.py
+# app/core/websocket_manager.py
+# (修改) 唯一的 WebSocket 連線登錄表 (原本 message_service 另有一份重複的 ConnectionManager)
+#
+# 每條連線有自己的 connection_id，主表為 {connection_id: Connection}，
+# 另外維護 room / user 兩個次要索引 ({room_id: {connection_id}}、{user_id: {connection_id}})：
+# - connect / disconnect 皆為 O(1) (原本是 list.remove 的 O(n)，重連風暴時為 O(n^2))
+# - 可直接查詢「某個使用者的所有連線」(通知推播用)
+#
+# (新增) 每條連線有一個有上限的送出佇列，由該連線自己的 writer task 依序送出：
+# 廣播只是把訊息放進各連線的佇列 (不 await 任何 send)，慢速的用戶端不會拖慢其他人，
+# 也不會卡住發送者的接收迴圈。佇列滿時依 slow_consumer_policy 處理：
+#   "drop"       丟棄這則訊息 (計入 messages_dropped_total)
+#   "disconnect" 中斷該連線 (計入 slow_consumer_disconnects_total，用戶端重連後可重新載入歷史訊息)
+#
+# (新增) 廣播 / 推播經由 broker (app.core.chat_broker) 發布，多個 worker 時由 broker 轉送給
+# 其他 worker，再由各 worker 分送給自己的連線 (預設為單一 process 的 InProcessBroker)
 
-from fastapi import WebSocket, WebSocketDisconnect
-from typing import Dict, List, Tuple
+from fastapi import WebSocket, status
+from itertools import count
+from typing import Dict, List, Optional, Set
+import asyncio
+import json
 import logging
+import time
+
+from app.core.chat_broker import KIND_ROOM, KIND_USER, InProcessBroker
 
 logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+POLICY_DROP = "drop"
+POLICY_DISCONNECT = "disconnect"
+
+
+class Connection:
+    """一條 WebSocket 連線 (同一使用者在同一聊天室開多個分頁時，各自是一條連線)"""
+
+    __slots__ = ("connection_id", "room_id", "user_id", "websocket", "connected_at", "queue", "writer")
+
+    def __init__(self, connection_id: int, room_id: str, user_id: str, websocket: WebSocket,
+                 queue_size: int):
+        self.connection_id = connection_id
+        self.room_id = room_id
+        self.user_id = user_id
+        self.websocket = websocket
+        self.connected_at = time.monotonic()
+        # (新增) 待送出的訊息 (由 writer task 依序送出)
+        self.queue: "asyncio.Queue[str]" = asyncio.Queue(maxsize=queue_size)
+        self.writer: Optional[asyncio.Task] = None
+
 
-# 連線管理器：維護 'room_id' -> List[Tuple[user_id, WebSocket]] 的映射
 class ConnectionManager:
-    """管理 WebSocket 連線：用於廣播訊息給特定 Room 的所有連線。"""
-    
-    def __init__(self):
-        # 結構: {room_id: [(user_id, WebSocket)]}
-        self.active_connections: Dict[str, List[Tuple[str, WebSocket]]] = {}
+    """管理 WebSocket 連線：用於廣播訊息給特定 Room 的所有連線，或推播給特定使用者。"""
+
+    def __init__(self, queue_size: int = 256, slow_consumer_policy: str = POLICY_DISCONNECT):
+        self.queue_size = queue_size
+        self.slow_consumer_policy = slow_consumer_policy
+        self._ids = count(1)
+        # 結構: {connection_id: Connection}
+        self.connections: Dict[int, Connection] = {}
+        # 結構: {room_id: {connection_id}}
+        self.rooms: Dict[str, Set[int]] = {}
+        # 結構: {user_id: {connection_id}}
+        self.users: Dict[str, Set[int]] = {}
+        # 累計計數 (gauge 之外的 counter)
+        self.connects_total = 0
+        self.disconnects_total = 0
+        self.peak_connections = 0
+        self.messages_sent_total = 0
+        self.messages_dropped_total = 0
+        self.slow_consumer_disconnects_total = 0
+        # 正在關閉的慢速連線 (保留 task 參考，避免被回收)
+        self._closing: Set[asyncio.Task] = set()
+        # (新增) 跨 worker 的訊息轉送
+        self.broker = InProcessBroker()
+        self.broker.bind(self._deliver_local)
 
-    async def connect(self, room_id: str, user_id: str, websocket: WebSocket):
+    def configure(self, queue_size: int, slow_consumer_policy: str, broker=None) -> None:
+        """調整之後建立的連線的佇列上限與慢速用戶端處理方式；broker 為 None 時維持目前的 broker"""
+        self.queue_size = queue_size
+        self.slow_consumer_policy = slow_consumer_policy
+        if broker is not None:
+            self.broker = broker
+            self.broker.bind(self._deliver_local)
+
+    async def start(self) -> None:
+        """(新增) 啟動 broker 的訂閱 (應用程式啟動時)"""
+        await self.broker.start()
+
+    async def stop(self) -> None:
+        await self.broker.stop()
+
+    async def connect(self, room_id: str, user_id: str, websocket: WebSocket) -> Connection:
         await websocket.accept()
-        if room_id not in self.active_connections:
-            self.active_connections[room_id] = []
-        self.active_connections[room_id].append((user_id, websocket))
-        logging.info(f"User {user_id} connected to Room {room_id}. Total connections: {len(self.active_connections[room_id])}")
+        connection = self.register(room_id, user_id, websocket)
+        connection.writer = asyncio.create_task(self._write_loop(connection))
+        logger.info(f"User {user_id} connected to Room {room_id}. Total connections: {len(self.rooms[room_id])}")
+        return connection
+
+    def register(self, room_id: str, user_id: str, websocket: WebSocket) -> Connection:
+        """登錄一條已 accept 的連線"""
+        connection = Connection(next(self._ids), room_id, user_id, websocket, self.queue_size)
+        self.connections[connection.connection_id] = connection
+        self.rooms.setdefault(room_id, set()).add(connection.connection_id)
+        self.users.setdefault(user_id, set()).add(connection.connection_id)
+        self.connects_total += 1
+        self.peak_connections = max(self.peak_connections, len(self.connections))
+        return connection
+
+    def disconnect(self, connection: Connection) -> bool:
+        """移除連線；重複斷開時回傳 False"""
+        if self.connections.pop(connection.connection_id, None) is None:
+            return False
+        self._discard(self.rooms, connection.room_id, connection.connection_id)
+        self._discard(self.users, connection.user_id, connection.connection_id)
+        self.disconnects_total += 1
+        # 停止 writer (由 writer 自己呼叫時不取消自己)
+        if connection.writer is not None and connection.writer is not asyncio.current_task():
+            connection.writer.cancel()
+        logger.info(
+            f"User {connection.user_id} disconnected from Room {connection.room_id}. "
+            f"Remaining connections: {len(self.rooms.get(connection.room_id, ()))}"
+        )
+        return True
+
+    @staticmethod
+    def _discard(index: Dict[str, Set[int]], key: str, connection_id: int) -> None:
+        members = index.get(key)
+        if members is not None:
+            members.discard(connection_id)
+            if not members:
+                del index[key]
+
+    # --- 查詢 ---
+
+    def room_connections(self, room_id: str) -> List[Connection]:
+        return [self.connections[connection_id] for connection_id in self.rooms.get(room_id, ())]
 
-    def disconnect(self, room_id: str, user_id: str, websocket: WebSocket):
+    def user_connections(self, user_id: str, room_id: Optional[str] = None) -> List[Connection]:
+        """某個使用者的所有連線 (可限定聊天室)"""
+        connections = [self.connections[connection_id] for connection_id in self.users.get(user_id, ())]
+        if room_id is not None:
+            connections = [connection for connection in connections if connection.room_id == room_id]
+        return connections
+
+    def is_online(self, user_id: str) -> bool:
+        return user_id in self.users
+
+    # --- 傳送 ---
+
+    async def broadcast_message(self, room_id: str, message_json: str) -> int:
+        """
+        將 JSON 字串訊息廣播給特定 Room 的所有連線 (不等待送出)；
+        (修改) 經由 broker 發布，其他 worker 上的連線也會收到。回傳本機成功排入的連線數。
+        """
+        return await self.broker.publish(KIND_ROOM, room_id, message_json)
+
+    async def send_to_user(self, user_id: str, message_json: str) -> int:
+        """(新增) 推播給某個使用者的所有連線 (例如即時通知)，回傳本機成功排入的連線數。"""
+        return await self.broker.publish(KIND_USER, user_id, message_json)
+
+    def _deliver_local(self, kind: str, key: str, message_json: str) -> int:
+        """broker 的回呼：分送給本機 (此 worker) 的連線"""
+        if kind == KIND_ROOM:
+            return self._enqueue_all(self.room_connections(key), message_json)
+        if kind == KIND_USER:
+            return self._enqueue_all(self.user_connections(key), message_json)
+        return 0
+
+    def send_json(self, connection: Connection, data: Dict) -> bool:
+        """(新增) 傳送給單一連線 (例如錯誤訊息)；同樣經過佇列，不會與廣播交錯送出"""
+        return self.enqueue(connection, json.dumps(data, separators=(",", ":"), ensure_ascii=False))
+
+    def _enqueue_all(self, connections: List[Connection], message_json: str) -> int:
+        return sum(1 for connection in connections if self.enqueue(connection, message_json))
+
+    def enqueue(self, connection: Connection, message_json: str) -> bool:
         try:
-            self.active_connections[room_id].remove((user_id, websocket))
-            if not self.active_connections[room_id]:
-                del self.active_connections[room_id]
-            logging.info(f"User {user_id} disconnected from Room {room_id}. Remaining connections: {self.active_connections.get(room_id, '0')}")
-        except ValueError:
-            pass # 可能是重複斷開
-
-    async def broadcast_message(self, room_id: str, message: str):
-        """將訊息廣播給特定 Room 的所有連線。"""
-        if room_id in self.active_connections:
-            for _, connection in self.active_connections[room_id]:
-                await connection.send_text(message)
-
-# 實例化管理器
-manager = ConnectionManager()
\ No newline at end of file
+            connection.queue.put_nowait(message_json)
+            return True
+        except asyncio.QueueFull:
+            pass
+
+        # 慢速用戶端：佇列已滿
+        if self.slow_consumer_policy == POLICY_DROP:
+            self.messages_dropped_total += 1
+            return False
+        self.messages_dropped_total += connection.queue.qsize() + 1
+        self.slow_consumer_disconnects_total += 1
+        logger.warning(
+            f"Disconnecting slow client {connection.user_id} in room {connection.room_id}: "
+            f"send queue full ({self.queue_size})"
+        )
+        if self.disconnect(connection):
+            task = asyncio.get_running_loop().create_task(self._close(connection))
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+        return False
+
+    async def _write_loop(self, connection: Connection) -> None:
+        """每條連線各自的 writer：依序送出佇列中的訊息"""
+        websocket = connection.websocket
+        queue = connection.queue
+        try:
+            while True:
+                message_json = await queue.get()
+                await websocket.send_text(message_json)
+                self.messages_sent_total += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(
+                f"Failed to send message to client {connection.user_id} in room {connection.room_id}: {e}"
+            )
+            # 清理已斷開的連線
+            self.disconnect(connection)
+
+    @staticmethod
+    async def _close(connection: Connection) -> None:
+        try:
+            await connection.websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason="Client too slow")
+        except Exception:
+            pass # 連線可能已經關閉
+
+    def stats(self) -> Dict[str, int]:
+        """目前的連線 gauge 與累計計數"""
+        return {
+            "connections": len(self.connections),
+            "rooms": len(self.rooms),
+            "users": len(self.users),
+            "peak_connections": self.peak_connections,
+            "connects_total": self.connects_total,
+            "disconnects_total": self.disconnects_total,
+            # (新增) 送出佇列
+            "queued_messages": sum(connection.queue.qsize() for connection in self.connections.values()),
+            "max_queue_depth": max(
+                (connection.queue.qsize() for connection in self.connections.values()), default=0
+            ),
+            "queue_size": self.queue_size,
+            "messages_sent_total": self.messages_sent_total,
+            "messages_dropped_total": self.messages_dropped_total,
+            "slow_consumer_disconnects_total": self.slow_consumer_disconnects_total,
+            "broker": self.broker.stats(),
+        }
+
+
+# 實例化管理器 (全域單例，每個 worker 各自維護)
+manager = ConnectionManager()
@@ -1,5 +1,8 @@
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 import os # (!! 修正新增 !!)：匯入 os 模組
 from fastapi.staticfiles import StaticFiles # (!! 修正新增 !!)：匯入 StaticFiles
@@ -33,13 +36,66 @@ from app.models import contract
 from app.models import notification
 from app.models import message
 
+# (新增) 推薦系統：啟動時預熱 (標籤相似度表、倒排索引、試算一次推薦)
+from app.core.database import AsyncSessionLocal
+from app.services.recommendation_service import RecommendationService
+from app.utils.scoring_pool import scoring_pool
+# (新增) 依模組設定的結構化 / 取樣日誌
+from app.core.config import settings
+from app.core.structured_logging import configure_structured_logging
+# (新增) 啟動預熱與就緒狀態
+from app.core.readiness import warmup_state
+# (新增) 聊天訊息跨 worker 轉送 (broker 的訂閱隨應用程式啟動 / 關閉)
+from app.services.message_service import manager as chat_manager
+
 
 
 # (新增) 設定基礎日誌
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__) # 建立一個 logger 實例
+# (新增) 依模組調整日誌等級與結構化日誌的取樣比例
+configure_structured_logging(settings.LOG_LEVELS, settings.LOG_SAMPLE_RATES)
+
+
+# --- (新增) 推薦系統預熱 ---
+# 取代原本的 startup 事件 (只建立標籤相似度表)：
+# 載入標籤詞彙、建立索引、啟動計分 pool 並試算一次推薦，完成後 worker 才回報就緒
+async def warm_up_recommender():
+    while True:
+        warmup_state.begin()
+        try:
+            async with AsyncSessionLocal() as db:
+                steps = await RecommendationService(db).warm_up()
+            warmup_state.succeed(steps)
+            logger.info(f"推薦系統預熱完成: {warmup_state.stats()}")
+            return
+        except Exception as e:
+            # 資料庫暫時無法連線時不阻擋啟動，稍後重試 (期間 /health/ready 維持 503)
+            warmup_state.fail(e)
+            logger.warning(f"推薦系統預熱失敗，{settings.RECOMMENDER_WARMUP_RETRY_SECONDS} 秒後重試: {e}")
+            await asyncio.sleep(settings.RECOMMENDER_WARMUP_RETRY_SECONDS)
+
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 預熱在背景執行：worker 可以先回應 /health/ready (503)，不會讓啟動逾時
+    await chat_manager.start()
+    warmup_task = None
+    if settings.RECOMMENDER_WARMUP_ENABLED:
+        warmup_task = asyncio.create_task(warm_up_recommender())
+    else:
+        warmup_state.mark_ready()
+    try:
+        yield
+    finally:
+        if warmup_task is not None:
+            warmup_task.cancel()
+        # 關閉時結束推薦計分 process pool
+        scoring_pool.shutdown()
+        await chat_manager.stop()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # --- (!! 修正新增 !!)：設定靜態檔案服務 ---
 # 1. 定義靜態檔案目錄
@@ -77,6 +133,12 @@ app.add_middleware(
 def read_root():
     return {"status": "success", "message": "Backend is running!"}
 
+# --- (新增) 就緒檢查：推薦系統預熱完成前回傳 503 (供 load balancer 判斷是否導入流量) ---
+@app.get("/health/ready")
+def read_readiness():
+    status_code = 200 if warmup_state.is_ready else 503
+    return JSONResponse(status_code=status_code, content=warmup_state.stats())
+
 # --- 載入 API 路由 ---
 app.include_router(auth_router.router)
 app.include_router(user_router.router)
@@ -1,5 +1,5 @@
 # models/project.py
-from sqlalchemy import Column, String, TEXT, INT, DECIMAL, TIMESTAMP, ForeignKey, Enum, CHAR, func
+from sqlalchemy import Column, String, TEXT, INT, DECIMAL, TIMESTAMP, ForeignKey, Enum, CHAR, Index, func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 # (移除) from app.models.skill_tag import SkillTag # --- 修正：移除頂層 import，避免循環依賴 ---
@@ -7,6 +7,11 @@ from app.core.database import Base
 class Project(Base):
     # 告訴 SQLAlchemy，這個類別對應到資料庫中名為 projects 的表格 (table)
     __tablename__ = "projects"
+    # (新增) 推薦系統：篩選「招募中且未過投標截止日」的案件 (WHERE status = ? AND proposals_deadline >= ?)
+    # 資料表由 DDL 管理，此宣告不會自動建立索引：部署時需手動執行 README「資料庫索引」一節的 CREATE INDEX
+    __table_args__ = (
+        Index("ix_projects_status_proposals_deadline", "status", "proposals_deadline"),
+    )
 
     # 根據 DDL
     project_id = Column(CHAR(36), primary_key=True)
@@ -1,9 +1,9 @@
 # app/repositories/message_repo.py
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, update
-from sqlalchemy.orm import selectinload, joinedload
-from typing import Optional, List
+from sqlalchemy import select, and_, update, insert
+from sqlalchemy.orm import selectinload, joinedload, lazyload
+from typing import Optional, List, Dict
 import uuid
 
 # (新增) 匯入 Project，以便在 joinedload 中使用
@@ -34,6 +34,23 @@ class MessageRepository:
         result = await self.db.execute(stmt)
         return result.scalars().first()
 
+    async def get_rooms_by_ids_with_participants(self, room_ids: List[str]) -> Dict[str, ChatRoom]:
+        """(新增) 一次載入多個聊天室 (群組提交用)，回傳 {room_id: ChatRoom}"""
+        if not room_ids:
+            return {}
+        stmt = (
+            select(ChatRoom)
+            .where(ChatRoom.room_id.in_(room_ids))
+            .options(
+                selectinload(ChatRoom.participants),
+                joinedload(ChatRoom.project, innerjoin=False),
+                # ChatRoom.messages 預設為 selectin：改為 lazyload，不載入整個聊天室的歷史訊息
+                lazyload(ChatRoom.messages)
+            )
+        )
+        result = await self.db.execute(stmt)
+        return {room.room_id: room for room in result.scalars().unique().all()}
+
     # --- (必要修正) ---
     async def get_rooms_by_user_id(self, user_id: str) -> List[ChatRoom]:
         """
@@ -153,6 +170,24 @@ class MessageRepository:
         
         return new_message
 
+    async def insert_messages(self, rows: List[Dict]) -> None:
+        """(新增) 以一個多列 INSERT 新增多筆訊息 (不 commit，rows 需包含 message_id)"""
+        if rows:
+            await self.db.execute(insert(Message).values(rows))
+
+    async def get_messages_by_ids(self, message_ids: List[str]) -> List[Message]:
+        """(新增) 依 ID 載入訊息 (含 sender 與資料庫產生的 created_at)，順序與 message_ids 相同"""
+        if not message_ids:
+            return []
+        stmt = (
+            select(Message)
+            .where(Message.message_id.in_(message_ids))
+            .options(joinedload(Message.sender))
+        )
+        result = await self.db.execute(stmt)
+        by_id = {message.message_id: message for message in result.scalars().unique().all()}
+        return [by_id[message_id] for message_id in message_ids if message_id in by_id]
+
     async def mark_messages_as_read(self, room_id: str, user_id: str) -> None:
         # (保持不變)
         update_stmt = (
@@ -2,8 +2,9 @@
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy import insert
 from sqlalchemy.orm import selectinload
-from typing import List, Optional
+from typing import Dict, List, Optional
 import uuid, logging
 
 from app.models.notification import Notification
@@ -15,6 +16,13 @@ class NotificationRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
 
+    async def insert_notifications(self, rows: List[Dict]) -> None:
+        """
+        (新增) 以一個多列 INSERT 新增多筆通知 (不 commit，由呼叫端與其他寫入一起提交)
+        """
+        if rows:
+            await self.db.execute(insert(Notification).values(rows))
+
     async def create_notification(self, notification: Notification) -> Notification:
         """
         新增一筆通知
@@ -11,6 +11,9 @@ from typing import List, Optional
 import uuid
 from fastapi import HTTPException, status
 
+# (新增) 推薦系統的資料異動事件 (倒排索引 / 結果快取)
+from app.utils import recommendation_events
+
 
 class ProfileRepository:
     def __init__(self, db: AsyncSession):
@@ -57,6 +60,10 @@ class ProfileRepository:
             
         await self.db.commit()
         await self.db.refresh(profile)
+
+        # (新增) visibility 可能已變更，同步推薦索引與快取
+        recommendation_events.profile_changed(profile)
+
         return profile
 
     
@@ -119,6 +126,10 @@ class ProfileRepository:
         self.db.add_all(new_skill_links)
         
         await self.db.commit() # 確保 INSERT 執行
+
+        # (修正) expire_on_commit=False，identity map 中的 skills 仍是 clear() 後的舊集合
+        # 先重新載入 skills，下面重新獲取時才會拿到剛寫入的技能
+        await self.db.refresh(profile, attribute_names=["skills"])
         
         # 重新獲取完整的 Profile 物件
         updated_profile = await self.get_freelancer_profile_by_user_id(profile.user_id)
@@ -126,6 +137,9 @@ class ProfileRepository:
         if updated_profile is None:
              raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, "Failed to re-fetch profile")
 
+        # (新增) 同步推薦索引與快取
+        recommendation_events.profile_changed(updated_profile)
+
         return updated_profile.skills # <-- (Fix 2) 回傳技能列表，而不是 Profile 物件
     
     async def list_public_freelancer_profiles_with_skills(self) -> List[FreelancerProfile]:
@@ -140,7 +154,78 @@ class ProfileRepository:
         
         result = await self.db.execute(stmt)
         return result.scalars().all()
+
+    # (新增) 推薦快取命中時：依 ID 載入當頁 Profile
+    async def list_freelancer_profiles_by_ids(self, profile_ids: List[str]) -> List[FreelancerProfile]:
+        """
+        依 ID 列表載入工作者 Profile (包含技能)，回傳順序與 profile_ids 相同
+        """
+        if not profile_ids:
+            return []
+        stmt = select(FreelancerProfile).where(FreelancerProfile.profile_id.in_(profile_ids))
+        result = await self.db.execute(stmt)
+        profiles_by_id = {p.profile_id: p for p in result.scalars().all()}
+        return [profiles_by_id[pid] for pid in profile_ids if pid in profiles_by_id]
+
+    # (新增) 推薦索引：所有「公開」工作者的 (profile_id, tag name) 配對
+    async def list_public_profile_tag_names(self) -> List[tuple]:
+        """
+        以單一扁平查詢取得 '公開' 工作者與其技能名稱，用於建立推薦索引
+        (不建立任何 ORM 物件)
+        """
+        stmt = (
+            select(UserSkillTag.profile_id, SkillTag.name)
+            .join(SkillTag, SkillTag.tag_id == UserSkillTag.tag_id)
+            .join(FreelancerProfile, FreelancerProfile.profile_id == UserSkillTag.profile_id)
+            .where(FreelancerProfile.visibility == '公開')
+        )
+        result = await self.db.execute(stmt)
+        return result.all()
+
+    # (新增) 推薦用的輕量投影查詢：「公開」工作者的 (profile_id, reputation_score, tag name, familiarity_level)
+    async def list_public_profile_skill_rows(self, profile_ids: List[str]) -> List[tuple]:
+        """
+        以單一扁平查詢取得候選工作者的信譽分數、技能名稱與熟悉度 (不建立任何 ORM 物件)
+        只有最後回傳的那一頁才載入完整 FreelancerProfile；結果依 profile_id 排序
+        """
+        stmt = (
+            select(
+                UserSkillTag.profile_id, FreelancerProfile.reputation_score,
+                SkillTag.name, UserSkillTag.familiarity_level
+            )
+            .join(SkillTag, SkillTag.tag_id == UserSkillTag.tag_id)
+            .join(FreelancerProfile, FreelancerProfile.profile_id == UserSkillTag.profile_id)
+            .where(
+                FreelancerProfile.visibility == '公開',
+                UserSkillTag.profile_id.in_(profile_ids)
+            )
+            .order_by(UserSkillTag.profile_id)
+        )
+        result = await self.db.execute(stmt)
+        return result.all()
     
+    # (新增) 批次推薦：一批工作者的 (profile_id, user_id)，依 profile_id 排序
+    async def list_freelancer_profile_ids(
+        self, user_ids: Optional[List[str]] = None
+    ) -> List[tuple]:
+        stmt = select(FreelancerProfile.profile_id, FreelancerProfile.user_id)
+        if user_ids is not None:
+            stmt = stmt.where(FreelancerProfile.user_id.in_(user_ids))
+        stmt = stmt.order_by(FreelancerProfile.profile_id)
+        result = await self.db.execute(stmt)
+        return result.all()
+
+    # (新增) 批次推薦：指定工作者的 (profile_id, tag name, familiarity_level)，不限公開狀態
+    async def list_profile_tag_names(self, profile_ids: List[str]) -> List[tuple]:
+        stmt = (
+            select(UserSkillTag.profile_id, SkillTag.name, UserSkillTag.familiarity_level)
+            .join(SkillTag, SkillTag.tag_id == UserSkillTag.tag_id)
+            .where(UserSkillTag.profile_id.in_(profile_ids))
+            .order_by(UserSkillTag.profile_id)
+        )
+        result = await self.db.execute(stmt)
+        return result.all()
+
     # (新增) 需求：雇主搜尋工作者
     async def list_public_freelancers_by_skills(
         self, tag_ids: Optional[List[str]] = None
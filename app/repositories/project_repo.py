@@ -3,6 +3,7 @@
 
 import logging
 import uuid
+from datetime import datetime
 from typing import List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
@@ -13,13 +14,17 @@ from app.models.employer_profile import EmployerProfile
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-from sqlalchemy import func, delete 
+from sqlalchemy import func, delete, or_
 from fastapi import HTTPException
 
 # 匯入 Models
 from app.models.project import Project, ProjectSkillTag
 from app.models.user import User
 from app.models.proposal import Proposal # --- (新增) --- 為了 Eager Loading
+from app.models.skill_tag import SkillTag
+
+# (新增) 推薦系統的資料異動事件 (倒排索引 / 結果快取)
+from app.utils import recommendation_events
 
 # 匯入 Schemas
 from app.schemas.project_schema import ProjectCreate, ProjectUpdate
@@ -67,6 +72,9 @@ class ProjectRepository:
             # 這種情況幾乎不可能發生，但作為防禦性程式設計
             raise HTTPException(status_code=404, detail="剛建立的案件找不到")
 
+        # (新增) 同步推薦索引與快取
+        recommendation_events.project_changed(complete_project)
+
         return complete_project # 回傳這個 Pydantic 可以安全序列化的物件
     # 獲取單一案件 (包含技能)
     async def get_project_by_id(self, project_id: str) -> Project | None:
@@ -204,6 +212,99 @@ class ProjectRepository:
 
         result = await self.db.execute(stmt)
         return result.scalars().all()
+
+    # (新增) 推薦快取命中時：依 ID 載入當頁案件
+    async def list_projects_by_ids(self, project_ids: List[str]) -> List[Project]:
+        """
+        依 ID 列表載入案件 (包含技能及雇主資訊)，回傳順序與 project_ids 相同
+        """
+        if not project_ids:
+            return []
+        stmt = select(Project).where(Project.project_id.in_(project_ids)).options(
+            joinedload(Project.employer).
+            selectinload(User.employer_profile)
+        )
+        result = await self.db.execute(stmt)
+        projects_by_id = {p.project_id: p for p in result.scalars().all()}
+        return [projects_by_id[pid] for pid in project_ids if pid in projects_by_id]
+
+    # (新增) 推薦用的輕量投影查詢：「招募中」案件的 (project_id, tag name) 配對
+    async def list_active_project_tag_names(
+        self,
+        project_ids: Optional[List[str]] = None,
+        work_type: Optional[str] = None,
+        location: Optional[str] = None,
+        budget_min: Optional[float] = None,
+        budget_max: Optional[float] = None,
+        deadline_after: Optional[datetime] = None
+    ) -> List[tuple]:
+        """
+        以單一扁平查詢取得 '招募中' 案件與其技能名稱 (不建立任何 ORM 物件)
+        用於建立推薦索引，以及推薦計分 (只有最後回傳的那一頁才載入完整 Project)
+
+        project_ids: 只查詢指定的候選案件；結果依 project_id 排序
+        (新增) 推薦篩選條件 (在 SQL 中先行過濾，縮小送入計分的候選集合)：
+        - work_type: 精確比對；location: 模糊比對 (與 list_projects 相同)
+        - budget_min / budget_max: 案件預算區間與指定區間有交集 (未填預算的一端視為不限)
+        - deadline_after: 排除投標截止日早於此時間的案件 (未設定截止日的案件保留)，
+          配合 (status, proposals_deadline) 複合索引
+        """
+        stmt = (
+            select(ProjectSkillTag.project_id, SkillTag.name)
+            .join(SkillTag, SkillTag.tag_id == ProjectSkillTag.tag_id)
+            .join(Project, Project.project_id == ProjectSkillTag.project_id)
+            .where(Project.status == '招募中')
+        )
+        if project_ids is not None:
+            stmt = stmt.where(ProjectSkillTag.project_id.in_(project_ids))
+        if deadline_after is not None:
+            stmt = stmt.where(or_(
+                Project.proposals_deadline.is_(None),
+                Project.proposals_deadline >= deadline_after
+            ))
+        if work_type:
+            stmt = stmt.where(Project.work_type == work_type)
+        if location:
+            stmt = stmt.where(Project.location.ilike(f"%{location}%"))
+        if budget_min is not None:
+            stmt = stmt.where(or_(Project.budget_max.is_(None), Project.budget_max >= budget_min))
+        if budget_max is not None:
+            stmt = stmt.where(or_(Project.budget_min.is_(None), Project.budget_min <= budget_max))
+        stmt = stmt.order_by(ProjectSkillTag.project_id)
+
+        result = await self.db.execute(stmt)
+        return result.all()
+
+    # (新增) 物化推薦清單：候選案件的投標截止日 (讀取清單時據此移除已過期的案件)
+    async def list_project_deadlines(self, project_ids: List[str]) -> List[tuple]:
+        """回傳有設定投標截止日的 (project_id, proposals_deadline)"""
+        if not project_ids:
+            return []
+        stmt = select(Project.project_id, Project.proposals_deadline).where(
+            Project.project_id.in_(project_ids),
+            Project.proposals_deadline.is_not(None)
+        )
+        result = await self.db.execute(stmt)
+        return result.all()
+    
+    # (新增) 推薦工作者給雇主：該雇主「招募中」案件的 (project_id, title, tag name)
+    async def list_employer_active_project_tag_names(self, employer_id: str) -> List[tuple]:
+        """
+        以單一扁平查詢取得雇主招募中案件的技能名稱 (不建立 Project ORM 物件，
+        也不會觸發 skills 的 selectin 載入)；結果依 project_id 排序
+        """
+        stmt = (
+            select(Project.project_id, Project.title, SkillTag.name)
+            .join(ProjectSkillTag, ProjectSkillTag.project_id == Project.project_id)
+            .join(SkillTag, SkillTag.tag_id == ProjectSkillTag.tag_id)
+            .where(
+                Project.employer_id == employer_id,
+                Project.status == '招募中'
+            )
+            .order_by(Project.project_id)
+        )
+        result = await self.db.execute(stmt)
+        return result.all()
     
     # 查看特定雇主的所有案件
     async def list_projects_by_employer_id(self, employer_id: str) -> List[Project]:
@@ -237,6 +338,10 @@ class ProjectRepository:
         if refreshed_project is None:
              # 理論上不可能
             raise HTTPException(status_code=500, detail="Failed to re-fetch project after update")
+
+        # (新增) 狀態或技能可能已變更，同步推薦索引與快取
+        recommendation_events.project_changed(refreshed_project)
+
         return refreshed_project
 
     # (新增) 需求二：更新案件技能標籤
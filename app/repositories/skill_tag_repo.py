@@ -1,10 +1,21 @@
 # app/repositories/skill_tag_repo.py
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import func
+from sqlalchemy import func, event
 from app.models.skill_tag import SkillTag
 from typing import List
 
+# (新增) 推薦系統的標籤相似度表
+from app.utils.tag_similarity import similarity_table
+
+
+# (新增) SkillTag 有任何新增 / 修改 / 刪除時，標記相似度表需要重建
+def _mark_similarity_table_dirty(mapper, connection, target):
+    similarity_table.mark_dirty()
+
+for _event_name in ("after_insert", "after_update", "after_delete"):
+    event.listen(SkillTag, _event_name, _mark_similarity_table_dirty)
+
 class SkillTagRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
@@ -14,6 +25,27 @@ class SkillTagRepository:
         stmt = select(SkillTag).where(SkillTag.is_managed == True)
         result = await self.db.execute(stmt)
         return result.scalars().all()
+
+    # (新增) 推薦系統：完整的標籤詞彙表 (包含非系統管理的標籤)
+    async def list_all_tag_names(self) -> List[str]:
+        """列出所有技能標籤名稱 (用於建立標籤相似度表)"""
+        stmt = select(SkillTag.name)
+        result = await self.db.execute(stmt)
+        return result.scalars().all()
+
+    # (新增) 模糊搜尋：tag_id <-> 名稱 的轉換
+    async def list_tag_names_by_ids(self, tag_ids: List[str]) -> List[str]:
+        stmt = select(SkillTag.name).where(SkillTag.tag_id.in_(tag_ids))
+        result = await self.db.execute(stmt)
+        return result.scalars().all()
+
+    async def list_tag_ids_by_names(self, names: List[str]) -> List[str]:
+        """依名稱 (不分大小寫) 取得 tag_id"""
+        stmt = select(SkillTag.tag_id).where(
+            func.lower(SkillTag.name).in_([name.lower() for name in names])
+        )
+        result = await self.db.execute(stmt)
+        return result.scalars().all()
     
     async def count_tags_by_ids(self, tag_ids: List[str]) -> int:
         """
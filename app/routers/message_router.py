@@ -2,12 +2,15 @@
 
 from fastapi import APIRouter, Depends, status, WebSocket, WebSocketDisconnect, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.core.database import get_db
+from app.core.database import get_db, AsyncSessionLocal
+from app.core.db_pool_metrics import pool_metrics
+from app.core.config import settings
 from app.core.security import get_current_user, get_current_user_from_websocket_token
-from app.services.message_service import MessageService, manager
+from app.services.message_service import MessageService, manager, chat_writer
 from app.schemas.message_schema import RoomCreate, RoomOut, MessageOut
 from app.models.user import User
-from typing import List
+from typing import List, Set
+import asyncio
 import logging
 
 router = APIRouter(prefix="/messages", tags=["Messaging"])
@@ -56,6 +59,15 @@ async def get_history_messages(
     # Repo 已 Eager Load sender 並按 (舊 -> 新) 排序
     return messages
 
+# (新增) 管理員：目前 worker 的 WebSocket 連線 gauge
+@router.get("/connections/stats", summary="WebSocket 連線統計 (系統管理員)")
+async def get_connection_stats(user: User = Depends(get_current_user)):
+    if user.role != "系統管理員":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="只有系統管理員可以查看連線統計")
+    # (新增) 連線池借出數：閒置的 WebSocket 不應佔用資料庫連線
+    # (新增) 聊天訊息群組提交的批次統計
+    return {**manager.stats(), "db_pool": pool_metrics.stats(), "write_batches": chat_writer.stats()}
+
 
 # --- WebSocket Endpoint ---
 
@@ -66,18 +78,18 @@ async def websocket_endpoint(
     # 【安全修正】使用依賴注入從 Token 獲取 User
     # 前端連線 URL 必須是: /ws/{room_id}?token=...
     user: User = Depends(get_current_user_from_websocket_token),
-    db: AsyncSession = Depends(get_db)
 ):
     """
     (M8.2) WebSocket 即時通訊端點。
     - 連線 URL: /ws/{room_id}?token=<JWT_TOKEN>
+    (修改) 不再以 Depends(get_db) 持有整條連線期間的 session (閒置的分頁會佔住連線池)，
+    權限檢查開一個短暫的 session，訊息則由群組提交的批次寫入，用完立即歸還
     """
     
-    service = MessageService(db)
-    
     # 1. 驗證連線權限
     try:
-        is_participant = await service.check_user_room_permission(room_id, user)
+        async with AsyncSessionLocal() as db:
+            is_participant = await MessageService(db).check_user_room_permission(room_id, user)
         if not is_participant:
             # 如果驗證失敗，關閉連線
             await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Not authorized")
@@ -87,30 +99,50 @@ async def websocket_endpoint(
          return
 
     # 2. 建立連線
-    await manager.connect(room_id, user.user_id, websocket)
-    
+    connection = await manager.connect(room_id, user.user_id, websocket)
+
+    # (新增) 不等上一則訊息寫入就繼續接收下一則 (同一連線的連續訊息可進入同一批次)，
+    # 處理中的訊息數以 semaphore 限制；群組提交依送出順序完成，ack / 廣播的順序不變
+    inflight = asyncio.Semaphore(settings.CHAT_MAX_INFLIGHT_PER_CONNECTION)
+    tasks: Set[asyncio.Task] = set()
+
+    async def process_message(data: str) -> None:
+        # 3. 處理訊息：儲存到 DB 並廣播
+        try:
+            # 這裡調用 Service 處理持久化和廣播
+            # (修改) 由群組提交批次寫入 (批次自己開 session)，寫入後回覆 ack 再廣播
+            await MessageService.handle_websocket_message(room_id, user.user_id, data, connection)
+
+        except Exception as e:
+            # 如果儲存或廣播失敗，給單一使用者發送錯誤訊息
+            logging.error(f"Error handling message in room {room_id}: {e}")
+            error_msg = {"type": "error", "content": f"Message processing failed: {str(e)}"}
+            # (修改) 經由送出佇列傳送，不與廣播訊息交錯
+            manager.send_json(connection, error_msg)
+        finally:
+            inflight.release()
+
     try:
         while True:
             # 接收前端訊息 (JSON 字串)
             data = await websocket.receive_text()
-            
-            # 3. 處理訊息：儲存到 DB 並廣播
-            try:
-                # 這裡調用 Service 處理持久化和廣播
-                await service.handle_websocket_message(room_id, user.user_id, data)
-                
-            except Exception as e:
-                # 如果儲存或廣播失敗，給單一使用者發送錯誤訊息
-                logging.error(f"Error handling message in room {room_id}: {e}")
-                error_msg = {"type": "error", "content": f"Message processing failed: {str(e)}"}
-                await websocket.send_json(error_msg)
+            await inflight.acquire()
+            task = asyncio.create_task(process_message(data))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
                 
     except WebSocketDisconnect:
         # 4. 斷開連線
-        manager.disconnect(room_id, user.user_id, websocket)
+        manager.disconnect(connection)
         # (可選) 廣播離線通知
         # await manager.broadcast_message(room_id, f"User {user_id} left the chat.")
     except Exception as e:
         # 處理意外錯誤
         logging.error(f"Unexpected error in WS {room_id} for user {user.user_id}: {e}")
-        manager.disconnect(room_id, user.user_id, websocket)
\ No newline at end of file
+        manager.disconnect(connection)
+    finally:
+        # (新增) 連線結束時取消尚在處理中的訊息，並等待它們結束 (不留下孤兒 task)
+        pending = list(tasks)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
\ No newline at end of file
@@ -112,12 +112,14 @@ async def get_public_freelancer_profile(
 )
 async def search_public_freelancers(
     request: Request, # 注入 Request 以處理陣列參數
+    fuzzy: bool = False, # (新增) 是否一併搜尋相似的標籤 (拼字錯誤、變體)
     db: AsyncSession = Depends(get_db)
 ):
     """
     (雇主) 依技能標籤搜尋「公開」的工作者 Profile。
     
     前端應使用 `tag_id[]` 作為 query 參數名稱來傳遞陣列。
+    `fuzzy=true` 時也會找到擁有相似技能標籤 (相似度 > 0.7) 的工作者。
     """
     # 仿照 project_router.py，從 query_params 手動解析陣列
     logger.info("Request query parameters: %s", request.query_params)
@@ -131,6 +133,6 @@ async def search_public_freelancers(
     tag_ids = tag_ids_from_query if tag_ids_from_query else None
     
     service = ProfileService(db)
-    profiles = await service.search_freelancers(tag_ids=tag_ids)
+    profiles = await service.search_freelancers(tag_ids=tag_ids, fuzzy=fuzzy)
     
     return profiles
\ No newline at end of file
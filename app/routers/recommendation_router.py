@@ -1,14 +1,17 @@
 # app/routers/recommendation_router.py (新檔案)
-from fastapi import APIRouter, Depends, Query
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 
-from app.core.database import get_db
+from app.core.database import get_db, AsyncSessionLocal
 from app.core.security import get_current_user
 from app.models.user import User
 from app.services.recommendation_service import RecommendationService
-from app.schemas.project_schema import PaginatedProjectRecommendationOut
-from app.schemas.profile_schema import PaginatedFreelancerRecommendationOut
+from app.utils.recommendation_metrics import recommendation_metrics
+from app.schemas.project_schema import PaginatedProjectRecommendationOut, JobRecommendationFilter
+from app.schemas.profile_schema import PaginatedFreelancerRecommendationOut, GroupedFreelancerRecommendationOut
 router = APIRouter(
     prefix="/recommendations",
     tags=["Recommendations"],
@@ -21,6 +24,18 @@ async def get_recommended_jobs(
     current_user: User = Depends(get_current_user),
     limit: int = Query(10, ge=1),
     offset: int = Query(0, ge=0),
+    # (新增) 候選案件篩選條件
+    work_type: Optional[str] = Query(None, description="工作型態: 遠端 / 實體 / 混合"),
+    location: Optional[str] = Query(None, max_length=255),
+    budget_min: Optional[float] = Query(None, ge=0),
+    budget_max: Optional[float] = Query(None, ge=0),
+    include_expired: bool = Query(False, description="是否包含已過投標截止日的案件"),
+    # (新增) cursor 分頁：帶入上一頁回傳的 next_cursor (此時忽略 offset)
+    cursor: Optional[str] = Query(None),
+    # (新增) 第一頁即使用 cursor 分頁 (回傳 next_cursor)
+    use_cursor: bool = Query(False),
+    # (新增) 附上各標籤的分數貢獻 (完全比對 / 模糊比對)
+    explain: bool = Query(False),
 ):
     """
     獲取推薦給當前 (自由工作者) 的案件列表
@@ -30,8 +45,18 @@ async def get_recommended_jobs(
     max_limit = 100
     limit = min(limit, max_limit)
 
+    filters = JobRecommendationFilter(
+        work_type=work_type,
+        location=location,
+        budget_min=budget_min,
+        budget_max=budget_max,
+        include_expired=include_expired
+    )
     service = RecommendationService(db)
-    result = await service.get_job_recommendations(current_user, limit=limit, offset=offset)
+    result = await service.get_job_recommendations(
+        current_user, limit=limit, offset=offset, filters=filters, cursor=cursor, explain=explain,
+        use_cursor=use_cursor
+    )
     return result
 
 @router.get("/freelancers", response_model=PaginatedFreelancerRecommendationOut)
@@ -40,6 +65,12 @@ async def get_recommended_freelancers(
     current_user: User = Depends(get_current_user),
     limit: int = Query(10, ge=1),
     offset: int = Query(0, ge=0),
+    # (新增) cursor 分頁：帶入上一頁回傳的 next_cursor (此時忽略 offset)
+    cursor: Optional[str] = Query(None),
+    # (新增) 第一頁即使用 cursor 分頁 (回傳 next_cursor)
+    use_cursor: bool = Query(False),
+    # (新增) 附上各標籤的分數貢獻 (完全比對 / 模糊比對)
+    explain: bool = Query(False),
 ):
     """
     獲取推薦給當前 (雇主) 的工作者列表
@@ -49,5 +80,67 @@ async def get_recommended_freelancers(
     limit = min(limit, max_limit)
 
     service = RecommendationService(db)
-    result = await service.get_freelancer_recommendations(current_user, limit=limit, offset=offset)
-    return result
\ No newline at end of file
+    result = await service.get_freelancer_recommendations(
+        current_user, limit=limit, offset=offset, cursor=cursor, explain=explain,
+        use_cursor=use_cursor
+    )
+    return result
+
+# (新增) 依雇主的每個招募中案件分別推薦工作者 (另含整體前 K 名)
+@router.get("/freelancers/by-project", response_model=GroupedFreelancerRecommendationOut)
+async def get_recommended_freelancers_by_project(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    limit: int = Query(10, ge=1),
+):
+    """
+    獲取推薦給當前 (雇主) 的工作者，依每個招募中案件分組
+    """
+    max_limit = 100
+    limit = min(limit, max_limit)
+
+    service = RecommendationService(db)
+    return await service.get_freelancer_recommendations_by_project(current_user, limit=limit)
+
+# (新增) 管理員：批次推薦案件 (例如每日 email 摘要)，以 NDJSON 串流回傳
+@router.get("/batch/jobs")
+async def stream_batch_job_recommendations(
+    current_user: User = Depends(get_current_user),
+    user_id: Optional[List[str]] = Query(None),
+    limit: int = Query(10, ge=1, le=100),
+    chunk_size: int = Query(500, ge=1, le=5000),
+):
+    """
+    (系統管理員) 批次計算自由工作者的案件推薦，每位使用者一行 JSON
+
+    不指定 user_id 時計算所有自由工作者；結果分批產生並串流輸出，不會一次全部放在記憶體中。
+    """
+    if current_user.role != "系統管理員":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="只有系統管理員可以執行批次推薦")
+
+    async def generate():
+        # 串流期間使用獨立的 session (請求的 dependency 可能在串流結束前就被關閉)
+        async with AsyncSessionLocal() as db:
+            service = RecommendationService(db)
+            async for chunk in service.iter_job_recommendations_batch(
+                user_ids=user_id, limit=limit, chunk_size=chunk_size
+            ):
+                yield "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in chunk)
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+# (新增) 管理員：推薦流程的效能指標 (各階段耗時、候選數量、模糊比對次數、快取統計)
+@router.get("/metrics")
+async def get_recommendation_metrics(
+    current_user: User = Depends(get_current_user),
+    format: str = Query("json", pattern="^(json|prometheus)$"),
+):
+    """
+    (系統管理員) 目前 worker 的推薦指標；format=prometheus 時以 Prometheus text format 回傳
+    """
+    if current_user.role != "系統管理員":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="只有系統管理員可以查看推薦指標")
+
+    if format == "prometheus":
+        return PlainTextResponse(recommendation_metrics.to_prometheus(), media_type="text/plain; version=0.0.4")
+    return RecommendationService.get_metrics()
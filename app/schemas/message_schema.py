@@ -34,6 +34,8 @@ class MessageIn(BaseModel):
     room_id: str
     content: str = Field(..., description="訊息內容")
     content_type: str = Field('text', description="'text' or 'file'")
+    # (新增) 用戶端自訂的訊息編號，寫入完成後隨 ack 原樣回傳
+    client_msg_id: Optional[str] = Field(None, description="Echoed back in the ack")
     # 如果是文件，可以傳入 attachment_url
 
 class RoomCreate(BaseModel):
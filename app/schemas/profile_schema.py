@@ -1,6 +1,7 @@
 # app/schemas/profile_schema.py
 from pydantic import BaseModel, Field, HttpUrl
-from typing import List, Any
+from typing import List, Any, Optional
+from app.schemas.recommendation_schema import RecommendationExplanation
 from app.schemas.skill_tag_schema import SkillTagOut
 
 # --- 技能標籤 (用於 Profile 顯示) ---
@@ -40,6 +41,8 @@ class FreelancerProfileOut(FreelancerProfileBase):
 class FreelancerRecommendationOut(BaseModel):
     profile: FreelancerProfileOut # 巢狀包含完整的 Profile 資料
     recommendation_score: float = Field(..., description="推薦匹配分數")
+    # (新增) explain=true 時回傳各標籤的分數貢獻
+    explanation: Optional[RecommendationExplanation] = None
 
     class Config:
         from_attributes = True # 允許從非 dict 物件建立
@@ -48,10 +51,25 @@ class FreelancerRecommendationOut(BaseModel):
 class PaginatedFreelancerRecommendationOut(BaseModel):
     items: List[FreelancerRecommendationOut]
     total: int = Field(..., description="Total number of matched candidates")
+    # (新增) 下一頁的 cursor (沒有下一頁時為 None)
+    next_cursor: Optional[str] = Field(None, description="Opaque cursor for the next page")
 
     class Config:
         from_attributes = True
 
+
+# (新增) 依雇主的每個招募中案件分別推薦工作者
+class ProjectFreelancerRecommendationOut(BaseModel):
+    project_id: str
+    title: str
+    items: List[FreelancerRecommendationOut]
+    total: int = Field(..., description="Total number of matched candidates for this project")
+
+
+class GroupedFreelancerRecommendationOut(BaseModel):
+    projects: List[ProjectFreelancerRecommendationOut]
+    combined: PaginatedFreelancerRecommendationOut = Field(..., description="各工作者取最高分的整體前 K 名")
+
 # --- 雇主 (Employer) ---
 class EmployerProfileBase(BaseModel):
     company_name: str | None = Field(None, max_length=255)
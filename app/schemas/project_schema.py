@@ -3,6 +3,7 @@ from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import datetime
 from app.schemas.proposal_schema import ProposalOutWithFreelancer, ProposalOutWithFullProject
+from app.schemas.recommendation_schema import RecommendationExplanation
 from app.schemas.skill_tag_schema import SkillTagOut # 複用我們在 Step 4 建立的 Schema
 from app.schemas.user_schema import UserOutWithEmployerProfile
 
@@ -64,6 +65,8 @@ class ProjectOut(ProjectBase):
 class ProjectRecommendationOut(BaseModel):
     project: ProjectOut # 巢狀包含完整的 Project 資料
     recommendation_score: float = Field(..., description="推薦匹配分數")
+    # (新增) explain=true 時回傳各標籤的分數貢獻
+    explanation: Optional[RecommendationExplanation] = None
 
     class Config:
         from_attributes = True # 允許從非 dict 物件建立
@@ -72,10 +75,28 @@ class ProjectRecommendationOut(BaseModel):
 class PaginatedProjectRecommendationOut(BaseModel):
     items: List[ProjectRecommendationOut]
     total: int = Field(..., description="Total number of matched candidates")
+    # (新增) 下一頁的 cursor (沒有下一頁時為 None)
+    next_cursor: Optional[str] = Field(None, description="Opaque cursor for the next page")
 
     class Config:
         from_attributes = True
 
+# (新增) 推薦案件的篩選條件 (在 SQL 中先行過濾候選案件)
+class JobRecommendationFilter(BaseModel):
+    work_type: Optional[str] = Field(None, enum=['遠端', '實體', '混合'])
+    location: Optional[str] = Field(None, max_length=255)
+    budget_min: Optional[float] = Field(None, ge=0)
+    budget_max: Optional[float] = Field(None, ge=0)
+    include_expired: bool = False # 預設排除已過投標截止日的案件
+
+    def is_default(self) -> bool:
+        """未指定任何篩選條件 (可直接使用物化的推薦清單)"""
+        return self == JobRecommendationFilter()
+
+    def fingerprint(self) -> str:
+        """用於推薦快取的 key (與技能指紋串接)"""
+        return self.model_dump_json()
+
 
 # 8. 用於雇主管理案件的提案，回傳案件詳情以及所有關聯的提案列表
 class ProjectWithProposalsOut(ProjectOut):
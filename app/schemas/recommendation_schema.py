@@ -0,0 +1,23 @@
+# app/schemas/recommendation_schema.py
+# (新增) 推薦系統共用的回應格式 (案件推薦與人才推薦皆使用)
+from pydantic import BaseModel, Field
+from typing import List
+
+
+# explain 模式：完全相同的標籤
+class ExactMatchContribution(BaseModel):
+    tag: str
+    contribution: float = Field(..., description="來源權重 x 項目權重 (未加權時為 1.0)")
+
+
+# explain 模式：模糊比對 (相似度 > 0.7) 的最佳標籤
+class FuzzyMatchContribution(BaseModel):
+    source_tag: str
+    matched_tag: str
+    similarity: float
+    contribution: float
+
+
+class RecommendationExplanation(BaseModel):
+    exact: List[ExactMatchContribution] = []
+    fuzzy: List[FuzzyMatchContribution] = []
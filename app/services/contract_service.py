@@ -27,6 +27,9 @@ from app.models.user import User
 # (M8.3 新增)
 from app.services.notification_service import NotificationService 
 
+# (新增) 推薦系統的資料異動事件
+from app.utils import recommendation_events
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -385,6 +388,10 @@ class ContractService:
         
         # (修正) DB 更新是最後一步
         await self.contract_repo.update_contract(contract)
+
+        # (新增) 案件已成案，不再是推薦候選
+        if transition == ("協商中", "進行中"):
+            recommendation_events.project_closed(contract.project_id, contract.employer_id)
         
         # (修正) 同樣，更新後也需要回傳 Eager Loaded 的物件
         return await self.contract_repo.get_contract_by_id(contract.contract_id)
\ No newline at end of file
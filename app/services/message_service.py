@@ -1,11 +1,12 @@
 # app/services/message_service.py
 # (我們將移除 _create_system_message 並簡化 create_chat_room)
 
-from fastapi import WebSocket, WebSocketDisconnect, HTTPException, status
+from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Dict, List, Tuple
+from typing import List, Optional
 import logging
 import json
+import uuid
 
 # 匯入 Schemas
 from app.schemas.message_schema import RoomCreate, MessageOut, MessageIn, RoomOut, ParticipantOut
@@ -19,53 +20,30 @@ from app.repositories.proposal_repo import ProposalRepository
 from app.models.user import User
 from app.models.message import ChatRoom, Message, ChatRoomParticipant
 
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.group_commit import GroupCommitBatcher
+
 # 匯入 NotificationService 以便使用
 from app.services.notification_service import NotificationService 
+from app.repositories.notification_repo import NotificationRepository
 
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# --- 1. WebSocket 連線管理器 (保持不變) ---
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[str, List[Tuple[str, WebSocket]]] = {}
-
-    async def connect(self, room_id: str, user_id: str, websocket: WebSocket):
-        await websocket.accept()
-        if room_id not in self.active_connections:
-            self.active_connections[room_id] = []
-        self.active_connections[room_id].append((user_id, websocket))
-        logger.info(f"User {user_id} connected to Room {room_id}.")
+# --- 1. WebSocket 連線管理器 ---
+# (修改) 移除此處重複的 ConnectionManager，改用 app.core.websocket_manager 的唯一登錄表
+from app.core.websocket_manager import Connection, manager
+from app.core.chat_broker import create_broker
 
-    def disconnect(self, room_id: str, user_id: str, websocket: WebSocket):
-        try:
-            connection_tuple = (user_id, websocket)
-            if room_id in self.active_connections and connection_tuple in self.active_connections[room_id]:
-                self.active_connections[room_id].remove(connection_tuple)
-                if not self.active_connections[room_id]:
-                    del self.active_connections[room_id]
-            logger.info(f"User {user_id} disconnected from Room {room_id}.")
-        except (ValueError, KeyError):
-            pass
-
-    async def broadcast_message(self, room_id: str, message_json: str):
-        """將 JSON 字串訊息廣播給特定 Room 的所有連線。"""
-        if room_id in self.active_connections:
-            disconnected_clients = []
-            for connection in self.active_connections[room_id]:
-                user_id, ws = connection
-                try:
-                    await ws.send_text(message_json)
-                except Exception as e:
-                    logger.warning(f"Failed to send message to client {user_id} in room {room_id}: {e}")
-                    disconnected_clients.append(connection)
-            # 清理已斷開的連線
-            for client in disconnected_clients:
-                self.disconnect(room_id, client[0], client[1])
-
-# 實例化管理器 (全域單例)
-manager = ConnectionManager()
+# (新增) 依設定調整每條連線的送出佇列上限與慢速用戶端處理方式
+# (新增) 設定 CHAT_BROKER_URL 時，廣播經由 Redis 協定的 pub/sub 轉送給其他 worker
+manager.configure(
+    queue_size=settings.WS_SEND_QUEUE_SIZE,
+    slow_consumer_policy=settings.WS_SLOW_CONSUMER_POLICY,
+    broker=create_broker(settings.CHAT_BROKER_URL, channel=settings.CHAT_BROKER_CHANNEL)
+)
 
 # --- 2. MessageService 業務邏輯 ---
 
@@ -194,71 +172,110 @@ class MessageService:
         # (修正) 將 ORM 轉換為 Pydantic Schema
         return [MessageOut.model_validate(msg) for msg in messages]
 
+    @staticmethod
     async def handle_websocket_message(
-        self,
         room_id: str,
         sender_id: str,
-        message_data: str 
-    ) -> None:
+        message_data: str,
+        connection: Optional[Connection] = None
+    ) -> MessageOut:
         """
         處理 WebSocket 接收到的訊息：儲存、廣播、並觸發通知。
+        (修改) 儲存與通知交給群組提交 (chat_writer)，與同一時間所有聊天室的訊息一起寫入；
+        寫入 (commit) 完成後先回覆發送者 ack，再廣播
         """
-        
-        # --- (M8.3 修正：為通知載入額外資訊) ---
-        room = None
         try:
             # 1. 驗證訊息
             data_dict = json.loads(message_data)
-            message_in = MessageIn(room_id=room_id, **data_dict) 
-
-            # 2. (新) 獲取聊天室資訊 (包含 project 和 participants)
-            room = await self.message_repo.get_room_by_id_with_participants(room_id)
-            if not room:
-                raise ValueError(f"Room {room_id} not found")
-
-            # 3. 儲存訊息 (Repo 會 Eager Load sender)
-            new_message = await self.message_repo.save_message(
-                room_id=room_id,
-                sender_id=sender_id,
-                content=message_in.content,
-                content_type=message_in.content_type
-            )
-            
-            # 4. 提交事務 (Commit)
-            await self.db.commit()
-            
-            # 5. (新) 觸發通知 (在 Commit 之後)
-            # (我們需要 refresh new_message 才能安全地存取 sender)
-            await self.db.refresh(new_message) 
+            message_in = MessageIn(room_id=room_id, **data_dict)
 
-            # --- (M8.3 邏輯開始) ---
-            sender_name = new_message.sender.email.split('@')[0] if new_message.sender else "某人"
-            project_title = room.project.title if room.project else "聊天室" #
-            
-            notification_title = f"您在「{project_title}」中有新訊息"
-            notification_msg = f"{sender_name} 說：{message_in.content[:30]}..."
-            # 連結到聊天室
-            link_url = "/chat" 
-            
-            for p in room.participants: #
-                if p.user_id != sender_id: # 只通知其他人
-                    await self.notification_service.create_notification(
-                        user_id=p.user_id,
-                        title=notification_title,
-                        message=notification_msg,
-                        link_url=link_url
-                    )
-            # --- (M8.3 邏輯結束) ---
-
-            # 6. 轉換為 Pydantic Model (用於廣播)
-            message_out = MessageOut.model_validate(new_message)
-            broadcast_msg = message_out.model_dump_json()
-
-            # 7. 廣播訊息
-            await manager.broadcast_message(room_id, broadcast_msg)
-        
+            # 2. 儲存訊息與通知 (等待所屬的批次 commit)
+            message_out = await chat_writer.submit((room_id, sender_id, message_in))
         except Exception as e:
             # (保持不變) 錯誤處理
-            await self.db.rollback()
             logger.error(f"Error handling message: {e}", exc_info=True)
-            raise ValueError(f"Message processing error: {e}")
\ No newline at end of file
+            raise ValueError(f"Message processing error: {e}")
+
+        # 3. (新增) 訊息已寫入資料庫，回覆發送者
+        if connection is not None:
+            manager.send_json(connection, {
+                "type": "ack",
+                "client_msg_id": message_in.client_msg_id,
+                "message_id": message_out.message_id,
+            })
+
+        # 4. 廣播訊息
+        await manager.broadcast_message(room_id, message_out.model_dump_json())
+        return message_out
+
+    @staticmethod
+    async def _write_message_batch(items: List[tuple]) -> List:
+        """
+        (新增) chat_writer 的批次寫入：items 為 [(room_id, sender_id, MessageIn)]
+        以一個 session 完成：載入聊天室 -> 多列 INSERT 訊息 -> 多列 INSERT 通知 -> 一次 COMMIT
+        -> 讀回訊息 (含資料庫產生的 created_at)。回傳與 items 對應的 MessageOut 或 Exception
+        """
+        results: List = [None] * len(items)
+        async with AsyncSessionLocal() as db:
+            message_repo = MessageRepository(db)
+            rooms = await message_repo.get_rooms_by_ids_with_participants(
+                list({room_id for room_id, _, _ in items})
+            )
+
+            message_rows, notification_rows, written = [], [], []
+            for i, (room_id, sender_id, message_in) in enumerate(items):
+                room = rooms.get(room_id)
+                if room is None:
+                    results[i] = ValueError(f"Room {room_id} not found")
+                    continue
+                message_id = str(uuid.uuid4())
+                message_rows.append({
+                    "message_id": message_id,
+                    "room_id": room_id,
+                    "sender_id": sender_id,
+                    "content": message_in.content,
+                    "content_type": message_in.content_type,
+                    "is_read": False,
+                })
+                written.append((i, message_id))
+
+                # --- (M8.3) 通知聊天室的其他參與者 ---
+                sender = next((p.user for p in room.participants if p.user_id == sender_id), None)
+                sender_name = sender.email.split('@')[0] if sender else "某人"
+                project_title = room.project.title if room.project else "聊天室"
+                for p in room.participants:
+                    if p.user_id != sender_id: # 只通知其他人
+                        notification_rows.append({
+                            "notification_id": str(uuid.uuid4()),
+                            "user_id": p.user_id,
+                            "title": f"您在「{project_title}」中有新訊息",
+                            "message": f"{sender_name} 說：{message_in.content[:30]}...",
+                            "link_url": "/chat",
+                            "is_read": False,
+                        })
+
+            try:
+                await message_repo.insert_messages(message_rows)
+                await NotificationRepository(db).insert_notifications(notification_rows)
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                raise
+            logger.debug(
+                f"Group commit: {len(message_rows)} messages, {len(notification_rows)} notifications"
+            )
+
+            messages = await message_repo.get_messages_by_ids([message_id for _, message_id in written])
+            by_id = {message.message_id: message for message in messages}
+            for i, message_id in written:
+                results[i] = MessageOut.model_validate(by_id[message_id])
+        return results
+
+
+# (新增) 聊天訊息的群組提交 (全域單例，每個 worker 各自維護)：
+# 數毫秒內所有聊天室收到的訊息合併成一次多列 INSERT 與一次 COMMIT
+chat_writer = GroupCommitBatcher(
+    MessageService._write_message_batch,
+    max_delay=settings.CHAT_WRITE_BATCH_DELAY_MS / 1000,
+    max_batch=settings.CHAT_WRITE_BATCH_MAX_SIZE
+)
@@ -5,6 +5,9 @@ from app.models.employer_profile import EmployerProfile
 from app.models.freelancer_profile import FreelancerProfile
 from app.models.user import User
 from app.repositories.profile_repo import ProfileRepository
+from app.repositories.skill_tag_repo import SkillTagRepository
+from app.services.recommendation_service import RecommendationService
+from app.utils.tag_similarity import similarity_table
 from app.schemas.profile_schema import (
     FreelancerProfileCreate, EmployerProfileCreate, UserSkillsUpdate,FreelancerProfileUpdate, EmployerProfileUpdate
 )
@@ -13,6 +16,7 @@ from typing import Union, List, Optional
 class ProfileService:
     def __init__(self, db: AsyncSession):
         self.repo = ProfileRepository(db)
+        self.skill_tag_repo = SkillTagRepository(db) # (新增) 模糊搜尋用
         self.db = db # Service 可能需要直接存取 db
 
     async def get_my_profile(self, user: User):
@@ -90,14 +94,34 @@ class ProfileService:
     
     # (新增) 需求：雇主搜尋工作者
     async def search_freelancers(
-        self, tag_ids: Optional[List[str]] = None
+        self, tag_ids: Optional[List[str]] = None, fuzzy: bool = False
     ) -> List[FreelancerProfile]:
         """
         業務邏輯：搜尋公開的工作者
         (目前業務邏輯主要在 Repository 的查詢中)
+
+        (新增) fuzzy=True 時，將查詢標籤擴展為所有相似度 > 0.7 的標籤
+        (例如 "reactjs" 也會找到標記 "react" 的工作者)
         """
+        if fuzzy and tag_ids:
+            tag_ids = await self._expand_similar_tag_ids(tag_ids)
+
         # 呼叫我們在 Repo 中建立的新方法
         profiles = await self.repo.list_public_freelancers_by_skills(
             tag_ids=tag_ids
         )
-        return profiles
\ No newline at end of file
+        return profiles
+
+    # (新增) 以標籤相似度表 (BK-tree) 擴展查詢標籤
+    async def _expand_similar_tag_ids(self, tag_ids: List[str]) -> List[str]:
+        await RecommendationService(self.db).ensure_similarity_table()
+
+        names = await self.skill_tag_repo.list_tag_names_by_ids(tag_ids)
+        similar_names = set()
+        for name in names:
+            similar_names.update(similarity_table.search(name.lower()))
+        if not similar_names:
+            return tag_ids
+
+        similar_ids = await self.skill_tag_repo.list_tag_ids_by_names(list(similar_names))
+        return list(dict.fromkeys([*tag_ids, *similar_ids]))
@@ -1,8 +1,14 @@
 # app/services/recommendation_service.py (新檔案)
+import asyncio
 import logging
+import time
+from datetime import datetime
+from itertools import groupby
+from operator import itemgetter
+from types import SimpleNamespace
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
-from typing import List, Set
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 from sqlalchemy.future import select
 
 logging.basicConfig(level=logging.INFO)
@@ -13,21 +19,260 @@ from app.models.user import User
 from app.models.project import Project
 from app.repositories.profile_repo import ProfileRepository
 from app.repositories.project_repo import ProjectRepository
-from app.utils.recommender import calculate_recommendation_scores
+from app.repositories.skill_tag_repo import SkillTagRepository
+from app.schemas.project_schema import JobRecommendationFilter
+from app.utils.job_lists import job_lists
+from app.utils.ranking_snapshots import (
+    ranking_snapshots, RankingSnapshot, decode_cursor, encode_cursor, item_reputation, seek_position
+)
+from app.utils.recommendation_metrics import recommendation_metrics
+from app.utils.recommender import (
+    SkillWeights, explain_recommendation_score, familiarity_weight, merge_top_recommendations, to_skill_weights
+)
+from app.utils.scoring_pool import scoring_pool
+from app.utils.shared_matrix import SharedMatrix, shared_matrix_store
+from app.utils.tag_index import tag_index
+from app.utils.tag_similarity import similarity_table
+from app.utils.recommendation_cache import (
+    recommendation_cache, skill_fingerprint, CachedRanking, KIND_FREELANCERS, KIND_JOBS
+)
+from app.core.config import settings
+from app.core.structured_logging import get_structured_logger, top_ids
+
+# (新增) 請求路徑上的結構化 / 取樣日誌 (只記錄數量、耗時與前幾名 ID)
+slog = get_structured_logger(__name__)
+
+# (新增) 依設定調整推薦快取大小與存活時間
+recommendation_cache.configure(
+    max_entries=settings.RECOMMENDATION_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.RECOMMENDATION_CACHE_TTL_SECONDS
+)
+# (新增) 依設定調整物化的案件推薦清單 (每位工作者保存前 RECOMMENDATION_CACHE_DEPTH 名)
+job_lists.configure(
+    depth=settings.RECOMMENDATION_CACHE_DEPTH,
+    max_entries=settings.RECOMMENDER_JOB_LISTS_MAX_ENTRIES,
+    max_age_seconds=settings.RECOMMENDER_JOB_LISTS_MAX_AGE_SECONDS
+)
+# (新增) 依設定調整 cursor 分頁的排序快照
+ranking_snapshots.configure(
+    max_entries=settings.RECOMMENDER_SNAPSHOT_MAX_ENTRIES,
+    ttl_seconds=settings.RECOMMENDER_SNAPSHOT_TTL_SECONDS
+)
+# (新增) 依設定啟用計分 process pool
+scoring_pool.configure(
+    max_workers=settings.RECOMMENDER_POOL_WORKERS,
+    inline_threshold=settings.RECOMMENDER_POOL_INLINE_THRESHOLD
+)
+
+# (新增) 多個 worker 共用的 mmap 推薦資料 (未設定目錄時停用，各 worker 自行建立索引)
+shared_matrix_store.configure(settings.RECOMMENDER_SHARED_MATRIX_DIR)
+if settings.RECOMMENDER_SHARED_MATRIX_DIR and not shared_matrix_store.enabled:
+    logger.warning("RECOMMENDER_SHARED_MATRIX_DIR 需要安裝 numpy，改為各 worker 自行建立索引")
+
+# (新增) 避免多個請求同時重建索引
+_index_lock = asyncio.Lock()
+# (新增) 其他 worker 正在建立共用資料時，重新嘗試取得發布鎖的間隔 (秒)
+_PUBLISH_LOCK_POLL_SECONDS = 0.05
+
+
+# (新增) 將依 ID 排序的 (item_id, tag name) 投影結果分組為 (item_id, {小寫 tag name})
+def _group_skill_rows(rows: Iterable[Tuple[str, str]]) -> Iterator[Tuple[str, Set[str]]]:
+    for item_id, group in groupby(rows, key=itemgetter(0)):
+        yield item_id, {name.lower() for _, name in group if name}
+
+
+# (新增) 同上，另外彙總熟悉度權重: (item_id, tag name, familiarity_level) -> (item_id, {名稱}, SkillWeights)
+def _group_weighted_skill_rows(
+    rows: Iterable[Tuple[str, str, int]]
+) -> Iterator[Tuple[str, Set[str], SkillWeights]]:
+    for item_id, group in groupby(rows, key=itemgetter(0)):
+        weights: Dict[str, float] = {}
+        for _, name, familiarity_level in group:
+            if name:
+                _add_skill_weight(weights, name.lower(), familiarity_level)
+        yield item_id, set(weights), to_skill_weights(weights)
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+def _add_skill_weight(weights: Dict[str, float], name: str, familiarity_level) -> None:
+    # 大小寫不同的重複標籤取較高的熟悉度
+    weights[name] = max(weights.get(name, 0.0), familiarity_weight(familiarity_level))
+
 
 class RecommendationService:
     def __init__(self, db: AsyncSession):
         self.profile_repo = ProfileRepository(db)
         self.project_repo = ProjectRepository(db)
+        self.skill_tag_repo = SkillTagRepository(db)
         self.db = db
 
-    async def get_job_recommendations(self, user: User, limit: int = 10, offset: int = 0):
+    async def refresh_similarity_table(self):
+        """
+        (新增) 以目前的 SkillTag 詞彙表重建標籤相似度表 (啟動時 / SkillTag 異動後)
+        """
+        if shared_matrix_store.enabled:
+            await self._ensure_shared_matrix(rebuild=True)
+            return
+        tag_names = await self.skill_tag_repo.list_all_tag_names()
+        # (修改) O(詞彙數 x 相似查詢) 的建表在 thread 中執行，不阻塞 event loop
+        similarity_table.install(await asyncio.to_thread(similarity_table.prepare, tag_names))
+        # 相似度改變後，物化清單中的模糊比對分數已不可信
+        job_lists.clear()
+        logger.info(f"Tag similarity table built: {similarity_table.stats()}")
+
+    async def ensure_similarity_table(self):
+        """
+        (新增) 確保標籤相似度表已建立且未過期 (推薦與模糊搜尋共用)
+        """
+        if shared_matrix_store.enabled:
+            await self._ensure_shared_matrix()
+            return
+        if not similarity_table.is_built or similarity_table.is_dirty:
+            async with _index_lock:
+                if not similarity_table.is_built or similarity_table.is_dirty:
+                    await self.refresh_similarity_table()
+
+    async def _ensure_tag_index(self):
+        """
+        (新增) 確保技能標籤倒排索引已載入且未過期
+        """
+        await self.ensure_similarity_table()
+        if shared_matrix_store.enabled:
+            return  # 共用資料同時包含相似度表與倒排索引
+
+        if not tag_index.is_stale(settings.RECOMMENDER_INDEX_REFRESH_SECONDS):
+            return
+        async with _index_lock:
+            # 取得鎖之後再檢查一次，其他請求可能已完成重建
+            if not tag_index.is_stale(settings.RECOMMENDER_INDEX_REFRESH_SECONDS):
+                return
+            project_pairs = await self.project_repo.list_active_project_tag_names()
+            profile_pairs = await self.profile_repo.list_public_profile_tag_names()
+            tag_index.load(project_pairs, profile_pairs)
+            logger.info(
+                f"Tag index loaded: {len(tag_index.project_tags)} projects, "
+                f"{len(tag_index.profile_tags)} profiles"
+            )
+
+    # --- (新增) 多 worker 共用的 mmap 推薦資料 ---
+
+    async def _ensure_shared_matrix(self, rebuild: bool = False):
+        """
+        確保此 worker 使用最新且未過期的共用資料；
+        磁碟上的資料過期 (或 SkillTag 已異動) 時，由取得發布鎖的 worker 從資料庫建立新的一代
+        """
+        max_age = settings.RECOMMENDER_INDEX_REFRESH_SECONDS
+        current = shared_matrix_store.current
+        if (not rebuild and not similarity_table.is_dirty and current is not None
+                and current.age_seconds() <= max_age and not shared_matrix_store.has_newer()):
+            return
+
+        requested_at = time.time()
+        while True:
+            async with _index_lock:
+                needs_rebuild = rebuild or similarity_table.is_dirty
+                latest = shared_matrix_store.open_latest()
+                if self._is_usable(latest, max_age, needs_rebuild, requested_at):
+                    self._attach_shared_matrix(latest)
+                    return
+
+                # 同一時間只有一個 worker 從資料庫建立；其他 worker 等待後直接使用其結果
+                if shared_matrix_store.try_acquire_publish_lock():
+                    try:
+                        latest = shared_matrix_store.open_latest()
+                        if self._is_usable(latest, max_age, needs_rebuild, requested_at):
+                            self._attach_shared_matrix(latest)
+                            return
+                        tag_names = await self.skill_tag_repo.list_all_tag_names()
+                        project_pairs = await self.project_repo.list_active_project_tag_names()
+                        profile_pairs = await self.profile_repo.list_public_profile_tag_names()
+                        # (修改) O(詞彙數^2 + 配對數) 的建立與寫檔在 thread 中執行，不阻塞 event loop
+                        matrix = await asyncio.to_thread(
+                            shared_matrix_store.publish, tag_names, project_pairs, profile_pairs
+                        )
+                        logger.info(f"Shared recommender matrix published: {matrix.stats()}")
+                        self._attach_shared_matrix(matrix)
+                        return
+                    finally:
+                        shared_matrix_store.release_publish_lock()
+
+            # (修改) 其他 worker 正在建立：釋放 _index_lock 後再等待，不阻擋此 worker 的其他請求
+            await asyncio.sleep(_PUBLISH_LOCK_POLL_SECONDS)
+
+    @staticmethod
+    def _is_usable(matrix: Optional[SharedMatrix], max_age: float, rebuild: bool, requested_at: float) -> bool:
+        """未過期，且需要重建時必須是此次要求之後才建立的一代"""
+        return (matrix is not None and matrix.age_seconds() <= max_age
+                and (not rebuild or matrix.built_at >= requested_at))
+
+    @staticmethod
+    def _attach_shared_matrix(matrix: SharedMatrix):
+        # 詞彙表 (即相似度) 改變後，物化清單中的模糊比對分數已不可信
+        if similarity_table.vocabulary_digest != matrix.vocabulary_digest:
+            job_lists.clear()
+        similarity_table.attach_shared(matrix)
+        tag_index.load_shared(matrix)
+
+    # --- (新增) 啟動預熱 ---
+
+    async def warm_up(self, sample_size: int = 5) -> Dict[str, float]:
+        """
+        在 worker 接收流量前預先完成第一個推薦請求才會做的工作，回傳各步驟耗時 (毫秒)：
+        1. 載入標籤詞彙並建立相似度表 / 倒排索引 (或對應共用資料)
+        2. 啟動計分 process pool
+        3. 以前幾個標籤試算一次案件與人才推薦 (投影查詢、計分、載入當頁 ORM 物件)
+        試算結果不寫入任何快取 / 物化清單 / 快照
+        """
+        steps: Dict[str, float] = {}
+
+        started = time.perf_counter()
+        await self._ensure_tag_index()
+        steps["indexes"] = _elapsed_ms(started)
+
+        started = time.perf_counter()
+        await scoring_pool.warm_up()
+        steps["scoring_pool"] = _elapsed_ms(started)
+
+        sample_names = set(sorted(name.lower() for name in tag_index.vocabulary())[:sample_size])
+        if sample_names:
+            started = time.perf_counter()
+            scored_projects, _ = await self._score_job_candidates(
+                sample_names, None, JobRecommendationFilter(), datetime.now(), k=sample_size
+            )
+            await self.project_repo.list_projects_by_ids([item["item_id"] for item in scored_projects])
+            steps["jobs"] = _elapsed_ms(started)
+
+            started = time.perf_counter()
+            scored_freelancers, _ = await self._score_freelancer_candidates(sample_names, k=sample_size)
+            await self.profile_repo.list_freelancer_profiles_by_ids(
+                [item["item_id"] for item in scored_freelancers]
+            )
+            steps["freelancers"] = _elapsed_ms(started)
+        return steps
+
+    async def get_job_recommendations(
+        self, user: User, limit: int = 10, offset: int = 0,
+        filters: Optional[JobRecommendationFilter] = None,
+        cursor: Optional[str] = None,
+        explain: bool = False,
+        use_cursor: bool = False
+    ):
 
         """
         Use Case 5.1: 推薦案件給自由工作者
+
+        (新增) filters: 工作型態 / 地區 / 預算 / 是否包含已過期案件，於 SQL 中先行過濾候選案件
+        (新增) cursor: 上一頁回傳的 next_cursor (由排序快照繼續分頁，忽略 offset)
+        (新增) use_cursor: 第一頁即以 cursor 分頁 (保存排序快照並回傳 next_cursor)
+        (新增) explain: 為當頁每個案件附上各標籤的分數貢獻
         """
         if user.role != "自由工作者":
             raise HTTPException(status.HTTP_403_FORBIDDEN, "只有自由工作者可以接收案件推薦")
+        recommendation_metrics.count("jobs.requests")
+        started = time.perf_counter()
 
         # 1. 獲取工作者的技能
         profile = await self.profile_repo.get_freelancer_profile_by_user_id(user.user_id)
@@ -38,48 +283,173 @@ class RecommendationService:
         user_skill_names: Set[str] = {
             user_skill.tag.name.lower() for user_skill in profile.skills if user_skill.tag
         }
-        
-        # 2. 獲取所有活躍案件
-        active_projects = await self.project_repo.list_active_projects_with_skills()
-        
-        # 3. 轉換案件資料結構
-        projects_data_for_algo = []
-        for project in active_projects:
-            # ... (過濾 project.employer_id) ...
-            
-            project_skill_names: Set[str] = {
-                proj_skill.tag.name.lower() for proj_skill in project.skills if proj_skill.tag
-            }
-            
-            projects_data_for_algo.append({
-                # (修正) 匹配 recommender.py 的新 key
-                "item_id": project.project_id,
-                "skill_names": project_skill_names,
-                "item_object": project 
-            })
-
-        # 4. 呼叫演算法
-        scored_projects = calculate_recommendation_scores(
-            user_skill_names,
-            projects_data_for_algo
-        )
 
-        total = len(scored_projects)
-        # apply offset/limit (already sorted by algorithm)
-        sliced = scored_projects[offset: offset + limit]
+        # (修改) 先讀取物化的推薦清單 (由案件異動事件增量維護)，命中時只需載入當頁案件
+        # (新增) 加權模式：依熟悉度為每個技能加權
+        user_skill_weights = None
+        if settings.RECOMMENDER_WEIGHTED_SCORING:
+            weights: Dict[str, float] = {}
+            for user_skill in profile.skills:
+                if user_skill.tag:
+                    _add_skill_weight(weights, user_skill.tag.name.lower(), user_skill.familiarity_level)
+            user_skill_weights = to_skill_weights(weights)
 
-        # 5. 處理結果 - 提取物件和分數
-        recommendations_with_scores = []
-        for item in sliced:
-            recommendations_with_scores.append({
-                "project": item["item_object"],  # 原始 Project 物件
-                "recommendation_score": round(item["score"], 2)  # 分數四捨五入到小數點後兩位
-            })
+        filters = filters or JobRecommendationFilter()
+        now = datetime.now()
+
+        # (新增) cursor 分頁：由第一頁保存的排序快照切片，不重新計分
+        if cursor is not None:
+            state = self._parse_cursor(cursor)
+            snapshot = ranking_snapshots.get(
+                state["snapshot_id"], KIND_JOBS, user.user_id, filters.fingerprint()
+            )
+            position = state["position"]
+            if not self._snapshot_continues(snapshot, state, limit):
+                # 快照已過期 (或篩選條件不同)：重新計分，從 cursor 最後一筆之後繼續
+                scored_projects, _ = await self._score_job_candidates(
+                    user_skill_names, user_skill_weights, filters, now, k=None
+                )
+                snapshot = self._snapshot_after(
+                    KIND_JOBS, user.user_id, scored_projects, state, filters.fingerprint()
+                )
+                position = 0
+            with recommendation_metrics.span("jobs.hydrate"):
+                page = await self._build_job_page(snapshot, limit, position)
+            page["total"] = snapshot.overall_total
+            if explain:
+                self._explain_job_page(page, user_skill_names, user_skill_weights)
+            return self._with_next_cursor(page, snapshot, position, limit, {})
+
+        fingerprint = skill_fingerprint(user_skill_names, user_skill_weights)
+        # (新增) 物化清單只保存預設條件 (排除已過期案件) 的結果；
+        # 帶篩選條件的查詢改用結果快取，並將篩選條件併入指紋
+        use_job_lists = filters.is_default()
+        ranking = None
+        if use_job_lists:
+            ranking = job_lists.get(profile.profile_id, fingerprint, offset + limit, now=now)
+            generation = job_lists.generation
+        else:
+            fingerprint = f"{fingerprint}\x1e{filters.fingerprint()}"
+            ranking = recommendation_cache.get(KIND_JOBS, user.user_id, fingerprint, offset + limit)
+            generation = recommendation_cache.generation
+        cached = ranking is not None
+
+        if ranking is None:
+            # 2. ~ 4. 篩選候選案件並計分
+            # (至少保留 RECOMMENDATION_CACHE_DEPTH 名，讓後續分頁可直接由快取回應)
+            # (修改) 物化清單的 members 為分數 > 0 的案件 (與未物化路徑的 total 一致)
+            member_ids = [] if use_job_lists else None
+            scored_projects, total = await self._score_job_candidates(
+                user_skill_names, user_skill_weights, filters, now,
+                k=max(offset + limit, settings.RECOMMENDATION_CACHE_DEPTH),
+                scored_ids=member_ids
+            )
+            ranked = [(item["item_id"], item["score"]) for item in scored_projects]
+            with recommendation_metrics.span("jobs.store"):
+                if use_job_lists:
+                    # (修改) 以完整計算的結果建立此工作者的物化清單，之後由案件異動事件增量維護
+                    deadlines = dict(await self.project_repo.list_project_deadlines(member_ids))
+                    ranking = job_lists.seed(
+                        profile.profile_id, fingerprint, user_skill_names, ranked, member_ids,
+                        generation=generation,
+                        skill_weights=user_skill_weights,
+                        deadlines=deadlines
+                    )
+                else:
+                    ranking = recommendation_cache.put(
+                        KIND_JOBS, user.user_id, fingerprint, ranked, total, generation=generation
+                    )
+        else:
+            recommendation_metrics.count("jobs.cache_hits")
+
+        # 5. (修改) 只載入當頁的 Project 物件並組出分頁結構
+        with recommendation_metrics.span("jobs.hydrate"):
+            page = await self._build_job_page(ranking, limit, offset)
+        if explain:
+            self._explain_job_page(page, user_skill_names, user_skill_weights)
+        slog.info(
+            "job_recommendations",
+            user_id=user.user_id,
+            cached=cached,
+            filtered=not use_job_lists,
+            total=ranking.total,
+            returned=len(page["items"]),
+            offset=offset,
+            duration_ms=_elapsed_ms(started),
+            top_ids=lambda: top_ids(ranking.ranked, 5, start=offset)
+        )
+        if not use_cursor:
+            page["next_cursor"] = None
+            return page
+        # (修改) 只有選用 cursor 分頁時才保存快照 (offset 分頁不佔用快照空間)
+        snapshot = ranking_snapshots.create(
+            KIND_JOBS, user.user_id, ranking.ranked, ranking.total, filters=filters.fingerprint()
+        )
+        return self._with_next_cursor(page, snapshot, offset, limit, {})
 
-        return {"items": recommendations_with_scores, "total": total}  # 回傳分頁結構
+    async def _score_job_candidates(
+        self,
+        user_skill_names: Set[str],
+        user_skill_weights: Optional[SkillWeights],
+        filters: JobRecommendationFilter,
+        now: datetime,
+        k: Optional[int],
+        scored_ids: Optional[List[str]] = None
+    ) -> Tuple[List[Dict], int]:
+        """
+        篩選候選案件並計分，回傳 (前 k 名, 分數 > 0 的總數)
+        k=None 表示回傳完整排序；scored_ids: (選用) 加入所有分數 > 0 的案件 ID
+        """
+        # 2. (修改) 透過倒排索引篩選候選案件，只載入有重疊 (完全 / 模糊) 標籤的活躍案件
+        with recommendation_metrics.span("jobs.candidates"):
+            await self._ensure_tag_index()
+            candidate_ids = tag_index.candidate_projects(user_skill_names)
+        if not candidate_ids:
+            return [], 0
+        # (修改) 以輕量投影查詢取得 (project_id, tag name)，不建立 Project ORM 物件
+        # (新增) 篩選條件與截止日在 SQL 中處理，不符合的案件不會進入計分
+        with recommendation_metrics.span("jobs.load"):
+            project_rows = await self.project_repo.list_active_project_tag_names(
+                project_ids=list(candidate_ids),
+                work_type=filters.work_type,
+                location=filters.location,
+                budget_min=filters.budget_min,
+                budget_max=filters.budget_max,
+                deadline_after=None if filters.include_expired else now
+            )
+        
+        # 3. 轉換案件資料結構
+        # (案件本身沒有 reputation_score，item_object 留空，排序時視為 0)
+        with recommendation_metrics.span("jobs.convert"):
+            projects_data_for_algo = []
+            for project_id, project_skill_names in _group_skill_rows(project_rows):
+                projects_data_for_algo.append({
+                    # (修正) 匹配 recommender.py 的新 key
+                    "item_id": project_id,
+                    "skill_names": project_skill_names,
+                    "item_object": None
+                })
+        recommendation_metrics.count("jobs.candidates", len(projects_data_for_algo))
+
+        # 4. 呼叫演算法 (修改) Top-K 模式：只保留前 k 名，total 另外計算
+        # (修改) 候選數量夠多時交由 process pool 計分，不阻塞 event loop
+        with recommendation_metrics.span("jobs.score"):
+            scored_projects, total = await scoring_pool.select_top(
+                user_skill_names,
+                projects_data_for_algo,
+                k=len(projects_data_for_algo) if k is None else k,
+                engine=settings.RECOMMENDER_ENGINE,
+                source_weights=user_skill_weights,
+                scored_ids=scored_ids
+            )
+        recommendation_metrics.count("jobs.scored", total)
+        return scored_projects, total
 
     
-    async def get_freelancer_recommendations(self, user: User, limit: int = 10, offset: int = 0):
+    async def get_freelancer_recommendations(
+        self, user: User, limit: int = 10, offset: int = 0, cursor: Optional[str] = None,
+        explain: bool = False, use_cursor: bool = False
+    ):
         """
         Use Case 5.2: 推薦工作者給雇主
         
@@ -89,67 +459,402 @@ class RecommendationService:
         3. 找出所有 '公開' 的工作者 Profile。
         4. 使用推薦演算法，
            將 '雇主技能 Set' 與 '每個工作者的技能 Set' 進行匹配。
+
+        (新增) cursor: 上一頁回傳的 next_cursor (由排序快照繼續分頁，忽略 offset)
+        (新增) use_cursor: 第一頁即以 cursor 分頁 (保存排序快照並回傳 next_cursor)
+        (新增) explain: 為當頁每位工作者附上各標籤的分數貢獻
         """
         if user.role != "雇主":
             raise HTTPException(status.HTTP_403_FORBIDDEN, "只有雇主可以接收人才推薦")
+        recommendation_metrics.count("freelancers.requests")
+        started = time.perf_counter()
 
         # 1. & 2. 獲取雇主的所有 '招募中' 案件 並彙總所需技能
-        # (注意：這裡我們不需要完整的 Project 物件，可以優化查詢)
-        
-        # (優化查詢：僅查詢雇主相關的招募中案件，並載入技能標籤)
-        stmt = select(Project).where(
-            Project.employer_id == user.user_id,
-            Project.status == '招募中'
-        )
-        employer_projects = await self.db.execute(stmt)
-        
-        employer_skill_names: Set[str] = set()
-        for project in employer_projects.scalars().all():
-            for skill in project.skills:
-                if skill.tag:
-                    employer_skill_names.add(skill.tag.name.lower())
+        # (修改) 以投影查詢只取技能名稱，不建立 Project 物件 (不會逐一觸發 skills 的 selectin 載入)
+        project_rows = await self.project_repo.list_employer_active_project_tag_names(user.user_id)
+        employer_skill_names: Set[str] = {name.lower() for _, _, name in project_rows if name}
         
         if not employer_skill_names:
             return [] # 該雇主沒有招募中案件或案件沒設定技能，無法推薦
 
-        # 3. 獲取所有公開的工作者
-        public_freelancers = await self.profile_repo.list_public_freelancer_profiles_with_skills()
+        # (新增) cursor 分頁：由第一頁保存的排序快照切片，不重新計分
+        if cursor is not None:
+            state = self._parse_cursor(cursor)
+            snapshot = ranking_snapshots.get(state["snapshot_id"], KIND_FREELANCERS, user.user_id)
+            position = state["position"]
+            if not self._snapshot_continues(snapshot, state, limit):
+                scored_freelancers, _ = await self._score_freelancer_candidates(employer_skill_names, k=None)
+                snapshot = self._snapshot_after(KIND_FREELANCERS, user.user_id, scored_freelancers, state)
+                position = 0
+            with recommendation_metrics.span("freelancers.hydrate"):
+                page = await self._build_freelancer_page(snapshot, limit, position)
+            page["total"] = snapshot.overall_total
+            if explain:
+                self._explain_freelancer_page(page, employer_skill_names)
+            return self._with_next_cursor(page, snapshot, position, limit, self._page_reputations(page))
 
-        # 4. 轉換資料結構
-        freelancers_data_for_algo = []
-        for profile in public_freelancers:
-            # ... (過濾 profile.user_id) ...
-            
-            profile_skill_names: Set[str] = {
-                user_skill.tag.name.lower() for user_skill in profile.skills if user_skill.tag
-            }
-            
-            freelancers_data_for_algo.append({
-                # (修正) 匹配 recommender.py 的新 key
-                "item_id": profile.profile_id, 
-                "skill_names": profile_skill_names,
-                "item_object": profile 
-            })
-
-        # 5. 呼叫演算法
-        scored_freelancers = calculate_recommendation_scores(
-            employer_skill_names,
-            freelancers_data_for_algo
+        # (新增) 先查推薦快取 (雇主 + 技能指紋)，命中時只需載入當頁 Profile
+        fingerprint = skill_fingerprint(employer_skill_names)
+        ranking = recommendation_cache.get(KIND_FREELANCERS, user.user_id, fingerprint, offset + limit)
+        scored_freelancers = None
+        if ranking is None:
+            cache_generation = recommendation_cache.generation
+            scored_freelancers, total = await self._score_freelancer_candidates(
+                employer_skill_names, k=max(offset + limit, settings.RECOMMENDATION_CACHE_DEPTH)
+            )
+            with recommendation_metrics.span("freelancers.store"):
+                ranking = recommendation_cache.put(
+                    KIND_FREELANCERS, user.user_id, fingerprint,
+                    [(item["item_id"], item["score"]) for item in scored_freelancers], total,
+                    generation=cache_generation
+                )
+        else:
+            recommendation_metrics.count("freelancers.cache_hits")
+
+        # 6. (修改) 只載入當頁的 FreelancerProfile 物件並組出分頁結構
+        with recommendation_metrics.span("freelancers.hydrate"):
+            page = await self._build_freelancer_page(ranking, limit, offset)
+        if explain:
+            self._explain_freelancer_page(page, employer_skill_names)
+
+        # (修改) 不再輸出完整的計分結果，只記錄數量、耗時與前幾名 ID (取樣、延後格式化)
+        slog.info(
+            "freelancer_recommendations",
+            employer_id=user.user_id,
+            cached=scored_freelancers is None,
+            total=ranking.total,
+            returned=len(page["items"]),
+            offset=offset,
+            duration_ms=_elapsed_ms(started),
+            top_ids=lambda: top_ids(ranking.ranked, 5, start=offset)
+        )
+
+        if not use_cursor:
+            page["next_cursor"] = None
+            return page
+        # (修改) 只有選用 cursor 分頁時才保存快照 (offset 分頁不佔用快照空間)
+        snapshot = ranking_snapshots.create(KIND_FREELANCERS, user.user_id, ranking.ranked, ranking.total)
+        return self._with_next_cursor(page, snapshot, offset, limit, self._page_reputations(page))
+
+    async def _score_freelancer_candidates(
+        self, employer_skill_names: Set[str], k: Optional[int]
+    ) -> Tuple[List[Dict], int]:
+        """篩選候選工作者並計分，回傳 (前 k 名, 分數 > 0 的總數)；k=None 表示回傳完整排序"""
+        # 3. (修改) 透過倒排索引篩選候選工作者，只載入有重疊 (完全 / 模糊) 標籤的公開 Profile
+        with recommendation_metrics.span("freelancers.candidates"):
+            await self._ensure_tag_index()
+            candidate_ids = tag_index.candidate_profiles(employer_skill_names)
+        if not candidate_ids:
+            return [], 0
+        # 4. (修改) 以輕量投影查詢取得候選工作者的技能 (不建立 Profile ORM 物件)
+        freelancers_data_for_algo = await self._load_freelancer_items(candidate_ids)
+        recommendation_metrics.count("freelancers.candidates", len(freelancers_data_for_algo))
+
+        # 5. 呼叫演算法 (修改) Top-K 模式：只保留前 k 名，total 另外計算
+        # (修改) 候選數量夠多時交由 process pool 計分，不阻塞 event loop
+        with recommendation_metrics.span("freelancers.score"):
+            scored_freelancers, total = await scoring_pool.select_top(
+                employer_skill_names,
+                freelancers_data_for_algo,
+                k=len(freelancers_data_for_algo) if k is None else k,
+                engine=settings.RECOMMENDER_ENGINE
+            )
+        recommendation_metrics.count("freelancers.scored", total)
+        return scored_freelancers, total
+
+    # --- (新增) cursor 分頁 ---
+
+    @staticmethod
+    def _parse_cursor(cursor: str) -> Dict:
+        try:
+            return decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status.HTTP_400_BAD_REQUEST, "無效的分頁 cursor")
+
+    @staticmethod
+    def _snapshot_continues(snapshot: Optional[RankingSnapshot], state: Dict, limit: int) -> bool:
+        """快照仍存在、cursor 的最後一筆與快照一致，且快照足以回答下一頁"""
+        if snapshot is None:
+            return False
+        position = state["position"]
+        if position > len(snapshot.ranked):
+            return False
+        if position > 0 and snapshot.ranked[position - 1][0] != state["item_id"]:
+            return False
+        return snapshot.covers(position + limit)
+
+    @staticmethod
+    def _snapshot_after(kind: str, user_id: str, scored: List[Dict], state: Dict,
+                        filters: str = "") -> RankingSnapshot:
+        """以重新計分的完整排序建立快照，從 cursor 最後一筆 (score, reputation, item_id) 之後開始"""
+        start = seek_position(scored, state["score"], state["reputation"], state["item_id"])
+        remaining = scored[start: start + settings.RECOMMENDER_SNAPSHOT_DEPTH]
+        return ranking_snapshots.create(
+            kind, user_id,
+            [(item["item_id"], item["score"]) for item in remaining],
+            len(scored) - start, base=start, filters=filters
+        )
+
+    @staticmethod
+    def _page_reputations(page: Dict) -> Dict[str, float]:
+        return {
+            item["profile"].profile_id: item_reputation(item["profile"]) for item in page["items"]
+        }
+
+    @staticmethod
+    def _with_next_cursor(
+        page: Dict, ranking: RankingSnapshot, offset: int, limit: int, reputations: Dict[str, float]
+    ) -> Dict:
+        """
+        還有下一頁時附上 next_cursor (指向快照內的位置)
+        reputations: 當頁項目的信譽分數 (案件沒有信譽分數，傳入空 dict)
+        """
+        end = min(offset + limit, len(ranking.ranked))
+        if end <= offset or end >= ranking.total:
+            page["next_cursor"] = None
+            return page
+        item_id, score = ranking.ranked[end - 1]
+        page["next_cursor"] = encode_cursor(
+            ranking.snapshot_id, end, score, reputations.get(item_id, 0.0), item_id
+        )
+        return page
+
+    async def get_freelancer_recommendations_by_project(self, user: User, limit: int = 10):
+        """
+        (新增) 依雇主的每個 '招募中' 案件分別推薦工作者
+
+        不將所有案件的技能合併成一個集合，而是：
+        1. 以倒排索引取得每個案件的候選工作者，候選者的技能只載入一次 (所有案件共用)
+        2. 每個案件以自己的技能計分，各自保留前 limit 名
+        3. 另外回傳整體前 limit 名 (每位工作者取各案件中的最高分)
+        """
+        if user.role != "雇主":
+            raise HTTPException(status.HTTP_403_FORBIDDEN, "只有雇主可以接收人才推薦")
+
+        project_rows = await self.project_repo.list_employer_active_project_tag_names(user.user_id)
+        projects = []
+        for project_id, group in groupby(project_rows, key=itemgetter(0)):
+            group = list(group)
+            skill_names = {name.lower() for _, _, name in group if name}
+            if skill_names:
+                projects.append((project_id, group[0][1], skill_names))
+        if not projects:
+            return {"projects": [], "combined": {"items": [], "total": 0}}
+
+        # 1. 所有案件的候選工作者 (聯集) 只載入一次
+        await self._ensure_tag_index()
+        candidates_by_project = {
+            project_id: tag_index.candidate_profiles(skill_names)
+            for project_id, _, skill_names in projects
+        }
+        all_candidate_ids = set().union(*candidates_by_project.values())
+        items_by_id = {
+            item["item_id"]: item for item in await self._load_freelancer_items(all_candidate_ids)
+        }
+
+        # 2. 每個案件各自計分 (候選項目依 profile_id 排序，與合併模式相同)
+        scored_by_project = []
+        # 至少在一個案件中得分 > 0 的工作者 (整體的 total，與各案件的 total 定義一致)
+        scored_ids: List[str] = []
+        for project_id, title, skill_names in projects:
+            candidates = [
+                items_by_id[profile_id]
+                for profile_id in sorted(candidates_by_project[project_id])
+                if profile_id in items_by_id
+            ]
+            scored, total = await scoring_pool.select_top(
+                skill_names, candidates, k=limit, engine=settings.RECOMMENDER_ENGINE,
+                scored_ids=scored_ids
+            )
+            scored_by_project.append((project_id, title, scored, total))
+
+        # 3. 整體前 K 名
+        combined = merge_top_recommendations((scored for _, _, scored, _ in scored_by_project), limit)
+
+        # 只載入實際回傳的 Profile (所有群組共用一次查詢)
+        returned_ids = list(dict.fromkeys(
+            item["item_id"] for _, _, scored, _ in scored_by_project for item in scored
+        ))
+        profiles_by_id = {
+            profile.profile_id: profile
+            for profile in await self.profile_repo.list_freelancer_profiles_by_ids(returned_ids)
+        }
+
+        def to_items(scored: List[Dict]) -> List[Dict]:
+            return [
+                {"profile": profiles_by_id[item["item_id"]], "recommendation_score": round(item["score"], 2)}
+                for item in scored if item["item_id"] in profiles_by_id
+            ]
+
+        return {
+            "projects": [
+                {"project_id": project_id, "title": title, "items": to_items(scored), "total": total}
+                for project_id, title, scored, total in scored_by_project
+            ],
+            "combined": {"items": to_items(combined), "total": len(set(scored_ids))},
+        }
+
+    async def _load_freelancer_items(self, candidate_ids: Set[str]) -> List[Dict]:
+        """
+        (新增) 以輕量投影查詢將候選工作者轉為計分用的資料結構 (不建立 Profile ORM 物件)
+        item_object 只需提供排序用的 reputation_score；結果依 profile_id 排序
+        """
+        with recommendation_metrics.span("freelancers.load"):
+            profile_rows = await self.profile_repo.list_public_profile_skill_rows(list(candidate_ids))
+        with recommendation_metrics.span("freelancers.convert"):
+            reputations = {profile_id: reputation for profile_id, reputation, _, _ in profile_rows}
+
+            freelancers_data_for_algo = []
+            for profile_id, profile_skill_names, profile_skill_weights in _group_weighted_skill_rows(
+                (profile_id, name, familiarity_level) for profile_id, _, name, familiarity_level in profile_rows
+            ):
+                item_object = SimpleNamespace(reputation_score=reputations[profile_id])
+                item = {
+                    # (修正) 匹配 recommender.py 的新 key
+                    "item_id": profile_id, 
+                    "skill_names": profile_skill_names,
+                    "item_object": item_object,
+                    # (新增) 排序用的 float 信譽分數，計分時不必再讀取 item_object
+                    "reputation": item_reputation(item_object)
+                }
+                # (新增) 加權模式：工作者的技能依熟悉度加權
+                if settings.RECOMMENDER_WEIGHTED_SCORING:
+                    item["skill_weights"] = profile_skill_weights
+                freelancers_data_for_algo.append(item)
+        return freelancers_data_for_algo
+
+    async def iter_job_recommendations_batch(
+        self,
+        user_ids: Optional[List[str]] = None,
+        limit: int = 10,
+        chunk_size: int = 500
+    ) -> AsyncIterator[List[Dict]]:
+        """
+        (新增) 批次推薦案件給一批自由工作者 (例如每日 email 摘要)
+
+        所有招募中案件的技能只載入一次，工作者則依 profile_id 分批載入與計分，
+        每批以一個 list 回傳，記憶體用量與 chunk_size 成正比而非與總人數成正比。
+        每筆結果: {"user_id", "profile_id", "items": [{"project_id", "recommendation_score"}], "total"}
+
+        user_ids: 只計算指定的使用者 (None 表示所有自由工作者)
+        """
+        # 1. 候選案件只載入一次 (輕量投影，不建立 ORM 物件；排除已過投標截止日的案件)
+        await self._ensure_tag_index()
+        project_rows = await self.project_repo.list_active_project_tag_names(
+            deadline_after=datetime.now()
         )
+        projects_by_id = {
+            project_id: {"item_id": project_id, "skill_names": skill_names, "item_object": None}
+            for project_id, skill_names in _group_skill_rows(project_rows)
+        }
+
+        # 2. 工作者依 profile_id 分批處理
+        profile_ids = await self.profile_repo.list_freelancer_profile_ids(user_ids)
+        for start in range(0, len(profile_ids), chunk_size):
+            chunk = profile_ids[start: start + chunk_size]
+            skill_rows = await self.profile_repo.list_profile_tag_names(
+                [profile_id for profile_id, _ in chunk]
+            )
+            skills_by_profile = {
+                profile_id: (skill_names, skill_weights)
+                for profile_id, skill_names, skill_weights in _group_weighted_skill_rows(skill_rows)
+            }
+
+            results = []
+            for profile_id, user_id in chunk:
+                user_skill_names, user_skill_weights = skills_by_profile.get(profile_id, (None, None))
+                if not user_skill_names:
+                    continue # 沒有技能，無法推薦
+                if not settings.RECOMMENDER_WEIGHTED_SCORING:
+                    user_skill_weights = None
+                # 透過倒排索引篩選候選案件 (依 project_id 排序，與單一使用者的路徑相同)
+                candidates = [
+                    projects_by_id[project_id]
+                    for project_id in sorted(tag_index.candidate_projects(user_skill_names))
+                    if project_id in projects_by_id
+                ]
+                top, total = await scoring_pool.select_top(
+                    user_skill_names, candidates, k=limit, engine=settings.RECOMMENDER_ENGINE,
+                    source_weights=user_skill_weights
+                )
+                results.append({
+                    "user_id": user_id,
+                    "profile_id": profile_id,
+                    "items": [
+                        {"project_id": item["item_id"], "recommendation_score": round(item["score"], 2)}
+                        for item in top
+                    ],
+                    "total": total,
+                })
+            yield results
 
-        logging.info(f"1 . Scored freelancers: {scored_freelancers}")
+    # --- (新增) 效能指標 ---
 
-        total = len(scored_freelancers)
-        sliced = scored_freelancers[offset: offset + limit]
+    @staticmethod
+    def get_metrics() -> Dict:
+        """各階段耗時 / 計數，以及快取、物化清單、相似度表等結構的統計 (僅限目前 worker)"""
+        return {
+            **recommendation_metrics.snapshot(),
+            "structures": {
+                "recommendation_cache": recommendation_cache.stats(),
+                "job_lists": job_lists.stats(),
+                "ranking_snapshots": ranking_snapshots.stats(),
+                "similarity_table": similarity_table.stats(),
+                "scoring_pool": scoring_pool.stats(),
+                "shared_matrix": shared_matrix_store.stats(),
+            },
+        }
+
+    # --- (新增) explain 模式：只為當頁項目計算分數組成 (不影響計分路徑) ---
+
+    @staticmethod
+    def _explain_job_page(page: Dict, user_skill_names: Set[str],
+                          user_skill_weights: Optional[SkillWeights]) -> None:
+        for item in page["items"]:
+            project_skill_names = {
+                project_skill.tag.name.lower() for project_skill in item["project"].skills if project_skill.tag
+            }
+            item["explanation"] = explain_recommendation_score(
+                user_skill_names, project_skill_names, source_weights=user_skill_weights
+            )
+
+    @staticmethod
+    def _explain_freelancer_page(page: Dict, employer_skill_names: Set[str]) -> None:
+        for item in page["items"]:
+            profile_skill_weights: Dict[str, float] = {}
+            for user_skill in item["profile"].skills:
+                if user_skill.tag:
+                    _add_skill_weight(profile_skill_weights, user_skill.tag.name.lower(), user_skill.familiarity_level)
+            item["explanation"] = explain_recommendation_score(
+                employer_skill_names, set(profile_skill_weights),
+                item_weights=to_skill_weights(profile_skill_weights) if settings.RECOMMENDER_WEIGHTED_SCORING else None
+            )
+
+    # (新增) 由排序結果 (快取或剛計算完成) 組出分頁：只載入當頁的 ORM 物件
+    async def _build_job_page(self, cached: CachedRanking, limit: int, offset: int):
+        page = cached.ranked[offset: offset + limit]
+        projects = await self.project_repo.list_projects_by_ids([item_id for item_id, _ in page])
+        projects_by_id = {project.project_id: project for project in projects}
 
-        # 6. 處理結果 - 提取物件和分數
         recommendations_with_scores = []
-        for item in sliced:
-            recommendations_with_scores.append({
-                "profile": item["item_object"],  # 原始 FreelancerProfile 物件
-                "recommendation_score": round(item["score"], 2)  # 分數四捨五入到小數點後兩位
-            })
+        for item_id, score in page:
+            if item_id in projects_by_id:
+                recommendations_with_scores.append({
+                    "project": projects_by_id[item_id],
+                    "recommendation_score": round(score, 2)
+                })
+        return {"items": recommendations_with_scores, "total": cached.total}
 
-        logging.info(f"2 . Scored freelancers: {scored_freelancers}")
+    async def _build_freelancer_page(self, cached: CachedRanking, limit: int, offset: int):
+        page = cached.ranked[offset: offset + limit]
+        profiles = await self.profile_repo.list_freelancer_profiles_by_ids([item_id for item_id, _ in page])
+        profiles_by_id = {profile.profile_id: profile for profile in profiles}
 
-        return {"items": recommendations_with_scores, "total": total}
+        recommendations_with_scores = []
+        for item_id, score in page:
+            if item_id in profiles_by_id:
+                recommendations_with_scores.append({
+                    "profile": profiles_by_id[item_id],
+                    "recommendation_score": round(score, 2)
+                })
+        return {"items": recommendations_with_scores, "total": cached.total}
@@ -0,0 +1,58 @@
+# app/utils/bk_tree.py
+# (新增) BK-tree：以編輯距離 (Levenshtein distance) 建立的度量樹
+#
+# 查詢「與 word 的編輯距離 <= radius 的所有字串」時，利用三角不等式剪枝，
+# 只需走訪樹的一小部分，不必與詞彙表中的每個字串逐一計算距離。
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import Levenshtein
+
+
+class BKTree:
+    def __init__(self, words: Iterable[str] = (), distance: Callable[[str, str], int] = Levenshtein.distance):
+        self._distance = distance
+        # 節點結構: (word, {與父節點的距離: 子節點})
+        self._root: Optional[Tuple[str, Dict[int, tuple]]] = None
+        self._size = 0
+        for word in words:
+            self.add(word)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, word: str) -> None:
+        if self._root is None:
+            self._root = (word, {})
+            self._size = 1
+            return
+
+        node = self._root
+        while True:
+            node_word, children = node
+            d = self._distance(word, node_word)
+            if d == 0:
+                return  # 已存在
+            child = children.get(d)
+            if child is None:
+                children[d] = (word, {})
+                self._size += 1
+                return
+            node = child
+
+    def search(self, word: str, radius: int) -> List[Tuple[str, int]]:
+        """回傳所有編輯距離 <= radius 的 (字串, 距離)"""
+        if self._root is None or radius < 0:
+            return []
+
+        matches = []
+        stack = [self._root]
+        while stack:
+            node_word, children = stack.pop()
+            d = self._distance(word, node_word)
+            if d <= radius:
+                matches.append((node_word, d))
+            # 三角不等式：只有距離落在 [d - radius, d + radius] 的子樹可能有符合的字串
+            for child_distance, child in children.items():
+                if d - radius <= child_distance <= d + radius:
+                    stack.append(child)
+        return matches
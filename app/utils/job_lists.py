@@ -0,0 +1,265 @@
+# app/utils/job_lists.py
+# (新增) 自由工作者的「案件推薦清單」物化結果 (Materialized Top-N)，以增量方式維護
+#
+# 每位工作者保存前 N 名 (project_id, score) 與所有符合案件的 ID 集合 (用於 total)。
+# 案件新增 / 技能更新時，只針對「標籤有重疊」的工作者計算這一個案件的分數並插入清單；
+# 案件關閉時直接移除。/recommendations/jobs 因此只需讀取清單並載入當頁案件。
+#
+# 清單在工作者第一次查詢時以完整計算的結果建立 (seed)，之後由資料異動事件維護。
+# 前 N 名移除某案件後，清單只剩下「仍然正確的前綴」，超出前綴的分頁會退回完整計算。
+# (新增) 清單另外記錄案件的投標截止日，讀取時移除已過期的案件 (與 SQL 的預設篩選一致)。
+#
+# (修改) 案件異動只把 project_id 放入待處理佇列 (O(1))，由背景 task 逐批套用到清單，
+# 每處理 MAINTENANCE_CHUNK 份清單讓出一次 event loop，不在寫入的 request 中計分。
+# 套用完成前清單可能短暫缺少 / 保留該案件 (與多 worker 的 max_age 相同的最終一致)。
+import asyncio
+import heapq
+import logging
+import time
+from bisect import insort
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from app.utils.recommendation_cache import CachedRanking
+from app.utils.recommender import SkillWeights, calculate_recommendation_scores
+from app.utils.tag_index import SkillTagIndex
+
+logger = logging.getLogger(__name__)
+
+
+# 背景維護每處理幾份清單讓出一次 event loop
+MAINTENANCE_CHUNK = 256
+
+
+def _rank_key(entry: Tuple[str, float]):
+    # 與完整計算的排序一致：分數由高到低，同分依 project_id (投影查詢的順序)
+    return (-entry[1], entry[0])
+
+
+class JobList(CachedRanking):
+    """一位工作者的物化推薦清單 (與 CachedRanking 相同的讀取介面)"""
+
+    __slots__ = ("skill_names", "skill_weights", "members", "deadlines", "_deadline_heap")
+
+    def __init__(self, fingerprint: str, skill_names: Set[str],
+                 ranked: List[Tuple[str, float]], members: Set[str],
+                 skill_weights: Optional[SkillWeights] = None,
+                 deadlines: Optional[Dict[str, datetime]] = None):
+        super().__init__(fingerprint, ranked, len(members))
+        self.skill_names = skill_names
+        # (新增) 加權模式的技能熟悉度權重 (None 表示未加權)
+        self.skill_weights = skill_weights
+        # 所有分數 > 0 的案件 ID (不論是否在前 N 名內)
+        self.members = members
+        # (新增) 有設定投標截止日的案件: {project_id: deadline}，另以 min-heap 找出最早到期者
+        self.deadlines: Dict[str, datetime] = {
+            project_id: deadline for project_id, deadline in (deadlines or {}).items()
+            if project_id in members
+        }
+        self._deadline_heap = [(deadline, project_id) for project_id, deadline in self.deadlines.items()]
+        heapq.heapify(self._deadline_heap)
+
+    def add(self, project_id: str, score: float, depth: int,
+            deadline: Optional[datetime] = None) -> None:
+        # 背景維護期間清單可能已由完整計算建立 (已包含此案件)：先移除舊的名次
+        if project_id in self.members:
+            self.discard(project_id)
+        # 清單完整 (前綴即全部) 或新案件排在前綴之內時才插入；否則只計入 total
+        entry = (project_id, score)
+        complete = len(self.ranked) >= len(self.members)
+        self.members.add(project_id)
+        self.total = len(self.members)
+        if deadline is not None:
+            self.deadlines[project_id] = deadline
+            heapq.heappush(self._deadline_heap, (deadline, project_id))
+        if complete or (self.ranked and _rank_key(entry) < _rank_key(self.ranked[-1])):
+            insort(self.ranked, entry, key=_rank_key)
+            del self.ranked[depth:]
+
+    def discard(self, project_id: str) -> None:
+        if project_id not in self.members:
+            return
+        self.members.discard(project_id)
+        self.deadlines.pop(project_id, None)
+        self.total = len(self.members)
+        self.ranked = [entry for entry in self.ranked if entry[0] != project_id]
+
+    def expire(self, now: datetime) -> None:
+        """(新增) 移除投標截止日早於 now 的案件"""
+        heap = self._deadline_heap
+        while heap and heap[0][0] < now:
+            deadline, project_id = heapq.heappop(heap)
+            # 案件更新過截止日時，heap 中會留有舊的紀錄
+            if self.deadlines.get(project_id) == deadline:
+                self.discard(project_id)
+
+
+class JobListStore:
+    def __init__(self, depth: int = 100, max_entries: int = 10000, max_age_seconds: float = 300):
+        self.depth = depth
+        self.max_entries = max_entries
+        # 多個 worker 各自維護清單，超過期限後重新計算以納入其他 worker 的異動
+        self.max_age_seconds = max_age_seconds
+        # 結構: {profile_id: JobList}，依最近使用排序
+        self._lists: "OrderedDict[str, JobList]" = OrderedDict()
+        # 已物化工作者的技能倒排索引 (只使用 profile 的部分)
+        self._skills = SkillTagIndex()
+        # 每次異動都會遞增；計算期間若有異動，計算結果不寫入 (與 RecommendationCache 相同)
+        self.generation = 0
+        # 待套用的案件異動: {project_id: (tag_names, is_open, deadline)}，同一案件只保留最新一筆
+        self._pending: "OrderedDict[str, Tuple[List[str], bool, Optional[datetime]]]" = OrderedDict()
+        self._maintainer: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self.updates = 0
+
+    def configure(self, depth: int, max_entries: int, max_age_seconds: float) -> None:
+        self.depth = depth
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+        self._evict_overflow()
+
+    def get(self, profile_id: str, fingerprint: str, end: int,
+            now: Optional[datetime] = None) -> Optional[JobList]:
+        """
+        取得可回答 [0, end) 分頁的清單；過期、技能指紋不符或前綴不足皆視為未命中
+        (新增) now: 先移除投標截止日早於此時間的案件
+        """
+        job_list = self._lists.get(profile_id)
+        if job_list is not None and (time.monotonic() - job_list.created_at) > self.max_age_seconds:
+            self._drop(profile_id)
+            job_list = None
+        if job_list is not None and now is not None:
+            job_list.expire(now)
+
+        if job_list is None or job_list.fingerprint != fingerprint or not job_list.covers(end):
+            self.misses += 1
+            return None
+
+        self._lists.move_to_end(profile_id)
+        self.hits += 1
+        return job_list
+
+    def seed(self, profile_id: str, fingerprint: str, skill_names: Set[str],
+             ranked: List[Tuple[str, float]], members: Iterable[str],
+             generation: Optional[int] = None,
+             skill_weights: Optional[SkillWeights] = None,
+             deadlines: Optional[Dict[str, datetime]] = None) -> JobList:
+        """
+        以完整計算的結果建立清單；generation 為開始計算前取得的 self.generation
+        (新增) deadlines: 候選案件的投標截止日 {project_id: deadline}
+        """
+        job_list = JobList(
+            fingerprint, set(skill_names), list(ranked), set(members), skill_weights, deadlines
+        )
+        if self.max_entries <= 0 or (generation is not None and generation != self.generation):
+            return job_list
+        self._lists[profile_id] = job_list
+        self._lists.move_to_end(profile_id)
+        self._skills.set_profile_tags(profile_id, skill_names)
+        self._evict_overflow()
+        return job_list
+
+    # --- 增量維護 (由資料異動事件觸發) ---
+
+    def project_changed(self, project_id: str, tag_names: Iterable[str], is_open: bool,
+                        deadline: Optional[datetime] = None) -> None:
+        """
+        案件新增或更新：先從所有清單移除，仍在招募中則重新計分並插入相關工作者的清單
+        (新增) deadline: 案件的投標截止日 (已過期的案件會在讀取清單時移除)
+        (修改) 只排入待處理佇列，由背景 task 套用 (沒有執行中的 event loop 時直接套用)
+        """
+        self.generation += 1
+        self._pending[project_id] = (list(tag_names), is_open, deadline)
+        self._pending.move_to_end(project_id)
+        self._schedule()
+
+    def remove_project(self, project_id: str) -> None:
+        self.project_changed(project_id, (), is_open=False)
+
+    async def wait_maintained(self) -> None:
+        """等待目前排入的異動全部套用完成"""
+        while self._maintainer is not None and not self._maintainer.done():
+            await asyncio.shield(self._maintainer)
+
+    def _schedule(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # CLI / 同步呼叫端：直接套用
+            while self._pending:
+                for _ in self._apply_next():
+                    pass
+            return
+        if self._maintainer is None or self._maintainer.done() or self._maintainer.get_loop() is not loop:
+            self._maintainer = loop.create_task(self._maintain())
+
+    async def _maintain(self) -> None:
+        while self._pending:
+            try:
+                for _ in self._apply_next():
+                    await asyncio.sleep(0)
+            except Exception as e:
+                # 清單可能只套用了這筆異動的一部分：全部捨棄 (下次查詢時重新計算)，繼續處理其餘異動
+                logger.error(f"Job list maintenance failed: {e}", exc_info=True)
+                self._reset_lists()
+
+    def _apply_next(self) -> Iterator[None]:
+        """套用最早排入的一筆異動；每處理 MAINTENANCE_CHUNK 份清單 yield 一次"""
+        project_id, (tag_names, is_open, deadline) = self._pending.popitem(last=False)
+        for i, job_list in enumerate(list(self._lists.values()), 1):
+            job_list.discard(project_id)
+            if i % MAINTENANCE_CHUNK == 0:
+                yield
+
+        project_tags = {name.lower() for name in tag_names if name}
+        if not is_open or not project_tags:
+            return
+        item = {"item_id": project_id, "skill_names": project_tags, "item_object": None}
+        for i, profile_id in enumerate(list(self._skills.candidate_profiles(project_tags)), 1):
+            job_list = self._lists.get(profile_id)
+            # 讓出期間清單可能已被移除，或之後又有同一案件的異動排入 (由下一筆處理)
+            if job_list is not None and project_id not in self._pending:
+                for scored in calculate_recommendation_scores(
+                    job_list.skill_names, [item], source_weights=job_list.skill_weights
+                ):
+                    job_list.add(project_id, scored["score"], self.depth, deadline)
+                    self.updates += 1
+            if i % MAINTENANCE_CHUNK == 0:
+                yield
+
+    def remove_profile(self, profile_id: str) -> None:
+        self.generation += 1
+        self._drop(profile_id)
+
+    def clear(self) -> None:
+        self._pending.clear()
+        self._reset_lists()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "lists": len(self._lists),
+            "hits": self.hits,
+            "misses": self.misses,
+            "updates": self.updates,
+            "pending_changes": len(self._pending),
+        }
+
+    def _reset_lists(self) -> None:
+        self.generation += 1
+        self._lists.clear()
+        self._skills = SkillTagIndex()
+
+    def _drop(self, profile_id: str) -> None:
+        if self._lists.pop(profile_id, None) is not None:
+            self._skills.remove_profile(profile_id)
+
+    def _evict_overflow(self) -> None:
+        while len(self._lists) > max(self.max_entries, 0):
+            profile_id, _ = self._lists.popitem(last=False)
+            self._skills.remove_profile(profile_id)
+
+
+# 實例化物化清單 (全域單例)
+job_lists = JobListStore()
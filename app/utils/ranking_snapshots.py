@@ -0,0 +1,150 @@
+# app/utils/ranking_snapshots.py
+# (新增) 推薦結果的分頁快照 (cursor pagination)
+#
+# 用戶端選用 cursor 分頁時，第一頁回應將排序結果 (item_id, score) 複製一份保存為快照，回傳不透明的 cursor：
+#   base64(json{快照 ID, 快照內的位置, 最後一筆的 score / reputation / item_id})
+# 之後的分頁直接由快照切片 (O(page))，不重新計分；期間新增的案件也不會讓結果位移。
+# 快照過期或被淘汰時，呼叫端重新計分，再以 cursor 中的 (score, reputation, item_id)
+# 找到「最後一筆之後」的位置繼續 (keyset pagination)。
+# (新增) 快照記錄建立時的篩選條件指紋，以不同的篩選條件帶入 cursor 時視為未命中。
+import base64
+import binascii
+import json
+import secrets
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from app.utils.recommendation_cache import CachedRanking
+from app.utils.recommender import item_reputation
+
+
+def rank_key(score: float, reputation: float, item_id: str) -> Tuple[float, float, str]:
+    """與推薦排序相同的全序：分數、信譽分數由高到低，同分依 item_id (候選項目的順序)"""
+    return (-score, -reputation, item_id)
+
+
+def seek_position(ranked: List[Dict], score: float, reputation: float, item_id: str) -> int:
+    """在已排序的推薦結果 (recommender 的 dict 格式) 中，找出排在指定 key 之後的第一個位置"""
+    return bisect_right(
+        ranked, rank_key(score, reputation, item_id),
+        key=lambda item: rank_key(
+            item["score"], item_reputation(item.get("item_object")), item["item_id"]
+        )
+    )
+
+
+class RankingSnapshot(CachedRanking):
+    """
+    一份凍結的排序結果；ranked 從整體排序的第 base 名開始，
+    total 為 base 之後 (含) 的項目數，讓 covers() 可直接以快照內的位置判斷
+    filters: 建立快照時的篩選條件指紋 (沒有篩選條件時為空字串)
+    """
+
+    __slots__ = ("snapshot_id", "kind", "user_id", "base", "filters")
+
+    def __init__(self, snapshot_id: str, kind: str, user_id: str,
+                 ranked: List[Tuple[str, float]], total: int, base: int = 0, filters: str = ""):
+        super().__init__(snapshot_id, ranked, total)
+        self.snapshot_id = snapshot_id
+        self.kind = kind
+        self.user_id = user_id
+        self.base = base
+        self.filters = filters
+
+    @property
+    def overall_total(self) -> int:
+        return self.base + self.total
+
+
+class RankingSnapshotStore:
+    def __init__(self, max_entries: int = 4096, ttl_seconds: float = 600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # 結構: {snapshot_id: RankingSnapshot}，依最近使用排序
+        self._snapshots: "OrderedDict[str, RankingSnapshot]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def configure(self, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._evict_overflow()
+
+    def create(self, kind: str, user_id: str, ranked: List[Tuple[str, float]],
+               total: int, base: int = 0, filters: str = "") -> RankingSnapshot:
+        """保存排序結果的複本 (之後快取 / 物化清單的異動不影響快照)"""
+        snapshot = RankingSnapshot(
+            secrets.token_urlsafe(12), kind, user_id, list(ranked), total, base, filters
+        )
+        if self.max_entries > 0:
+            self._snapshots[snapshot.snapshot_id] = snapshot
+            self._evict_overflow()
+        return snapshot
+
+    def get(self, snapshot_id: str, kind: str, user_id: str,
+            filters: str = "") -> Optional[RankingSnapshot]:
+        """取得快照；過期、不屬於此使用者 / 種類，或篩選條件不同皆視為未命中"""
+        snapshot = self._snapshots.get(snapshot_id)
+        if snapshot is not None and (time.monotonic() - snapshot.created_at) > self.ttl_seconds:
+            del self._snapshots[snapshot_id]
+            self.evictions += 1
+            snapshot = None
+
+        if (snapshot is None or snapshot.kind != kind or snapshot.user_id != user_id
+                or snapshot.filters != filters):
+            self.misses += 1
+            return None
+
+        self._snapshots.move_to_end(snapshot_id)
+        self.hits += 1
+        return snapshot
+
+    def clear(self) -> None:
+        self._snapshots.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "snapshots": len(self._snapshots),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _evict_overflow(self) -> None:
+        while len(self._snapshots) > max(self.max_entries, 0):
+            self._snapshots.popitem(last=False)
+            self.evictions += 1
+
+
+# --- cursor 編碼 ---
+
+def encode_cursor(snapshot_id: str, position: int, score: float,
+                  reputation: float, item_id: str) -> str:
+    payload = {"s": snapshot_id, "p": position, "sc": score, "r": reputation, "id": item_id}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict:
+    """解析 cursor；格式錯誤時拋出 ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if int(payload["p"]) < 0:
+            raise ValueError("negative position")
+        return {
+            "snapshot_id": str(payload["s"]),
+            "position": int(payload["p"]),
+            "score": float(payload["sc"]),
+            "reputation": float(payload["r"]),
+            "item_id": str(payload["id"]),
+        }
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError, KeyError, TypeError, ValueError) as exc:
+        raise ValueError("invalid cursor") from exc
+
+
+# 實例化快照儲存 (全域單例)
+ranking_snapshots = RankingSnapshotStore()
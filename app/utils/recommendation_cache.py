@@ -0,0 +1,123 @@
+# app/utils/recommendation_cache.py
+# (新增) 推薦結果快取 (以使用者 + 技能指紋為 key，LRU + TTL 淘汰)
+#
+# 只快取排序後的 (item_id, score) 列表與 total，不保存 ORM 物件；
+# 命中時只需依 ID 載入當頁的案件 / Profile，不必重新載入與計分所有候選項目。
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.utils.recommender import SkillWeights
+
+# 快取種類
+KIND_JOBS = "jobs"                # 推薦案件給自由工作者
+KIND_FREELANCERS = "freelancers"  # 推薦工作者給雇主
+
+
+def skill_fingerprint(skill_names: Iterable[str], skill_weights: Optional[SkillWeights] = None) -> str:
+    """技能集合的指紋 (與順序無關)；技能 (或加權模式下的權重) 變更後舊的快取自然失效"""
+    if skill_weights is not None:
+        weight_of = dict(skill_weights)
+        return "\x1f".join(f"{name}:{weight_of.get(name, 1.0)!r}" for name in sorted(skill_names))
+    return "\x1f".join(sorted(skill_names))
+
+
+class CachedRanking:
+    """一份已排序的推薦結果 (可能只保存前 N 名)"""
+
+    __slots__ = ("fingerprint", "ranked", "total", "created_at")
+
+    def __init__(self, fingerprint: str, ranked: List[Tuple[str, float]], total: int):
+        self.fingerprint = fingerprint
+        self.ranked = ranked
+        self.total = total
+        self.created_at = time.monotonic()
+
+    def covers(self, end: int) -> bool:
+        """是否足以回答 [0, end) 範圍的分頁"""
+        return end <= len(self.ranked) or len(self.ranked) >= self.total
+
+
+class RecommendationCache:
+    def __init__(self, max_entries: int = 2048, ttl_seconds: float = 120):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # 結構: {(kind, user_id): CachedRanking}，依最近使用排序
+        self._entries: "OrderedDict[Tuple[str, str], CachedRanking]" = OrderedDict()
+        # 每次失效都會遞增；計分期間若發生失效，計算結果不寫入快取
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def configure(self, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._evict_overflow()
+
+    def get(self, kind: str, user_id: str, fingerprint: str, end: int) -> Optional[CachedRanking]:
+        """
+        取得可回答 [0, end) 分頁的快取；過期、指紋不符或深度不足皆視為未命中
+        """
+        key = (kind, user_id)
+        entry = self._entries.get(key)
+        if entry is not None and (time.monotonic() - entry.created_at) > self.ttl_seconds:
+            del self._entries[key]
+            self.evictions += 1
+            entry = None
+
+        if entry is None or entry.fingerprint != fingerprint or not entry.covers(end):
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, kind: str, user_id: str, fingerprint: str,
+            ranked: List[Tuple[str, float]], total: int,
+            generation: Optional[int] = None) -> CachedRanking:
+        """
+        寫入快取；generation 為開始計算前取得的 self.generation，
+        若計算期間已有失效事件則捨棄 (避免寫入過期結果)
+        """
+        entry = CachedRanking(fingerprint, ranked, total)
+        if self.max_entries <= 0 or (generation is not None and generation != self.generation):
+            return entry
+        key = (kind, user_id)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        self._evict_overflow()
+        return entry
+
+    # --- 失效 (由資料異動事件觸發) ---
+
+    def invalidate_user(self, kind: str, user_id: str) -> None:
+        self.generation += 1
+        self._entries.pop((kind, user_id), None)
+
+    def invalidate_kind(self, kind: str) -> None:
+        self.generation += 1
+        for key in [key for key in self._entries if key[0] == kind]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _evict_overflow(self) -> None:
+        while len(self._entries) > max(self.max_entries, 0):
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+
+# 實例化快取 (全域單例)
+recommendation_cache = RecommendationCache()
@@ -0,0 +1,70 @@
+# app/utils/recommendation_events.py
+# (新增) 推薦系統的資料異動事件
+#
+# Repository / Service 在案件或工作者技能異動後呼叫這裡的函式，
+# 統一維護推薦用的記憶體結構 (倒排索引、結果快取、物化的案件推薦清單)。
+from typing import Dict, Tuple
+
+from app.utils.job_lists import job_lists
+from app.utils.recommendation_cache import KIND_FREELANCERS, KIND_JOBS, recommendation_cache
+from app.utils.tag_index import sync_profile, sync_project, tag_index
+
+# (新增) 上次同步時案件中會影響推薦的欄位: {project_id: signature}
+# 只改標題 / 描述等欄位時不需要重新計分，也不需要讓其他使用者的推薦快取失效
+_project_signatures: Dict[str, Tuple] = {}
+
+
+def _project_signature(project, tag_names) -> Tuple:
+    """技能、狀態，以及推薦篩選條件使用的欄位 (見 ProjectRepository.list_active_project_tag_names)"""
+    return (
+        tuple(sorted({name.lower() for name in tag_names})),
+        project.status,
+        project.work_type,
+        project.location,
+        project.budget_min,
+        project.budget_max,
+        project.proposals_deadline,
+    )
+
+
+def project_changed(project) -> None:
+    """案件新增 / 內容或狀態更新後呼叫 (project 需已載入 skills.tag)"""
+    sync_project(project)
+    tag_names = [skill.tag.name for skill in project.skills if skill.tag]
+    signature = _project_signature(project, tag_names)
+    if _project_signatures.get(project.project_id) == signature:
+        return  # 只修改了不影響推薦的欄位 (標題、描述等)
+    if project.status == '招募中':
+        _project_signatures[project.project_id] = signature
+    else:
+        # 不再招募的案件不保留 signature (之後的修改一律視為異動，避免 dict 無限成長)
+        _project_signatures.pop(project.project_id, None)
+
+    # (修改) 只對標籤有重疊的工作者計算此案件分數，增量更新其物化清單
+    job_lists.project_changed(
+        project.project_id,
+        tag_names,
+        is_open=project.status == '招募中',
+        deadline=project.proposals_deadline
+    )
+    # (新增) 帶篩選條件的案件推薦 (不使用物化清單) 改以結果快取保存
+    recommendation_cache.invalidate_kind(KIND_JOBS)
+    # 雇主的技能來源 (招募中案件的技能) 也隨之改變
+    recommendation_cache.invalidate_user(KIND_FREELANCERS, project.employer_id)
+
+
+def project_closed(project_id: str, employer_id: str) -> None:
+    """案件不再招募 (關閉 / 成案) 時呼叫"""
+    _project_signatures.pop(project_id, None)
+    tag_index.remove_project(project_id)
+    job_lists.remove_project(project_id)
+    recommendation_cache.invalidate_kind(KIND_JOBS)
+    recommendation_cache.invalidate_user(KIND_FREELANCERS, employer_id)
+
+
+def profile_changed(profile) -> None:
+    """工作者技能或公開狀態更新後呼叫 (profile 需已載入 skills.tag)"""
+    sync_profile(profile)
+    job_lists.remove_profile(profile.profile_id)
+    # 任何雇主的人才推薦都可能受影響
+    recommendation_cache.invalidate_kind(KIND_FREELANCERS)
@@ -0,0 +1,120 @@
+# app/utils/recommendation_metrics.py
+# (新增) 推薦流程的效能指標 (各階段耗時、候選數量、模糊比對次數)
+#
+# 用法:
+#   with recommendation_metrics.span("jobs.load"):
+#       rows = await repo.list_active_project_tag_names(...)
+#   recommendation_metrics.count("jobs.candidates", len(rows))
+#
+# 每個階段以固定的 bucket 累計耗時分布 (與 Prometheus histogram 相同的累積格式)，
+# 只做數值累加，不保存個別樣本；每次記錄的成本約為兩次 perf_counter 呼叫。
+import time
+from bisect import bisect_left
+from typing import Dict, List
+
+# 階段耗時的 bucket 上界 (秒)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class _StageStats:
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self, bucket_count: int):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        # 最後一格為 +Inf
+        self.buckets: List[int] = [0] * (bucket_count + 1)
+
+
+class _Span:
+    """span() 回傳的 context manager (以 __slots__ 類別實作，比 generator 版本便宜)"""
+
+    __slots__ = ("_metrics", "_stage", "_start")
+
+    def __init__(self, metrics: "RecommendationMetrics", stage: str):
+        self._metrics = metrics
+        self._stage = stage
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._metrics.observe(self._stage, time.perf_counter() - self._start)
+        return False
+
+
+class RecommendationMetrics:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._stages: Dict[str, _StageStats] = {}
+        self._counters: Dict[str, int] = {}
+
+    def span(self, stage: str) -> _Span:
+        """量測一個階段的耗時 (with 區塊)"""
+        return _Span(self, stage)
+
+    def observe(self, stage: str, seconds: float) -> None:
+        stats = self._stages.get(stage)
+        if stats is None:
+            stats = self._stages[stage] = _StageStats(len(self.buckets))
+        stats.count += 1
+        stats.total += seconds
+        if seconds > stats.max:
+            stats.max = seconds
+        stats.buckets[bisect_left(self.buckets, seconds)] += 1
+
+    def count(self, name: str, value: int = 1) -> None:
+        self._counters[name] = self._counters.get(name, 0) + value
+
+    def reset(self) -> None:
+        self._stages.clear()
+        self._counters.clear()
+
+    def snapshot(self) -> Dict:
+        """JSON 格式的目前指標"""
+        stages = {}
+        for stage, stats in sorted(self._stages.items()):
+            stages[stage] = {
+                "count": stats.count,
+                "total_seconds": stats.total,
+                "avg_seconds": stats.total / stats.count if stats.count else 0.0,
+                "max_seconds": stats.max,
+                "buckets": {
+                    **{str(bound): n for bound, n in zip(self.buckets, _cumulative(stats.buckets))},
+                    "+Inf": stats.count,
+                },
+            }
+        return {"stages": stages, "counters": dict(sorted(self._counters.items()))}
+
+    def to_prometheus(self, prefix: str = "recommendation") -> str:
+        """Prometheus text exposition format"""
+        lines = [
+            f"# HELP {prefix}_stage_seconds Time spent in each recommendation stage.",
+            f"# TYPE {prefix}_stage_seconds histogram",
+        ]
+        for stage, stats in sorted(self._stages.items()):
+            for bound, n in zip(self.buckets, _cumulative(stats.buckets)):
+                lines.append(f'{prefix}_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {n}')
+            lines.append(f'{prefix}_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {stats.count}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {stats.total!r}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {stats.count}')
+        lines.append(f"# HELP {prefix}_events_total Recommendation counters (candidates, fuzzy comparisons, ...).")
+        lines.append(f"# TYPE {prefix}_events_total counter")
+        for name, value in sorted(self._counters.items()):
+            lines.append(f'{prefix}_events_total{{name="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+def _cumulative(buckets: List[int]) -> List[int]:
+    total = 0
+    cumulative = []
+    for n in buckets:
+        total += n
+        cumulative.append(total)
+    return cumulative
+
+
+# 實例化指標 (全域單例，每個 worker 各自累計)
+recommendation_metrics = RecommendationMetrics()
@@ -1,76 +1,369 @@
 # app/utils/recommender.py (新檔案)
-import Levenshtein
-from typing import List, Dict, Set
-
-# (輔助函式) 取得兩個字串的 Levenshtein 相似度 (0.0 ~ 1.0)
-def _get_string_similarity(s1: str, s2: str) -> float:
-    # Levenshtein.distance 算出的是 "編輯距離" (差多少)
-    # 我們將其標準化為 "相似度" (0.0 ~ 1.0)
-    # 1.0 表示完全相同
-    if not s1 or not s2:
-        return 0.0
-    distance = Levenshtein.distance(s1.lower(), s2.lower())
-    max_len = max(len(s1), len(s2))
-    # 避免除以零，以及如果兩個字串都是空的，視為完全相似
-    if max_len == 0:
+import heapq
+import logging
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# (修改) 相似度計算移至 tag_similarity，模糊比對改為查詢預先計算的相似度表
+from app.utils.tag_similarity import _get_string_similarity, similarity_table
+
+logger = logging.getLogger(__name__)
+
+# (新增) 可選的計分引擎
+ENGINE_PYTHON = "python"
+ENGINE_NUMPY = "numpy"
+
+# (新增) 熟悉度加權：UserSkillTag.familiarity_level (1~5) 除以預設值 3，
+# 預設熟悉度的權重為 1.0，與未加權的分數相同
+DEFAULT_FAMILIARITY_LEVEL = 3
+
+# (修改) 權重以依標籤名稱排序的 ((tag name, weight), ...) 表示 (與標籤對齊的精簡陣列)，
+# 計分迴圈直接走訪，不必為每個 (來源, 項目) 標籤配對查詢 dict 或重新排序
+SkillWeights = Tuple[Tuple[str, float], ...]
+
+
+def familiarity_weight(familiarity_level: Optional[int]) -> float:
+    if familiarity_level is None:
         return 1.0
-    return 1.0 - (distance / max_len)
+    return familiarity_level / DEFAULT_FAMILIARITY_LEVEL
+
+
+def to_skill_weights(weights: Dict[str, float]) -> SkillWeights:
+    """(新增) 將 {tag name: weight} 轉為計分使用的 SkillWeights (每個項目 / 使用者只轉換一次)"""
+    return tuple(sorted(weights.items()))
 
 def calculate_recommendation_scores(
     # 'source_skills' (e.g., 登入者的技能)
-    source_skill_names: Set[str], 
+    source_skill_names: Set[str],
     # 'target_items' (e.g., 所有案件 or 所有工作者)
-    target_items: List[Dict] 
+    target_items: List[Dict],
+    # (新增) 計分引擎："python" (逐筆迴圈) 或 "numpy" (稀疏矩陣批次計算)
+    engine: str = ENGINE_PYTHON,
+    # (新增) 加權模式：來源標籤的權重 SkillWeights (未列出的標籤權重為 1.0)
+    source_weights: Optional[SkillWeights] = None
 ) -> List[Dict]:
     """
     計算來源 (Source) 與所有目標 (Target) 的推薦分數
+
+    (新增) 加權模式：source_weights 或 target item 的 "skill_weights" (SkillWeights)
+    存在時，完全相同的標籤貢獻 (來源權重 x 項目權重)，
+    模糊比對貢獻 來源權重 x max(相似度 x 項目權重)
     """
-    
-    recommendations = []
 
     if not source_skill_names:
         return []
 
-    for item in target_items:
+    # (修改) 計分結果以平行陣列保存，排序完成後才為每個項目建立 dict
+    scored = score_items(source_skill_names, target_items, engine, source_weights)
+    return scored.to_dicts(scored.order())
+
+
+# (新增) Top-K 模式：只保留前 k 名，另外回傳完整的命中總數
+def select_top_recommendations(
+    source_skill_names: Set[str],
+    target_items: List[Dict],
+    k: int,
+    engine: str = ENGINE_PYTHON,
+    source_weights: Optional[SkillWeights] = None,
+    scored_ids: Optional[List] = None
+) -> Tuple[List[Dict], int]:
+    """
+    回傳 (排序後的前 k 名, 分數 > 0 的項目總數)
+
+    以大小為 k 的 heap 篩選，成本為 O(n log k)；
+    結果與 calculate_recommendation_scores(...)[:k] 完全相同 (包含同分時的順序)。
+    (新增) scored_ids: (選用) 加入所有分數 > 0 的項目 item_id (依原順序，不受 k 限制)
+    """
+    if not source_skill_names:
+        return [], 0
+    k = max(k, 0)
+    scored_positions = None if scored_ids is None else []
+    scored = score_items(
+        source_skill_names, target_items, engine, source_weights, k=k, scored_positions=scored_positions
+    )
+    if scored_ids is not None:
+        scored_ids.extend(target_items[position].get("item_id") for position in scored_positions)
+    return scored.to_dicts(scored.order(k)), scored.total
+
+
+# (新增) 計分結果的 struct-of-arrays 表示
+class ScoredItems:
+    """
+    分數 > 0 的項目，以三個平行陣列保存：
+    positions (在 target_items 中的位置)、scores、reputations (float，排序時才計算)
+
+    計分迴圈只 append 位置與分數，不為每個項目建立 dict、也不讀取 item_object；
+    排序鍵 (score, reputation) 預先算成 tuple，比較時不再經過 Decimal / ORM 屬性存取。
+    total 為分數 > 0 的項目總數 (Top-K 模式下陣列可能只保留前 k 名的候選)
+    """
+
+    __slots__ = ("target_items", "positions", "scores", "total", "_reputations")
+
+    def __init__(self, target_items: List[Dict], positions: List[int], scores: List[float],
+                 total: Optional[int] = None):
+        self.target_items = target_items
+        self.positions = positions
+        self.scores = scores
+        self.total = len(positions) if total is None else total
+        self._reputations: Optional[List[float]] = None
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    @property
+    def reputations(self) -> List[float]:
+        if self._reputations is None:
+            target_items = self.target_items
+            self._reputations = [target_reputation(target_items[position]) for position in self.positions]
+        return self._reputations
+
+    def order(self, k: Optional[int] = None) -> List[int]:
+        """
+        依 (分數, 信譽分數) 由高到低排序後的陣列索引；同分時維持原順序
+        k: 只取前 k 名 (heap，O(n log k))
+        """
+        keys = list(zip(self.scores, self.reputations))
+        if k is None:
+            return sorted(range(len(keys)), key=keys.__getitem__, reverse=True)
+        return heapq.nlargest(k, range(len(keys)), key=keys.__getitem__)
+
+    def to_dicts(self, order: List[int]) -> List[Dict]:
+        """只為指定的項目建立對外的推薦 dict ({"item_id", "score", "item_object"})"""
+        recommendations = []
+        for index in order:
+            item = self.target_items[self.positions[index]]
+            recommendations.append({
+                "item_id": item.get("item_id"),
+                "score": self.scores[index],
+                "item_object": item.get("item_object")
+            })
+        return recommendations
+
+
+def score_items(
+    source_skill_names: Set[str],
+    target_items: List[Dict],
+    engine: str = ENGINE_PYTHON,
+    source_weights: Optional[SkillWeights] = None,
+    k: Optional[int] = None,
+    scored_positions: Optional[List[int]] = None
+) -> ScoredItems:
+    """
+    (新增) 計分並回傳 ScoredItems (依 target_items 的原順序)
+    k: 只需要前 k 名時，numpy 引擎只保留分數不低於第 k 名的候選 (total 仍為完整的命中數)
+    scored_positions: (選用) 加入所有分數 > 0 的項目位置 (不受 k 限制)
+    """
+    if not source_skill_names or not target_items:
+        return ScoredItems(target_items, [], [])
+
+    vectorized = _get_vectorized_engine(engine)
+    if vectorized is not None:
+        positions, scores, total = vectorized.score_positions_vectorized(
+            source_skill_names, target_items, source_weights, k=k, scored_positions=scored_positions
+        )
+        return ScoredItems(target_items, positions, scores, total)
+
+    positions: List[int] = []
+    scores: List[float] = []
+    _score_python(source_skill_names, target_items, source_weights, positions, scores)
+    if scored_positions is not None:
+        scored_positions.extend(positions)
+    return ScoredItems(target_items, positions, scores)
+
+
+def item_reputation(item_object) -> float:
+    """排序用的信譽分數 (Decimal / None 轉為 float；沒有信譽分數的項目視為 0)"""
+    return float(getattr(item_object, "reputation_score", 0) or 0)
+
+
+def target_reputation(item: Dict) -> float:
+    """候選項目 (dict) 的信譽分數；可直接提供 float 的 "reputation"，不必經過 item_object"""
+    reputation = item.get("reputation")
+    if reputation is not None:
+        return reputation
+    return item_reputation(item.get("item_object"))
+
+
+# (新增) 合併多組 Top-K 結果 (例如雇主每個案件各自的推薦)
+def merge_top_recommendations(groups: Iterable[List[Dict]], k: int) -> List[Dict]:
+    """
+    同一個項目出現在多組時只保留最高分，回傳排序後的前 k 名
+
+    若每組都是該組的前 k 名，結果即為「各項目取最高分」的整體前 k 名
+    (整體前 k 名的項目，在它得到最高分的那一組中也一定是前 k 名)
+    """
+    best: Dict = {}
+    for group in groups:
+        for item in group:
+            current = best.get(item["item_id"])
+            if current is None or item["score"] > current["score"]:
+                best[item["item_id"]] = item
+    return heapq.nlargest(max(k, 0), best.values(), key=_recommendation_sort_key)
+
+
+# (新增) explain 模式：單一項目的分數組成
+def explain_recommendation_score(
+    source_skill_names: Set[str],
+    item_skill_names: Set[str],
+    source_weights: Optional[SkillWeights] = None,
+    item_weights: Optional[SkillWeights] = None
+) -> Dict[str, List[Dict]]:
+    """
+    依與計分相同的規則列出各標籤的貢獻：
+    - exact: 完全相同的標籤 (貢獻 = 來源權重 x 項目權重，未加權時為 1.0)
+    - fuzzy: 每個未完全比對的來源標籤，相似度 > 0.7 的最佳項目標籤
+    只用於回傳的那一頁 (不在計分迴圈中)，各貢獻的總和即為推薦分數
+    """
+    source_weights = dict(source_weights or ())
+    item_weights = dict(item_weights or ())
+    exact_matches = source_skill_names & item_skill_names
+
+    exact = [
+        {"tag": name, "contribution": item_weights.get(name, 1.0) * source_weights.get(name, 1.0)}
+        for name in sorted(exact_matches)
+    ]
+    fuzzy = []
+    item_fuzzy_tags = sorted(item_skill_names - exact_matches)
+    for s_tag in sorted(source_skill_names - exact_matches):
+        best_match_score, best_match_tag, best_similarity = 0.0, None, 0.0
+        for i_tag in item_fuzzy_tags:
+            similarity = similarity_table.similarity(s_tag, i_tag)
+            if similarity > 0.7 and similarity * item_weights.get(i_tag, 1.0) > best_match_score:
+                best_match_score = similarity * item_weights.get(i_tag, 1.0)
+                best_match_tag, best_similarity = i_tag, similarity
+        if best_match_tag is not None:
+            fuzzy.append({
+                "source_tag": s_tag,
+                "matched_tag": best_match_tag,
+                "similarity": best_similarity,
+                "contribution": best_match_score * source_weights.get(s_tag, 1.0),
+            })
+    return {"exact": exact, "fuzzy": fuzzy}
+
+
+def _get_vectorized_engine(engine: str):
+    """回傳 numpy 引擎模組；未選用或套件未安裝時回傳 None"""
+    if engine != ENGINE_NUMPY:
+        return None
+    # 延遲匯入：numpy / scipy 為選用套件
+    from app.utils import recommender_vectorized
+    if recommender_vectorized.is_available():
+        return recommender_vectorized
+    logger.warning("numpy/scipy 未安裝，改用 python 計分引擎")
+    return None
+
+
+def _score_python(
+    source_skill_names: Set[str],
+    target_items: List[Dict],
+    source_weights: Optional[SkillWeights],
+    positions: List[int],
+    scores: List[float]
+) -> None:
+    """(python 引擎) 逐筆計算分數，依原順序將分數 > 0 的項目位置與分數加入平行陣列"""
+    # (修改) 加權模式另外計算，未加權時維持原本的迴圈 (不增加額外成本)
+    if source_weights is not None or any(item.get("skill_weights") for item in target_items):
+        _score_python_weighted(source_skill_names, target_items, source_weights, positions, scores)
+        return
+
+    for position, item in enumerate(target_items):
         item_skill_names = item.get("skill_names", set())
         if not item_skill_names:
             continue
 
         total_score = 0.0
-        
+
         # 1. (標籤重疊度)
-        exact_matches = source_skill_names.intersection(item_skill_names) # 
-        total_score += len(exact_matches) * 1.0 
-        
+        exact_matches = source_skill_names.intersection(item_skill_names)
+        total_score += len(exact_matches) * 1.0
+
         # 2. (Levenshtein 相似度)
         source_fuzzy_tags = source_skill_names - exact_matches
         item_fuzzy_tags = item_skill_names - exact_matches
 
+        best_match_scores = []
         for s_tag in source_fuzzy_tags:
             best_match_score = 0.0
             for i_tag in item_fuzzy_tags:
-                similarity = _get_string_similarity(s_tag, i_tag)
-                if similarity > 0.7: 
+                similarity = similarity_table.similarity(s_tag, i_tag)
+                if similarity > 0.7:
                     best_match_score = max(best_match_score, similarity)
-            
+
+            best_match_scores.append(best_match_score)
+
+        # (修改) 依分數由小到大累加，讓浮點數結果與集合的迭代順序無關
+        # (numpy 引擎也以相同順序累加，兩者結果完全一致)
+        for best_match_score in sorted(best_match_scores):
             total_score += best_match_score
 
         if total_score > 0:
-            recommendations.append({
-                # (修正) 使用通用的 'item_id' 和 'item_object'
-                "item_id": item.get("item_id"), 
-                "score": total_score,
-                "item_object": item.get("item_object") 
-            })
+            # (修改) 只記錄位置與分數，dict 在排序完成後才為回傳的項目建立
+            positions.append(position)
+            scores.append(total_score)
+
+
+def _score_python_weighted(
+    source_skill_names: Set[str],
+    target_items: List[Dict],
+    source_weights: Optional[SkillWeights],
+    positions: List[int],
+    scores: List[float]
+) -> None:
+    """
+    (修改) 加權模式的 python 引擎；運算與累加順序與 numpy 引擎相同，結果完全一致
+    (完全比對依標籤名稱順序累加，模糊分數由小到大累加)
+
+    來源權重在每次呼叫時只對齊一次；項目權重已是依名稱排序的 SkillWeights，
+    迴圈中不再為每個標籤配對查詢權重，也不為每個項目排序標籤
+    """
+    source_weight_of = dict(source_weights or ())
+    source_pairs = [(name, source_weight_of.get(name, 1.0)) for name in sorted(source_skill_names)]
+
+    for position, item in enumerate(target_items):
+        item_skill_names = item.get("skill_names", set())
+        if not item_skill_names:
+            continue
+        item_pairs = item.get("skill_weights")
+        exact_matches = source_skill_names.intersection(item_skill_names)
+        total_score = 0.0
+
+        # 1. 完全比對：依標籤名稱順序累加 (項目權重 x 來源權重)
+        if exact_matches:
+            if item_pairs:
+                for name, item_weight in item_pairs:
+                    if name in exact_matches:
+                        total_score += item_weight * source_weight_of.get(name, 1.0)
+            else:
+                for name, source_weight in source_pairs:
+                    if name in exact_matches:
+                        total_score += source_weight
+
+        # 2. 模糊比對：每個來源標籤取 max(相似度 x 項目權重)，再乘上來源權重
+        if item_pairs:
+            item_fuzzy_pairs = [pair for pair in item_pairs if pair[0] not in exact_matches]
+        else:
+            item_fuzzy_pairs = [(name, 1.0) for name in item_skill_names - exact_matches]
+
+        best_match_scores = []
+        for s_tag, source_weight in source_pairs:
+            if s_tag in exact_matches:
+                continue
+            best_match_score = 0.0
+            for i_tag, item_weight in item_fuzzy_pairs:
+                similarity = similarity_table.similarity(s_tag, i_tag)
+                if similarity > 0.7:
+                    best_match_score = max(best_match_score, similarity * item_weight)
+            best_match_scores.append(best_match_score * source_weight)
+
+        for best_match_score in sorted(best_match_scores):
+            total_score += best_match_score
+        if total_score > 0:
+            positions.append(position)
+            scores.append(total_score)
+
 
-   # 排序邏輯
-    recommendations.sort(
-        key=lambda x: (
-            x["score"], # 主要排序鍵：推薦分數 (高到低)
-            # 次要排序鍵：信譽分數 (高到低)
-            getattr(x.get("item_object"), 'reputation_score', 0)
-        ),
-        reverse=True # <--- 關鍵在這裡
+def _recommendation_sort_key(x: Dict):
+    return (
+        x["score"], # 主要排序鍵：推薦分數 (高到低)
+        # 次要排序鍵：信譽分數 (高到低)
+        item_reputation(x.get("item_object"))
     )
-    
-    return recommendations
\ No newline at end of file
@@ -0,0 +1,158 @@
+# app/utils/recommender_vectorized.py
+# (新增) 推薦分數的 NumPy / SciPy 批次計分引擎
+#
+# 與 recommender.calculate_recommendation_scores 的逐筆迴圈結果完全一致：
+#   1. 所有目標項目的標籤編碼為 CSR 稀疏矩陣 X (rows = items, cols = 標籤詞彙)
+#   2. 完全重疊數 = X @ s   (s 為來源標籤的 0/1 向量)
+#   3. 模糊分數   = 每個來源標籤在該項目標籤上的 max(相似度矩陣)，
+#      再依分數由小到大累加 (與 python 引擎相同的浮點累加順序)
+#   (新增) 加權模式：X 的值為項目標籤權重、s 為來源標籤權重 (以詞彙欄位對齊的 float 陣列)，
+#      完全比對依來源標籤名稱順序累加，模糊分數為 max(相似度 x 項目權重) x 來源權重
+from typing import Dict, List, Optional, Set, Tuple
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # numpy / scipy 為選用套件
+    np = None
+    sparse = None
+
+from app.utils.recommender import SkillWeights
+from app.utils.tag_similarity import FUZZY_THRESHOLD, similarity_table
+
+
+def is_available() -> bool:
+    return np is not None and sparse is not None
+
+
+def _build_similarity_matrix(source_names: List[str], vocabulary: Dict[str, int]):
+    """
+    建立 (來源標籤 x 詞彙) 的相似度矩陣，只保留相似度 > 門檻的值；
+    來源本身包含的標籤欄位維持 0 (它們只會以完全比對計分)
+    """
+    matrix = np.zeros((len(source_names), len(vocabulary)), dtype=np.float64)
+    source_set = set(source_names)
+    unknown_names = [name for name in vocabulary if name not in similarity_table]
+
+    for row, s_tag in enumerate(source_names):
+        if s_tag in similarity_table:
+            # 已知標籤：只需查相似度表中的鄰居，再補上不在表中的詞彙
+            candidates = [n for n in similarity_table.neighbours(s_tag) if n in vocabulary]
+            candidates.extend(unknown_names)
+        else:
+            candidates = vocabulary.keys()
+        for i_tag in candidates:
+            if i_tag in source_set:
+                continue
+            similarity = similarity_table.similarity(s_tag, i_tag)
+            if similarity > FUZZY_THRESHOLD:
+                matrix[row, vocabulary[i_tag]] = similarity
+    return matrix
+
+
+def score_positions_vectorized(
+    source_skill_names: Set[str],
+    target_items: List[Dict],
+    source_weights: Optional[SkillWeights] = None,
+    k: Optional[int] = None,
+    scored_positions: Optional[List[int]] = None
+) -> Tuple[List[int], List[float], int]:
+    """
+    (新增) 回傳 (項目位置, 分數, 分數 > 0 的項目總數)，位置依原順序排列，不建立 dict
+    k: 只保留分數不低於第 k 名的候選 (包含同分者，由呼叫端做最後的 top-k 排序)
+    scored_positions: (選用) 加入所有分數 > 0 的項目位置 (不受 k 限制)
+    """
+    if not source_skill_names or not target_items:
+        return [], [], 0
+    totals = _score_totals(source_skill_names, target_items, source_weights)
+    positive = np.flatnonzero(totals > 0)
+    total = len(positive)
+    if scored_positions is not None:
+        scored_positions.extend(positive.tolist())
+    if k is not None:
+        if k <= 0 or total == 0:
+            return [], [], total
+        if total > k:
+            kth_score = np.partition(totals[positive], total - k)[total - k]
+            positive = positive[totals[positive] >= kth_score]
+    return positive.tolist(), totals[positive].tolist(), total
+
+
+def _score_totals(
+    source_skill_names: Set[str],
+    target_items: List[Dict],
+    source_weights: Optional[SkillWeights] = None
+):
+    """回傳每個目標項目的總分 (np.ndarray，順序與 target_items 相同)"""
+
+    # 1. 建立詞彙表與 CSR 結構
+    # (修改) 任一項目有 skill_weights 時，CSR 的值為項目標籤權重 (否則為 1.0)；
+    # SkillWeights 已與標籤對齊，直接走訪，不需查詢或排序
+    weighted_items = any(item.get("skill_weights") for item in target_items)
+    weighted = weighted_items or source_weights is not None
+    vocabulary: Dict[str, int] = {}
+    indptr = [0]
+    indices: List[int] = []
+    data: List[float] = []
+    for item in target_items:
+        item_pairs = item.get("skill_weights")
+        if item_pairs:
+            for name, weight in item_pairs:
+                indices.append(vocabulary.setdefault(name, len(vocabulary)))
+                data.append(weight)
+        else:
+            for name in item.get("skill_names", ()):
+                indices.append(vocabulary.setdefault(name, len(vocabulary)))
+                if weighted_items:
+                    data.append(1.0)
+        indptr.append(len(indices))
+
+    source_names = sorted(source_skill_names)
+    source_cols = [vocabulary.setdefault(name, len(vocabulary)) for name in source_names]
+
+    n_items = len(target_items)
+    indptr_arr = np.asarray(indptr, dtype=np.int64)
+    indices_arr = np.asarray(indices, dtype=np.int64)
+    data_arr = (
+        np.asarray(data, dtype=np.float64) if weighted_items
+        else np.ones(len(indices_arr), dtype=np.float64)
+    )
+    item_matrix = sparse.csr_matrix(
+        (data_arr, indices_arr, indptr_arr),
+        shape=(n_items, len(vocabulary))
+    )
+
+    # 2. 完全重疊
+    # 項目在來源標籤欄位上的值 (項目權重；未包含該標籤時為 0)，欄位依來源標籤名稱排序
+    source_block = item_matrix[:, source_cols].toarray()
+    if weighted:
+        # (修改) 加權模式：來源權重為與來源欄位對齊的陣列，依標籤名稱順序累加 (與 python 引擎相同)
+        weight_of = dict(source_weights or ())
+        source_row_weights = np.asarray(
+            [weight_of.get(name, 1.0) for name in source_names], dtype=np.float64
+        )
+        exact_scores = np.cumsum(source_block * source_row_weights, axis=1)[:, -1]
+    else:
+        exact_scores = source_block.sum(axis=1)
+
+    # 3. 模糊分數：每個 (項目, 來源標籤) 取項目標籤上的最大相似度
+    fuzzy_scores = np.zeros((n_items, len(source_names)), dtype=np.float64)
+    if len(indices_arr):
+        similarity_matrix = _build_similarity_matrix(source_names, vocabulary)
+        if similarity_matrix.any():
+            gathered = similarity_matrix[:, indices_arr]  # (來源標籤, nnz)
+            if weighted_items:
+                gathered = gathered * data_arr
+            non_empty = np.flatnonzero(np.diff(indptr_arr))
+            row_max = np.maximum.reduceat(gathered, indptr_arr[non_empty], axis=1)
+            fuzzy_scores[non_empty] = row_max.T
+            if source_weights is not None:
+                fuzzy_scores *= source_row_weights
+            # 項目本身已包含的來源標籤屬於完全比對，不再計入模糊分數
+            fuzzy_scores[source_block != 0] = 0.0
+
+    # 4. 與 python 引擎相同：完全重疊數 + 由小到大依序累加模糊分數
+    fuzzy_scores.sort(axis=1)
+    return np.cumsum(
+        np.concatenate([exact_scores[:, None], fuzzy_scores], axis=1), axis=1
+    )[:, -1]
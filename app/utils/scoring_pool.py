@@ -0,0 +1,202 @@
+# app/utils/scoring_pool.py
+# (新增) 將推薦計分丟到 ProcessPoolExecutor 執行，避免 CPU 密集的計分阻塞 event loop
+#
+# 傳給子 process 的是精簡、可 pickle 的 payload (ID、標籤編號、信譽分數)，
+# 而不是 ORM 物件；子 process 回傳 (項目位置, 分數)，由主 process 對回原本的物件。
+# 候選項目數量低於門檻時直接在目前的 process 計分 (省下序列化成本)。
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.utils.recommendation_metrics import recommendation_metrics
+from app.utils.recommender import (
+    ENGINE_PYTHON, SkillWeights, target_reputation, score_items, select_top_recommendations
+)
+from app.utils.tag_similarity import similarity_table
+
+logger = logging.getLogger(__name__)
+
+
+def _build_payload(source_skill_names: Set[str], target_items: List[Dict], k: int, engine: str,
+                   source_weights: Optional[SkillWeights] = None) -> Dict:
+    """將候選項目轉為精簡的 payload：標籤以詞彙表編號表示 (權重為與標籤對齊的 tuple)"""
+    vocabulary: Dict[str, int] = {}
+    item_tags = []
+    item_weights = []
+    reputations = []
+    for item in target_items:
+        item_pairs = item.get("skill_weights")
+        if item_pairs:
+            item_tags.append(tuple(vocabulary.setdefault(name, len(vocabulary)) for name, _ in item_pairs))
+            item_weights.append(tuple(weight for _, weight in item_pairs))
+        else:
+            names = item.get("skill_names", ())
+            item_tags.append(tuple(vocabulary.setdefault(name, len(vocabulary)) for name in names))
+            item_weights.append(None)
+        reputations.append(target_reputation(item))
+
+    source_names = sorted(source_skill_names)
+    known_names, pairs = similarity_table.subset(source_names, vocabulary)
+    return {
+        "vocabulary": list(vocabulary),
+        "source_names": source_names,
+        "item_tags": item_tags,
+        "item_weights": item_weights,
+        "source_weights": source_weights,
+        "reputations": reputations,
+        "similarity_names": known_names,
+        "similarity_pairs": pairs,
+        "k": k,
+        "engine": engine,
+    }
+
+
+def _score_payload(payload: Dict,
+                   scored_positions: Optional[List[int]] = None) -> Tuple[List[Tuple[int, float]], int]:
+    """
+    (在子 process 執行) 計分並回傳 ([(項目位置, 分數)], total)
+    scored_positions: (選用) 加入所有分數 > 0 的項目位置
+    """
+    similarity_table.load_subset(payload["similarity_names"], payload["similarity_pairs"])
+
+    vocabulary = payload["vocabulary"]
+    target_items = []
+    for tags, weights, reputation in zip(payload["item_tags"], payload["item_weights"], payload["reputations"]):
+        # (修改) 信譽分數直接以 float 提供，不再包成 item_object
+        item = {"skill_names": {vocabulary[tag] for tag in tags}, "reputation": reputation}
+        if weights is not None:
+            item["skill_weights"] = tuple((vocabulary[tag], weight) for tag, weight in zip(tags, weights))
+        target_items.append(item)
+    k = max(payload["k"], 0)
+    scored = score_items(
+        set(payload["source_names"]), target_items, payload["engine"], payload["source_weights"], k=k,
+        scored_positions=scored_positions
+    )
+    return [(scored.positions[index], scored.scores[index]) for index in scored.order(k)], scored.total
+
+
+def _similarity_lookups() -> int:
+    return similarity_table.hits + similarity_table.misses
+
+
+# (新增) 子 process 另外回傳相似度查詢次數 (模糊比對次數指標)，
+# 以及 (需要時) 所有分數 > 0 的項目位置
+def _score_payload_counted(
+    payload: Dict, with_scored_positions: bool = False
+) -> Tuple[List[Tuple[int, float]], int, int, Optional[List[int]]]:
+    before = _similarity_lookups()
+    scored_positions = [] if with_scored_positions else None
+    ranked, total = _score_payload(payload, scored_positions)
+    return ranked, total, _similarity_lookups() - before, scored_positions
+
+
+# (新增) 預熱：子 process 匯入計分模組 (spawn 的啟動成本不落在第一個請求上)
+def _warm_worker() -> int:
+    return os.getpid()
+
+
+class ScoringPool:
+    def __init__(self, max_workers: int = 0, inline_threshold: int = 5000):
+        # max_workers = 0 表示停用 process pool，一律在目前的 process 計分
+        self.max_workers = max_workers
+        self.inline_threshold = inline_threshold
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # 指標：等待中 / 已送出 / 直接計分 的次數
+        self.pending = 0
+        self.submitted = 0
+        self.inline = 0
+
+    def configure(self, max_workers: int, inline_threshold: int) -> None:
+        self.max_workers = max_workers
+        self.inline_threshold = inline_threshold
+
+    async def select_top(
+        self,
+        source_skill_names: Set[str],
+        target_items: List[Dict],
+        k: int,
+        engine: str = ENGINE_PYTHON,
+        source_weights: Optional[SkillWeights] = None,
+        scored_ids: Optional[List] = None
+    ) -> Tuple[List[Dict], int]:
+        """
+        與 select_top_recommendations 相同的回傳格式 (scored_ids 亦同)；
+        候選項目數量達門檻時在 process pool 中計分
+        """
+        if self.max_workers <= 0 or len(target_items) < self.inline_threshold:
+            self.inline += 1
+            before = _similarity_lookups()
+            result = select_top_recommendations(
+                source_skill_names, target_items, k, engine=engine, source_weights=source_weights,
+                scored_ids=scored_ids
+            )
+            recommendation_metrics.count("fuzzy_comparisons", _similarity_lookups() - before)
+            return result
+
+        # 逐筆整理候選項目與取出相似度子表是 O(n)，也移出 event loop (子 process 沒有相似度表)
+        payload = await asyncio.to_thread(
+            _build_payload, source_skill_names, target_items, k, engine, source_weights
+        )
+        loop = asyncio.get_running_loop()
+        self.pending += 1
+        self.submitted += 1
+        try:
+            ranked, total, comparisons, scored_positions = await loop.run_in_executor(
+                self._get_executor(), _score_payload_counted, payload, scored_ids is not None
+            )
+        finally:
+            self.pending -= 1
+        recommendation_metrics.count("fuzzy_comparisons", comparisons)
+        if scored_ids is not None:
+            scored_ids.extend(target_items[position].get("item_id") for position in scored_positions)
+
+        top = [
+            {
+                "item_id": target_items[position].get("item_id"),
+                "score": score,
+                "item_object": target_items[position].get("item_object")
+            }
+            for position, score in ranked
+        ]
+        return top, total
+
+    async def warm_up(self) -> int:
+        """(新增) 預先啟動所有子 process；回傳已啟動的 process 數 (停用時為 0)"""
+        if self.max_workers <= 0:
+            return 0
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        pids = await asyncio.gather(*(
+            loop.run_in_executor(executor, _warm_worker) for _ in range(self.max_workers)
+        ))
+        return len(set(pids))
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "max_workers": self.max_workers,
+            "queue_depth": self.pending,
+            "submitted": self.submitted,
+            "inline": self.inline,
+        }
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # 使用 spawn：子 process 不繼承 event loop 與資料庫連線
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            logger.info(f"Recommendation scoring pool started with {self.max_workers} workers")
+        return self._executor
+
+
+# 實例化計分 pool (全域單例)
+scoring_pool = ScoringPool()
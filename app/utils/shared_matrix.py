@@ -0,0 +1,346 @@
+# app/utils/shared_matrix.py
+# (新增) 多個 uvicorn worker 共用的推薦資料 (memory-mapped 檔案)
+#
+# 每個 worker 原本各自從資料庫載入標籤倒排索引、各自建立標籤相似度表。
+# 啟用 RECOMMENDER_SHARED_MATRIX_DIR 後，由其中一個 worker 建立以下陣列並寫入磁碟，
+# 所有 worker 以唯讀 mmap 對應同一份檔案 (作業系統的 page cache 只保存一份)：
+#   vocabulary                        標籤詞彙表 (小寫、排序)
+#   sim_indptr / sim_indices / sim_values
+#                                     相似度表 (詞彙 x 詞彙 的 CSR，只保存相似度 > 門檻的配對)
+#   {kind}_ids / {kind}_indptr / {kind}_indices
+#                                     項目 -> 標籤 的 CSR (kind = project / profile)
+#   {kind}_postings_indptr / {kind}_postings
+#                                     標籤 -> 項目 的倒排 (上面 CSR 的轉置，用於候選查詢)
+#
+# 目錄結構：
+#   <dir>/gen-00000012-<pid>/*.npy, meta.json   每一代 (generation) 一個目錄，寫完才改名
+#   <dir>/CURRENT                               目前的代目錄名稱 (以 os.replace 原子替換)
+#   <dir>/publish.lock                          建立新一代時的跨 process 鎖 (fcntl)
+# 讀取端只會看到完整寫入的一代；舊的代目錄刪除後，已對應的 mmap 仍可繼續使用。
+import hashlib
+import json
+import os
+import shutil
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy 為選用套件
+    np = None
+
+try:
+    import fcntl
+except ImportError:  # 非 POSIX 平台：不使用跨 process 鎖 (每一代的目錄名稱仍不會衝突)
+    fcntl = None
+
+from app.utils.tag_similarity import TagSimilarityTable
+
+KIND_PROJECT = "project"
+KIND_PROFILE = "profile"
+_KINDS = (KIND_PROJECT, KIND_PROFILE)
+
+_CURRENT_FILE = "CURRENT"
+_LOCK_FILE = "publish.lock"
+_META_FILE = "meta.json"
+# 已被取代的代目錄保留幾個 (剛切換時其他 worker 可能仍在開啟中)
+_KEEP_GENERATIONS = 2
+
+
+def is_available() -> bool:
+    return np is not None
+
+
+def vocabulary_digest(vocabulary: Iterable[str]) -> str:
+    """詞彙表的指紋：相同詞彙表的相似度表必定相同"""
+    return hashlib.sha1("\x1f".join(vocabulary).encode("utf-8")).hexdigest()
+
+
+class _SimilarityRows:
+    """
+    以 TagSimilarityTable._pairs 相同的介面 ({名稱: {相似名稱: 相似度}}.get) 讀取共用的相似度 CSR；
+    每個標籤第一次被查詢時才轉為 dict (只有實際使用到的標籤佔用 worker 本身的記憶體)
+    """
+
+    def __init__(self, matrix: "SharedMatrix"):
+        self._matrix = matrix
+        self._rows: Dict[str, Dict[str, float]] = {}
+
+    def get(self, name: str, default=None):
+        row = self._rows.get(name)
+        if row is None:
+            index = self._matrix.vocabulary_index.get(name)
+            if index is None:
+                return default
+            row = self._rows[name] = self._matrix.similarity_row(index)
+        return row
+
+
+class SharedMatrix:
+    """一代已發布的共用資料 (所有陣列皆為唯讀 mmap)"""
+
+    def __init__(self, path: str, meta: Dict, arrays: Dict[str, "np.ndarray"]):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.generation: int = meta["generation"]
+        self.built_at: float = meta["built_at"]
+        self.vocabulary_digest: str = meta["vocabulary_digest"]
+        self._arrays = arrays
+
+        # 詞彙表很小，在每個 worker 建立 名稱 -> 編號 的 dict；大量的 CSR 資料維持在 mmap 中
+        self.vocabulary: List[str] = arrays["vocabulary"].tolist()
+        self.vocabulary_index: Dict[str, int] = {name: i for i, name in enumerate(self.vocabulary)}
+        self.similarity_rows = _SimilarityRows(self)
+        self.pair_count = len(arrays["sim_indices"]) // 2
+        # 至少有一個項目使用的標籤名稱 (SkillTagIndex.vocabulary() 用)
+        self.used_tag_names: Dict[str, Set[str]] = {}
+        for kind in _KINDS:
+            counts = np.diff(arrays[f"{kind}_postings_indptr"])
+            self.used_tag_names[kind] = {self.vocabulary[i] for i in np.flatnonzero(counts).tolist()}
+
+    def age_seconds(self) -> float:
+        return max(time.time() - self.built_at, 0.0)
+
+    def similarity_row(self, index: int) -> Dict[str, float]:
+        indptr = self._arrays["sim_indptr"]
+        start, end = int(indptr[index]), int(indptr[index + 1])
+        names = self._arrays["sim_indices"][start:end].tolist()
+        values = self._arrays["sim_values"][start:end].tolist()
+        return {self.vocabulary[i]: value for i, value in zip(names, values)}
+
+    def items_for_tag(self, kind: str, name: str) -> List[str]:
+        """使用此標籤的項目 ID"""
+        index = self.vocabulary_index.get(name)
+        if index is None:
+            return []
+        indptr = self._arrays[f"{kind}_postings_indptr"]
+        rows = self._arrays[f"{kind}_postings"][int(indptr[index]): int(indptr[index + 1])]
+        return self._arrays[f"{kind}_ids"][rows].tolist()
+
+    def iter_item_tags(self, kind: str) -> Iterator[Tuple[str, Set[str]]]:
+        """依序走訪 (項目 ID, 標籤名稱集合)"""
+        ids = self._arrays[f"{kind}_ids"]
+        indptr = self._arrays[f"{kind}_indptr"]
+        indices = self._arrays[f"{kind}_indices"]
+        for row, item_id in enumerate(ids.tolist()):
+            tags = indices[int(indptr[row]): int(indptr[row + 1])].tolist()
+            yield item_id, {self.vocabulary[i] for i in tags}
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "generation": self.generation,
+            "vocabulary_size": len(self.vocabulary),
+            "pairs": self.pair_count,
+            "projects": len(self._arrays[f"{KIND_PROJECT}_ids"]),
+            "profiles": len(self._arrays[f"{KIND_PROFILE}_ids"]),
+        }
+
+
+def _item_arrays(kind: str, pairs: Iterable[Tuple[str, str]], vocabulary_index: Dict[str, int]) -> Dict:
+    """(item_id, tag name) 配對 -> 項目 -> 標籤 的 CSR 與其轉置 (標籤 -> 項目)"""
+    tags_by_item: Dict[str, Set[int]] = {}
+    for item_id, name in pairs:
+        if name:
+            tags_by_item.setdefault(item_id, set()).add(vocabulary_index[name.lower()])
+
+    item_ids = sorted(tags_by_item)
+    indptr = [0]
+    indices: List[int] = []
+    for item_id in item_ids:
+        indices.extend(sorted(tags_by_item[item_id]))
+        indptr.append(len(indices))
+
+    indices_arr = np.asarray(indices, dtype=np.int32)
+    rows = np.repeat(np.arange(len(item_ids), dtype=np.int32), np.diff(indptr))
+    order = np.argsort(indices_arr, kind="stable")
+    postings_indptr = np.zeros(len(vocabulary_index) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(indices_arr, minlength=len(vocabulary_index)), out=postings_indptr[1:])
+    return {
+        f"{kind}_ids": np.asarray(item_ids, dtype=str) if item_ids else np.zeros(0, dtype="U1"),
+        f"{kind}_indptr": np.asarray(indptr, dtype=np.int64),
+        f"{kind}_indices": indices_arr,
+        f"{kind}_postings_indptr": postings_indptr,
+        f"{kind}_postings": rows[order],
+    }
+
+
+def build_arrays(
+    tag_names: Iterable[str],
+    project_tag_pairs: Iterable[Tuple[str, str]],
+    profile_tag_pairs: Iterable[Tuple[str, str]],
+) -> Dict[str, "np.ndarray"]:
+    """由資料庫的標籤詞彙與 (item_id, tag name) 配對建立所有共用陣列"""
+    project_tag_pairs = list(project_tag_pairs)
+    profile_tag_pairs = list(profile_tag_pairs)
+    names = {name.lower() for name in tag_names if name}
+    names.update(name.lower() for _, name in project_tag_pairs if name)
+    names.update(name.lower() for _, name in profile_tag_pairs if name)
+    vocabulary = sorted(names)
+    vocabulary_index = {name: i for i, name in enumerate(vocabulary)}
+
+    # 相似度表沿用 TagSimilarityTable 的建表方式 (BK-tree)，結果與各 worker 自行建表相同
+    table = TagSimilarityTable()
+    table.build(vocabulary)
+    sim_indptr = [0]
+    sim_indices: List[int] = []
+    sim_values: List[float] = []
+    for name in vocabulary:
+        for other, similarity in sorted(table.neighbours(name).items(), key=lambda kv: vocabulary_index[kv[0]]):
+            sim_indices.append(vocabulary_index[other])
+            sim_values.append(similarity)
+        sim_indptr.append(len(sim_indices))
+
+    arrays = {
+        "vocabulary": np.asarray(vocabulary, dtype=str) if vocabulary else np.zeros(0, dtype="U1"),
+        "sim_indptr": np.asarray(sim_indptr, dtype=np.int64),
+        "sim_indices": np.asarray(sim_indices, dtype=np.int32),
+        "sim_values": np.asarray(sim_values, dtype=np.float64),
+    }
+    arrays.update(_item_arrays(KIND_PROJECT, project_tag_pairs, vocabulary_index))
+    arrays.update(_item_arrays(KIND_PROFILE, profile_tag_pairs, vocabulary_index))
+    return arrays
+
+
+class SharedMatrixStore:
+    """管理磁碟上的共用資料：發布新的一代、開啟 (mmap) 最新的一代"""
+
+    def __init__(self, directory: Optional[str] = None, poll_seconds: float = 1.0):
+        self.directory = directory
+        # 兩次檢查 CURRENT 檔案的最短間隔 (避免每個請求都讀檔)
+        self.poll_seconds = poll_seconds
+        # 此 worker 目前使用中的一代
+        self.current: Optional[SharedMatrix] = None
+        self._checked_at = 0.0
+        self._lock_fd: Optional[int] = None
+        self.published = 0
+        self.opened = 0
+
+    def configure(self, directory: Optional[str]) -> None:
+        self.directory = directory or None
+        self.current = None
+        self._checked_at = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.directory) and is_available()
+
+    # --- 讀取 ---
+
+    def has_newer(self) -> bool:
+        """(節流) 磁碟上是否已有與目前使用中不同的一代"""
+        now = time.monotonic()
+        if self.current is not None and now - self._checked_at < self.poll_seconds:
+            return False
+        self._checked_at = now
+        name = self._read_current_name()
+        return name is not None and (self.current is None or name != self.current.name)
+
+    def open_latest(self) -> Optional[SharedMatrix]:
+        """開啟 CURRENT 指向的一代 (與使用中的相同則直接回傳)；尚未發布時回傳 None"""
+        name = self._read_current_name()
+        if name is None:
+            return None
+        if self.current is not None and self.current.name == name:
+            return self.current
+        path = os.path.join(self.directory, name)
+        try:
+            with open(os.path.join(path, _META_FILE), encoding="utf-8") as f:
+                meta = json.load(f)
+            arrays = {
+                filename[:-4]: np.load(os.path.join(path, filename), mmap_mode="r")
+                for filename in os.listdir(path) if filename.endswith(".npy")
+            }
+        except FileNotFoundError:
+            return None  # 讀取期間已被更新的一代取代並刪除；下次再開啟
+        self.current = SharedMatrix(path, meta, arrays)
+        self._checked_at = time.monotonic()
+        self.opened += 1
+        return self.current
+
+    def _read_current_name(self) -> Optional[str]:
+        try:
+            with open(os.path.join(self.directory, _CURRENT_FILE), encoding="utf-8") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    # --- 發布 ---
+
+    def try_acquire_publish_lock(self) -> bool:
+        """(非阻塞) 取得發布鎖；其他 process 正在建立新的一代時回傳 False"""
+        os.makedirs(self.directory, exist_ok=True)
+        if fcntl is None:
+            return True
+        fd = os.open(os.path.join(self.directory, _LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    def release_publish_lock(self) -> None:
+        if self._lock_fd is not None:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def publish(
+        self,
+        tag_names: Iterable[str],
+        project_tag_pairs: Iterable[Tuple[str, str]],
+        profile_tag_pairs: Iterable[Tuple[str, str]],
+    ) -> SharedMatrix:
+        """建立並發布新的一代，回傳已開啟的 SharedMatrix (呼叫端應持有發布鎖)"""
+        arrays = build_arrays(tag_names, project_tag_pairs, profile_tag_pairs)
+        latest = self.open_latest()
+        generation = (latest.generation if latest is not None else 0) + 1
+        meta = {
+            "generation": generation,
+            "built_at": time.time(),
+            "vocabulary_digest": vocabulary_digest(arrays["vocabulary"].tolist()),
+        }
+
+        # 1. 寫入暫存目錄，完成後改名 (讀取端看不到寫到一半的檔案)
+        name = f"gen-{generation:08d}-{os.getpid()}"
+        tmp_path = os.path.join(self.directory, f".{name}.tmp")
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        for key, array in arrays.items():
+            np.save(os.path.join(tmp_path, f"{key}.npy"), array)
+        with open(os.path.join(tmp_path, _META_FILE), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.rename(tmp_path, os.path.join(self.directory, name))
+
+        # 2. 原子替換 CURRENT 指標
+        pointer_tmp = os.path.join(self.directory, f".{_CURRENT_FILE}.{os.getpid()}.tmp")
+        with open(pointer_tmp, "w", encoding="utf-8") as f:
+            f.write(name)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(pointer_tmp, os.path.join(self.directory, _CURRENT_FILE))
+        self.published += 1
+
+        self._remove_old_generations(name)
+        return self.open_latest()
+
+    def _remove_old_generations(self, current_name: str) -> None:
+        generations = sorted(
+            entry for entry in os.listdir(self.directory)
+            if entry.startswith("gen-") and entry != current_name
+        )
+        for entry in generations[: max(len(generations) - (_KEEP_GENERATIONS - 1), 0)]:
+            shutil.rmtree(os.path.join(self.directory, entry), ignore_errors=True)
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "generation": self.current.generation if self.current is not None else None,
+            "published": self.published,
+            "opened": self.opened,
+        }
+
+
+# 實例化共用資料儲存 (全域單例；目錄由 RecommendationService 依設定指定)
+shared_matrix_store = SharedMatrixStore()
@@ -0,0 +1,235 @@
+# app/utils/tag_index.py
+# (新增) 推薦系統用的技能標籤倒排索引 (Inverted Index)
+#
+# 結構：
+#   tag name (小寫) -> {project_id, ...}   (僅索引 '招募中' 案件)
+#   tag name (小寫) -> {profile_id, ...}   (僅索引 '公開' 工作者)
+#
+# 推薦時只需取出「與來源技能有完全相同或模糊相近標籤」的候選項目來計分，
+# 不必對所有案件 / 工作者逐一跑 calculate_recommendation_scores。
+#
+# (新增) 共用模式 (load_shared)：倒排索引改由多個 worker 共用的 mmap 檔案提供，
+# 本身的 dict 只保存載入後有異動的項目 (overlay)，查詢時兩者合併。
+import time
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from app.utils.tag_similarity import FUZZY_THRESHOLD, similarity_table
+
+
+class SkillTagIndex:
+    """技能標籤 -> 案件 / 工作者 的記憶體倒排索引"""
+
+    def __init__(self):
+        # 正向：item -> 標籤名稱集合 (用於更新時移除舊的倒排紀錄)
+        self.project_tags: Dict[str, Set[str]] = {}
+        self.profile_tags: Dict[str, Set[str]] = {}
+        # 倒排：標籤名稱 -> item 集合
+        self.tag_projects: Dict[str, Set[str]] = {}
+        self.tag_profiles: Dict[str, Set[str]] = {}
+        # 最後一次從資料庫完整載入的時間 (None 表示尚未載入)
+        self.loaded_at: Optional[float] = None
+        # (新增) 共用的 mmap 索引 (app.utils.shared_matrix.SharedMatrix，None 表示未使用)
+        # 載入後有異動的項目記錄在 _shadowed_*，查詢時忽略其在共用索引中的舊紀錄
+        self._shared = None
+        self._shadowed_projects: Set[str] = set()
+        self._shadowed_profiles: Set[str] = set()
+        # (新增) 使用中但不在相似度表中的標籤名稱 (模糊查詢時需即時計算)；
+        # 索引異動時增量維護，相似度表替換 (version 改變) 時才完整重算
+        self._unknown_names: Set[str] = set()
+        self._unknown_version: Optional[int] = None
+
+    # --- 載入 / 狀態 ---
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    def is_stale(self, max_age_seconds: float) -> bool:
+        """索引是否尚未載入或已超過重新載入的期限"""
+        if self.loaded_at is None:
+            return True
+        return (time.monotonic() - self.loaded_at) > max_age_seconds
+
+    def load(
+        self,
+        project_tag_pairs: Iterable[Tuple[str, str]],
+        profile_tag_pairs: Iterable[Tuple[str, str]],
+    ) -> None:
+        """以 (item_id, tag_name) 配對完整重建索引"""
+        self._clear()
+
+        for project_id, tag_name in project_tag_pairs:
+            self._add(self.project_tags, self.tag_projects, project_id, {tag_name.lower()})
+        for profile_id, tag_name in profile_tag_pairs:
+            self._add(self.profile_tags, self.tag_profiles, profile_id, {tag_name.lower()})
+
+        self.loaded_at = time.monotonic()
+
+    # (新增) 改為使用共用的 mmap 索引
+    def load_shared(self, matrix) -> None:
+        """以共用資料取代整個索引；載入時間以該資料的建立時間計算 (決定何時過期)"""
+        self._clear()
+        self._shared = matrix
+        self.loaded_at = time.monotonic() - matrix.age_seconds()
+
+    def _clear(self) -> None:
+        self.project_tags.clear()
+        self.profile_tags.clear()
+        self.tag_projects.clear()
+        self.tag_profiles.clear()
+        self._shared = None
+        self._shadowed_projects.clear()
+        self._shadowed_profiles.clear()
+        self._unknown_names = set()
+        self._unknown_version = None
+
+    # --- 增量維護 ---
+
+    def set_project_tags(self, project_id: str, tag_names: Iterable[str]) -> None:
+        self._shadow(self._shadowed_projects, project_id)
+        self._replace(self.project_tags, self.tag_projects, project_id, tag_names)
+
+    def remove_project(self, project_id: str) -> None:
+        self._shadow(self._shadowed_projects, project_id)
+        self._remove(self.project_tags, self.tag_projects, project_id)
+
+    def set_profile_tags(self, profile_id: str, tag_names: Iterable[str]) -> None:
+        self._shadow(self._shadowed_profiles, profile_id)
+        self._replace(self.profile_tags, self.tag_profiles, profile_id, tag_names)
+
+    def remove_profile(self, profile_id: str) -> None:
+        self._shadow(self._shadowed_profiles, profile_id)
+        self._remove(self.profile_tags, self.tag_profiles, profile_id)
+
+    def _shadow(self, shadowed: Set[str], item_id: str) -> None:
+        if self._shared is not None:
+            shadowed.add(item_id)
+
+    # --- 查詢 ---
+
+    def vocabulary(self) -> Set[str]:
+        """目前被任何 item 使用中的標籤名稱"""
+        names = set(self.tag_projects) | set(self.tag_profiles)
+        if self._shared is not None:
+            names |= self._shared.used_tag_names["project"]
+            names |= self._shared.used_tag_names["profile"]
+        return names
+
+    def in_vocabulary(self, tag_name: str) -> bool:
+        """(新增) 標籤是否被任何 item 使用中 (O(1)，不建立整個詞彙表)"""
+        if tag_name in self.tag_projects or tag_name in self.tag_profiles:
+            return True
+        return self._shared is not None and (
+            tag_name in self._shared.used_tag_names["project"]
+            or tag_name in self._shared.used_tag_names["profile"]
+        )
+
+    def fuzzy_neighbours(self, tag_names: Set[str]) -> Set[str]:
+        """
+        回傳與來源標籤「完全相同」或「相似度 > 0.7」的所有已索引標籤名稱
+        """
+        neighbours: Set[str] = {name for name in tag_names if self.in_vocabulary(name)}
+
+        # (修改) 相似度表 (BK-tree) 查出表中的相似標籤；
+        # 只有不在表中的詞彙 (例如表尚未重建) 才退回即時計算
+        unknown_names = self._unknown_vocabulary()
+        for tag_name in tag_names:
+            neighbours.update(n for n in similarity_table.search(tag_name) if self.in_vocabulary(n))
+            for vocab_name in unknown_names - neighbours:
+                if similarity_table.similarity(tag_name, vocab_name) > FUZZY_THRESHOLD:
+                    neighbours.add(vocab_name)
+        return neighbours
+
+    def candidate_projects(self, tag_names: Set[str]) -> Set[str]:
+        """與來源技能至少共享一個 (完全 / 模糊) 標籤的案件 ID"""
+        return self._candidates(self.tag_projects, tag_names, "project", self._shadowed_projects)
+
+    def candidate_profiles(self, tag_names: Set[str]) -> Set[str]:
+        """與來源技能至少共享一個 (完全 / 模糊) 標籤的工作者 Profile ID"""
+        return self._candidates(self.tag_profiles, tag_names, "profile", self._shadowed_profiles)
+
+    # --- 內部輔助 ---
+
+    def _unknown_vocabulary(self) -> Set[str]:
+        """使用中但不在相似度表中的標籤；只有相似度表替換後才重新掃描整個詞彙表"""
+        if self._unknown_version != similarity_table.version:
+            self._unknown_names = {name for name in self.vocabulary() if name not in similarity_table}
+            self._unknown_version = similarity_table.version
+        return self._unknown_names
+
+    def _name_added(self, tag_name: str) -> None:
+        if self._unknown_version is not None and tag_name not in similarity_table:
+            self._unknown_names.add(tag_name)
+
+    def _name_removed(self, tag_name: str) -> None:
+        if not self.in_vocabulary(tag_name):
+            self._unknown_names.discard(tag_name)
+
+    def _candidates(self, postings: Dict[str, Set[str]], tag_names: Set[str],
+                    kind: str, shadowed: Set[str]) -> Set[str]:
+        candidates: Set[str] = set()
+        for name in self.fuzzy_neighbours(tag_names):
+            candidates |= postings.get(name, set())
+            if self._shared is not None:
+                candidates.update(
+                    item_id for item_id in self._shared.items_for_tag(kind, name)
+                    if item_id not in shadowed
+                )
+        return candidates
+
+    def _add(self, forward, inverted, item_id: str, tag_names: Set[str]) -> None:
+        forward.setdefault(item_id, set()).update(tag_names)
+        for name in tag_names:
+            items = inverted.get(name)
+            if items is None:
+                items = inverted[name] = set()
+                self._name_added(name)
+            items.add(item_id)
+
+    def _replace(self, forward, inverted, item_id: str, tag_names: Iterable[str]) -> None:
+        self._remove(forward, inverted, item_id)
+        names = {name.lower() for name in tag_names if name}
+        if names:
+            self._add(forward, inverted, item_id, names)
+
+    def _remove(self, forward, inverted, item_id: str) -> None:
+        for name in forward.pop(item_id, set()):
+            items = inverted.get(name)
+            if items is None:
+                continue
+            items.discard(item_id)
+            if not items:
+                del inverted[name]
+                self._name_removed(name)
+
+
+# --- ORM 同步輔助 (供 Repository / Service 在資料異動後呼叫) ---
+
+def sync_project(project) -> None:
+    """依案件目前的狀態與技能同步索引 (只有 '招募中' 案件會被索引)"""
+    if not tag_index.is_loaded:
+        return  # 尚未載入：下次完整載入時會直接從資料庫取得最新狀態
+    if project.status != '招募中':
+        tag_index.remove_project(project.project_id)
+        return
+    tag_index.set_project_tags(
+        project.project_id,
+        [skill.tag.name for skill in project.skills if skill.tag]
+    )
+
+
+def sync_profile(profile) -> None:
+    """依工作者 Profile 目前的公開狀態與技能同步索引 (只有 '公開' Profile 會被索引)"""
+    if not tag_index.is_loaded:
+        return
+    if profile.visibility != '公開':
+        tag_index.remove_profile(profile.profile_id)
+        return
+    tag_index.set_profile_tags(
+        profile.profile_id,
+        [skill.tag.name for skill in profile.skills if skill.tag]
+    )
+
+
+# 實例化索引 (全域單例)
+tag_index = SkillTagIndex()
@@ -0,0 +1,195 @@
+# app/utils/tag_similarity.py
+# (新增) 技能標籤之間的模糊相似度預先計算表
+#
+# skill_tags 詞彙量小且很少變動，因此在啟動時 (以及 SkillTag 異動後)
+# 一次算好所有「相似度 > 0.7」的標籤配對，推薦時的模糊比對只需查表，
+# 不必在每個請求中重複計算 Levenshtein 距離。
+#
+# (新增) 詞彙表同時建立 BK-tree，建表與「不在詞彙表中的標籤」的模糊查詢
+# 只需走訪樹的一小部分，不必與所有標籤兩兩比較。
+#
+# (新增) 多 worker 部署時可改為讀取共用的 mmap 相似度表 (attach_shared)，不必各自建表。
+import Levenshtein
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from app.utils.bk_tree import BKTree
+
+# 與 calculate_recommendation_scores 中的模糊比對門檻保持一致
+FUZZY_THRESHOLD = 0.7
+
+
+# (輔助函式) 取得兩個字串的 Levenshtein 相似度 (0.0 ~ 1.0)
+def _get_string_similarity(s1: str, s2: str) -> float:
+    # Levenshtein.distance 算出的是 "編輯距離" (差多少)
+    # 我們將其標準化為 "相似度" (0.0 ~ 1.0)
+    # 1.0 表示完全相同
+    if not s1 or not s2:
+        return 0.0
+    distance = Levenshtein.distance(s1.lower(), s2.lower())
+    max_len = max(len(s1), len(s2))
+    # 避免除以零，以及如果兩個字串都是空的，視為完全相似
+    if max_len == 0:
+        return 1.0
+    return 1.0 - (distance / max_len)
+
+
+# (新增) 相似度 > 0.7 的必要條件：編輯距離 d < 0.3 * max(len1, len2)，
+# 且 d >= |len1 - len2|，因此 max(len1, len2) < len / 0.7，d < 3 * len / 7
+def _max_fuzzy_distance(length: int) -> int:
+    """長度為 length 的字串，相似度可能 > 門檻的最大編輯距離"""
+    return (3 * length - 1) // 7
+
+
+class TagSimilarityTable:
+    """
+    稀疏的標籤相似度表：只保存相似度 > 門檻的配對
+
+    查詢時若兩個標籤都在詞彙表中即為命中 (hit)，直接查表；
+    否則視為未命中 (miss)，退回即時計算 Levenshtein。
+    """
+
+    def __init__(self):
+        # 結構: {tag name: {相似的 tag name: similarity}}
+        self._pairs: Dict[str, Dict[str, float]] = {}
+        self._vocabulary: Set[str] = set()
+        # (修改) 共用模式下，第一次查詢不在詞彙表中的標籤時才建立
+        self._tree: Optional[BKTree] = BKTree()
+        self._pair_count = 0
+        # (新增) 共用模式下為共用資料的詞彙表指紋 (自行建表時為 None)
+        self.vocabulary_digest: Optional[str] = None
+        self.is_built = False
+        self.is_dirty = False
+        # (新增) 每次替換整張表時遞增 (SkillTagIndex 據此更新「不在表中的詞彙」)
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+
+    def build(self, tag_names: Iterable[str]) -> None:
+        """以整個標籤詞彙表重建相似度表 (名稱一律轉為小寫)"""
+        self.install(self.prepare(tag_names))
+
+    @classmethod
+    def prepare(cls, tag_names: Iterable[str]) -> Tuple[List[str], BKTree, Dict[str, Dict[str, float]]]:
+        """
+        (新增) build() 的計算部分，不修改任何狀態 (可用 asyncio.to_thread 在 event loop 之外執行)；
+        回傳值交給 install() 一次替換
+        """
+        vocabulary = sorted({name.lower() for name in tag_names if name})
+        tree = BKTree(vocabulary)
+
+        # (修改) 以 BK-tree 查詢每個標籤的相似標籤，取代 O(n^2) 的兩兩比較
+        pairs: Dict[str, Dict[str, float]] = {}
+        for name in vocabulary:
+            similar = cls._search(tree, name)
+            if similar:
+                pairs[name] = similar
+        return vocabulary, tree, pairs
+
+    def install(self, prepared: Tuple[List[str], BKTree, Dict[str, Dict[str, float]]]) -> None:
+        vocabulary, tree, pairs = prepared
+        self._pairs = pairs
+        self._vocabulary = set(vocabulary)
+        self._tree = tree
+        self._pair_count = sum(len(v) for v in pairs.values()) // 2
+        self.vocabulary_digest = None
+        self.is_built = True
+        self.is_dirty = False
+        self.version += 1
+
+    # (新增) 改為讀取共用的 mmap 相似度表 (app.utils.shared_matrix.SharedMatrix)
+    def attach_shared(self, matrix) -> None:
+        """以共用資料取代整張表；相似標籤在第一次查詢時才由 mmap 轉為 dict"""
+        self._vocabulary = matrix.vocabulary_index
+        self._pairs = matrix.similarity_rows
+        self._tree = None
+        self._pair_count = matrix.pair_count
+        self.vocabulary_digest = matrix.vocabulary_digest
+        self.is_built = True
+        self.is_dirty = False
+        self.version += 1
+
+    # (新增) 供計分 process pool 使用：只傳遞計分所需的部分表
+    def subset(self, source_names: Iterable[str], target_names: Iterable[str]):
+        """
+        回傳 (詞彙表中的名稱, 來源標籤的相似配對)，
+        在另一個 process 以 load_subset() 還原後，
+        對 source_names x target_names 的查詢結果與本表完全相同
+        """
+        names = [name for name in set(source_names) | set(target_names) if name in self._vocabulary]
+        name_set = set(names)
+        pairs = {
+            name: {n: sim for n, sim in self._pairs.get(name, {}).items() if n in name_set}
+            for name in source_names if name in name_set
+        }
+        return names, pairs
+
+    def load_subset(self, names: Iterable[str], pairs: Dict[str, Dict[str, float]]) -> None:
+        """以 subset() 的結果取代整張表"""
+        self._vocabulary = set(names)
+        self._tree = BKTree(self._vocabulary)
+        self._pairs = {name: dict(neighbours) for name, neighbours in pairs.items()}
+        for name, neighbours in pairs.items():
+            for other, sim in neighbours.items():
+                self._pairs.setdefault(other, {})[name] = sim
+        self._pair_count = sum(len(v) for v in self._pairs.values()) // 2
+        self.is_built = True
+        self.is_dirty = False
+        self.version += 1
+
+    def mark_dirty(self) -> None:
+        """SkillTag 資料已異動，下次使用前需要重建"""
+        self.is_dirty = True
+
+    def similarity(self, s1: str, s2: str) -> float:
+        """
+        回傳兩個標籤的相似度；低於門檻的已知配對回傳 0.0
+        """
+        if s1 in self._vocabulary and s2 in self._vocabulary:
+            self.hits += 1
+            if s1 == s2:
+                return 1.0
+            return self._pairs.get(s1, {}).get(s2, 0.0)
+        self.misses += 1
+        return _get_string_similarity(s1, s2)
+
+    def neighbours(self, tag_name: str) -> Dict[str, float]:
+        """回傳詞彙表中與 tag_name 相似度 > 門檻的所有標籤 (tag_name 不在詞彙表時回傳空 dict)"""
+        return self._pairs.get(tag_name, {})
+
+    def search(self, tag_name: str) -> Dict[str, float]:
+        """
+        (新增) 回傳詞彙表中與 tag_name 相似度 > 門檻的所有標籤 (tag_name 不必在詞彙表中)
+        結果不包含 tag_name 本身
+        """
+        if tag_name in self._vocabulary:
+            return self._pairs.get(tag_name, {})
+        if self._tree is None:
+            self._tree = BKTree(self._vocabulary)
+        return self._search(self._tree, tag_name)
+
+    @staticmethod
+    def _search(tree: BKTree, tag_name: str) -> Dict[str, float]:
+        similar = {}
+        for name, distance in tree.search(tag_name, _max_fuzzy_distance(len(tag_name))):
+            if distance == 0:
+                continue
+            similarity = _get_string_similarity(tag_name, name)
+            if similarity > FUZZY_THRESHOLD:
+                similar[name] = similarity
+        return similar
+
+    def __contains__(self, tag_name: str) -> bool:
+        return tag_name in self._vocabulary
+
+    def stats(self) -> Dict[str, int]:
+        """查表命中 / 未命中計數，用於確認 Levenshtein 已不在請求路徑上"""
+        return {
+            "vocabulary_size": len(self._vocabulary),
+            "pairs": self._pair_count,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# 實例化相似度表 (全域單例)
+similarity_table = TagSimilarityTable()
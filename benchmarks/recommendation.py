@@ -0,0 +1,242 @@
+# benchmarks/recommendation.py
+# 推薦系統效能基準測試 (不屬於 pytest；手動或在 CI 中執行)
+#
+# 用法:
+#   python -m benchmarks.recommendation --scales 1k,10k --samples 50 --output bench.json
+#
+# 每個規模會以合成資料建立一個暫存的 SQLite 資料庫 (與程式在同一個 process 中執行)，
+# 量測 calculate_recommendation_scores 與 RecommendationService 的完整路徑，
+# 以 JSON 輸出 p50 / p99 延遲 (毫秒) 與峰值記憶體 (tracemalloc，bytes)。
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Awaitable, Callable, Dict, List
+
+# 必須在匯入 app 之前設定：Settings 在匯入時讀取環境變數
+_DB_DIR = tempfile.mkdtemp(prefix="recommendation-bench-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(_DB_DIR, 'bench.sqlite')}"
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark")
+
+from sqlalchemy import insert, select  # noqa: E402
+
+import app.main  # noqa: E402,F401 (註冊所有 Model)
+from app.core.database import AsyncSessionLocal, Base, engine  # noqa: E402
+from app.models.employer_profile import EmployerProfile  # noqa: E402
+from app.models.freelancer_profile import FreelancerProfile  # noqa: E402
+from app.models.project import Project, ProjectSkillTag  # noqa: E402
+from app.models.skill_tag import SkillTag, UserSkillTag  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.recommendation_service import RecommendationService  # noqa: E402
+from app.utils import recommender_vectorized  # noqa: E402
+from app.utils.job_lists import job_lists  # noqa: E402
+from app.utils.recommendation_cache import recommendation_cache  # noqa: E402
+from app.utils.recommender import ENGINE_NUMPY, ENGINE_PYTHON, calculate_recommendation_scores  # noqa: E402
+from app.utils.tag_index import tag_index  # noqa: E402
+from app.utils.tag_similarity import similarity_table  # noqa: E402
+
+from benchmarks.synthetic import Marketplace, generate_marketplace  # noqa: E402
+
+BATCH_SIZE = 5000
+
+
+def parse_scale(value: str) -> int:
+    value = value.strip().lower()
+    if value.endswith("k"):
+        return int(float(value[:-1]) * 1000)
+    return int(value)
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """nearest-rank 百分位數"""
+    ordered = sorted(samples)
+    index = max(int(round(q / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+# --- 建立資料庫 ---
+
+async def _insert_batches(db, table, rows: List[Dict]) -> None:
+    for start in range(0, len(rows), BATCH_SIZE):
+        await db.execute(insert(table), rows[start:start + BATCH_SIZE])
+
+
+async def seed_database(market: Marketplace) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with AsyncSessionLocal() as db:
+        await _insert_batches(db, SkillTag.__table__, [
+            {"tag_id": tag_id, "name": name, "is_managed": True} for tag_id, name in market.tags.items()
+        ])
+        await _insert_batches(db, User.__table__, [
+            {"user_id": user_id, "email": f"{user_id}@bench.local", "password_hash": "x", "role": "雇主"}
+            for user_id in market.employers
+        ] + [
+            {"user_id": f["user_id"], "email": f"{f['user_id']}@bench.local", "password_hash": "x", "role": "自由工作者"}
+            for f in market.freelancers
+        ])
+        await _insert_batches(db, EmployerProfile.__table__, [
+            {"profile_id": f"ep-{user_id}", "user_id": user_id} for user_id in market.employers
+        ])
+        await _insert_batches(db, FreelancerProfile.__table__, [
+            {"profile_id": f["profile_id"], "user_id": f["user_id"], "visibility": f["visibility"],
+             "reputation_score": f["reputation_score"]}
+            for f in market.freelancers
+        ])
+        await _insert_batches(db, UserSkillTag.__table__, [
+            {"user_skill_tag_id": f"{f['profile_id']}-{i}", "profile_id": f["profile_id"], "tag_id": tag_id}
+            for f in market.freelancers for i, tag_id in enumerate(f["tag_ids"])
+        ])
+        await _insert_batches(db, Project.__table__, [
+            {"project_id": p["project_id"], "employer_id": p["employer_id"], "title": "benchmark",
+             "description": "benchmark", "status": p["status"]}
+            for p in market.projects
+        ])
+        await _insert_batches(db, ProjectSkillTag.__table__, [
+            {"project_skill_tag_id": f"{p['project_id']}-{i}", "project_id": p["project_id"], "tag_id": tag_id}
+            for p in market.projects for i, tag_id in enumerate(p["tag_ids"])
+        ])
+        await db.commit()
+
+
+def reset_recommender_state() -> None:
+    """清除所有程序內的推薦結構，讓每個規模從相同的狀態開始"""
+    similarity_table.is_built = False
+    tag_index.loaded_at = None
+    job_lists.clear()
+    recommendation_cache.clear()
+
+
+# --- 量測 ---
+
+async def measure(name: str, scale: int, samples: List, call: Callable[..., Awaitable],
+                  before_each: Callable[[], None] = None) -> Dict:
+    latencies = []
+    for sample in samples:
+        if before_each is not None:
+            before_each()
+        started = time.perf_counter()
+        await call(sample)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    # 峰值記憶體另外量測一次 (tracemalloc 會拖慢執行，不計入延遲)
+    if before_each is not None:
+        before_each()
+    tracemalloc.start()
+    await call(samples[0])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "benchmark": name,
+        "scale": scale,
+        "runs": len(latencies),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "mean_ms": round(sum(latencies) / len(latencies), 3),
+        "peak_memory_bytes": peak,
+    }
+
+
+async def run_scale(scale: int, sample_count: int, seed: int) -> List[Dict]:
+    market = generate_marketplace(scale, seed=seed)
+    await seed_database(market)
+    reset_recommender_state()
+
+    tag_names = {tag_id: name.lower() for tag_id, name in market.tags.items()}
+    open_projects = [
+        {"item_id": p["project_id"], "skill_names": {tag_names[t] for t in p["tag_ids"]}, "item_object": None}
+        for p in market.projects if p["status"] == "招募中"
+    ]
+    freelancers = market.freelancers[:sample_count]
+    employers = market.employers[:sample_count]
+
+    async with AsyncSessionLocal() as db:
+        await RecommendationService(db).refresh_similarity_table()
+        freelancer_users = (await db.execute(
+            select(User).where(User.user_id.in_([f["user_id"] for f in freelancers]))
+        )).scalars().all()
+        employer_users = (await db.execute(
+            select(User).where(User.user_id.in_(employers))
+        )).scalars().all()
+
+    results = []
+
+    engines = [ENGINE_PYTHON] + ([ENGINE_NUMPY] if recommender_vectorized.is_available() else [])
+    for engine_name in engines:
+        async def score(freelancer, engine_name=engine_name):
+            skills = {tag_names[t] for t in freelancer["tag_ids"]}
+            calculate_recommendation_scores(skills, open_projects, engine=engine_name)
+        results.append(await measure(f"calculate_recommendation_scores[{engine_name}]", scale, freelancers, score))
+
+    async def job_recommendations(user):
+        async with AsyncSessionLocal() as db:
+            await RecommendationService(db).get_job_recommendations(user, limit=10, offset=0)
+
+    async def freelancer_recommendations(user):
+        async with AsyncSessionLocal() as db:
+            await RecommendationService(db).get_freelancer_recommendations(user, limit=10, offset=0)
+
+    # cold: 每次都清除物化清單 / 快取；warm: 同一批使用者再查詢一次
+    results.append(await measure("service.get_job_recommendations[cold]", scale, freelancer_users,
+                                 job_recommendations, before_each=job_lists.clear))
+    for user in freelancer_users:
+        await job_recommendations(user)
+    results.append(await measure("service.get_job_recommendations[warm]", scale, freelancer_users,
+                                 job_recommendations))
+    results.append(await measure("service.get_freelancer_recommendations[cold]", scale, employer_users,
+                                 freelancer_recommendations, before_each=recommendation_cache.clear))
+    for user in employer_users:
+        await freelancer_recommendations(user)
+    results.append(await measure("service.get_freelancer_recommendations[warm]", scale, employer_users,
+                                 freelancer_recommendations))
+    return results
+
+
+async def main(argv: List[str] = None) -> Dict:
+    parser = argparse.ArgumentParser(description="Recommendation benchmark suite")
+    parser.add_argument("--scales", default="1k,10k,100k", help="逗號分隔的規模，例如 1k,10k,100k")
+    parser.add_argument("--samples", type=int, default=50, help="每個量測項目的請求數")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="輸出 JSON 檔案 (預設輸出到 stdout)")
+    args = parser.parse_args(argv)
+
+    engine.echo = False
+    logging.disable(logging.INFO)
+
+    results = []
+    for scale in (parse_scale(s) for s in args.scales.split(",") if s.strip()):
+        print(f"running scale={scale}", file=sys.stderr)
+        results += await run_scale(scale, args.samples, args.seed)
+    await engine.dispose()
+    shutil.rmtree(_DB_DIR, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "samples": args.samples,
+        },
+        "results": results,
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return report
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,130 @@
+# benchmarks/synthetic.py
+# 推薦系統效能基準測試用的合成資料產生器 (固定 seed，結果可重現)
+#
+# 標籤詞彙表模擬實際資料中常見的情況：
+#   - 拼字錯誤 (少一個字元、相鄰字元對調)，例如 "pyhton"
+#   - 大小寫變體，例如 "ReactJS" / "reactjs"
+#   - 同義詞 / 縮寫，例如 "k8s" / "kubernetes"
+# 標籤的使用頻率呈長尾分佈 (少數熱門技能被大量使用)。
+import random
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+BASE_TAGS = [
+    "python", "django", "flask", "fastapi", "javascript", "typescript", "react", "reactjs",
+    "vue", "vuejs", "angular", "nodejs", "express", "java", "spring", "kotlin", "swift",
+    "golang", "rust", "php", "laravel", "ruby", "rails", "csharp", "dotnet", "sql", "mysql",
+    "postgresql", "mongodb", "redis", "elasticsearch", "docker", "kubernetes", "terraform",
+    "aws", "gcp", "azure", "linux", "graphql", "figma", "photoshop", "illustrator",
+    "seo", "copywriting", "translation", "excel", "tableau", "pandas", "pytorch", "tensorflow",
+]
+
+QUALIFIERS = ["api", "sdk", "cloud", "testing", "devops", "native", "ui", "data", "security", "mobile"]
+
+SYNONYMS = {
+    "javascript": ["js"],
+    "typescript": ["ts"],
+    "kubernetes": ["k8s"],
+    "postgresql": ["postgres"],
+    "golang": ["go"],
+    "csharp": ["c#"],
+    "nodejs": ["node.js", "node"],
+    "tensorflow": ["tf"],
+}
+
+PROJECT_STATUSES = ["招募中"] * 17 + ["已關閉", "已成案", "已關閉"]
+VISIBILITIES = ["公開"] * 4 + ["私人"]
+
+
+@dataclass
+class Marketplace:
+    tags: Dict[str, str] = field(default_factory=dict)            # tag_id -> name
+    employers: List[str] = field(default_factory=list)            # user_id
+    freelancers: List[Dict] = field(default_factory=list)         # {user_id, profile_id, visibility, reputation_score, tag_ids}
+    projects: List[Dict] = field(default_factory=list)            # {project_id, employer_id, status, tag_ids}
+
+
+def _typo(name: str, rng: random.Random) -> str:
+    position = rng.randrange(len(name) - 1)
+    if rng.random() < 0.5:
+        return name[:position] + name[position + 1:]  # 少一個字元
+    return name[:position] + name[position + 1] + name[position] + name[position + 2:]  # 相鄰字元對調
+
+
+def _casing(name: str, rng: random.Random) -> str:
+    if rng.random() < 0.5:
+        return name.capitalize()
+    return name.upper()
+
+
+def build_vocabulary(size: int, rng: random.Random) -> List[str]:
+    """產生約 size 個不重複的標籤名稱 (含拼字錯誤、大小寫變體、同義詞)"""
+    canonical = list(BASE_TAGS)
+    combos = [f"{base} {qualifier}" for base in BASE_TAGS for qualifier in QUALIFIERS]
+    rng.shuffle(combos)
+    canonical += combos[:max(size * 3 // 4 - len(canonical), 0)]
+
+    names = list(canonical)
+    for base, synonyms in SYNONYMS.items():
+        names += synonyms
+    seen = set(names)
+    while len(names) < size:
+        source = rng.choice(canonical)
+        variant = _typo(source, rng) if rng.random() < 0.75 else _casing(source, rng)
+        if variant not in seen and len(variant) > 1:
+            seen.add(variant)
+            names.append(variant)
+    return names
+
+
+def _pick_tags(tag_ids: List[str], weights: List[float], low: int, high: int, rng: random.Random) -> List[str]:
+    count = rng.randint(low, high)
+    picked = set()
+    while len(picked) < count:
+        picked.update(rng.choices(tag_ids, weights=weights, k=count - len(picked)))
+    return sorted(picked)
+
+
+def generate_marketplace(scale: int, seed: int = 42) -> Marketplace:
+    """
+    產生 scale 個案件與 scale 位自由工作者 (雇主數量為 scale / 20)
+    相同的 (scale, seed) 永遠產生相同的資料
+    """
+    rng = random.Random(seed)
+    market = Marketplace()
+
+    vocabulary = build_vocabulary(min(2000, 200 + scale // 50), rng)
+    tag_ids = []
+    for name in vocabulary:
+        tag_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        market.tags[tag_id] = name
+        tag_ids.append(tag_id)
+    # 長尾分佈：排名越後面的標籤越少被使用
+    order = list(range(len(tag_ids)))
+    rng.shuffle(order)
+    weights = [0.0] * len(tag_ids)
+    for rank, index in enumerate(order):
+        weights[index] = 1.0 / (rank + 1) ** 1.1
+
+    for _ in range(max(scale // 20, 1)):
+        market.employers.append(str(uuid.UUID(int=rng.getrandbits(128))))
+
+    for _ in range(scale):
+        market.freelancers.append({
+            "user_id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "profile_id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "visibility": rng.choice(VISIBILITIES),
+            "reputation_score": round(rng.uniform(1, 5), 2),
+            "tag_ids": _pick_tags(tag_ids, weights, 1, 8, rng),
+        })
+
+    for _ in range(scale):
+        market.projects.append({
+            "project_id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "employer_id": rng.choice(market.employers),
+            "status": rng.choice(PROJECT_STATUSES),
+            "tag_ids": _pick_tags(tag_ids, weights, 1, 6, rng),
+        })
+
+    return market
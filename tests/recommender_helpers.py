@@ -0,0 +1,9 @@
+import types
+
+
+def make_item(item_id, skill_names, reputation_score=0):
+    return {
+        "item_id": item_id,
+        "skill_names": set(skill_names),
+        "item_object": types.SimpleNamespace(reputation_score=reputation_score)
+    }
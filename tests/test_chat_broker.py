@@ -0,0 +1,89 @@
+import asyncio
+import os
+import sys
+
+# Ensure backend package (freelancer_match_backend) is on sys.path for imports during tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.chat_broker import RedisBroker, decode_envelope, encode_command, encode_envelope, read_reply
+from app.core.websocket_manager import ConnectionManager
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        self.sent.append(text)
+
+
+class FakeRedisServer:
+    """只實作 SUBSCRIBE / PUBLISH 的 Redis 協定伺服器 (測試替身)"""
+
+    def __init__(self):
+        self.subscribers = {}
+        self.published = 0
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                command = await read_reply(reader)
+                name = command[0].upper()
+                if name == b"SUBSCRIBE":
+                    self.subscribers.setdefault(command[1], []).append(writer)
+                    writer.write(b"*3\r\n$9\r\nsubscribe\r\n" + encode_command(command[1])[4:] + b":1\r\n")
+                elif name == b"PUBLISH":
+                    self.published += 1
+                    receivers = self.subscribers.get(command[1], [])
+                    for subscriber in receivers:
+                        subscriber.write(encode_command("message", command[1], command[2]))
+                    writer.write(b":%d\r\n" % len(receivers))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+
+def test_envelope_round_trip():
+    payload = encode_envelope("node1", "r", "room-1", '{"content": "a\\nb"}')
+    assert decode_envelope(payload) == ("node1", "r", "room-1", '{"content": "a\\nb"}')
+
+
+def test_messages_fan_out_across_nodes():
+    async def run():
+        fake = FakeRedisServer()
+        server = await asyncio.start_server(fake.handle, "127.0.0.1", 0)
+        url = "redis://127.0.0.1:%d" % server.sockets[0].getsockname()[1]
+
+        worker_a, worker_b = ConnectionManager(), ConnectionManager()
+        for worker in (worker_a, worker_b):
+            worker.configure(queue_size=16, slow_consumer_policy="drop", broker=RedisBroker(url))
+            await worker.start()
+        await asyncio.wait_for(worker_a.broker.subscribed.wait(), 5)
+        await asyncio.wait_for(worker_b.broker.subscribed.wait(), 5)
+
+        alice, bob, carol = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        await worker_a.connect("room", "alice", alice)
+        await worker_b.connect("room", "bob", bob)
+        await worker_b.connect("other", "carol", carol)
+
+        await worker_a.broadcast_message("room", "hello")
+        await worker_b.send_to_user("alice", "ping")
+        for _ in range(100):
+            if len(bob.sent) == 1 and len(alice.sent) == 2:
+                break
+            await asyncio.sleep(0.01)
+
+        for worker in (worker_a, worker_b):
+            await worker.stop()
+        server.close()
+        return alice.sent, bob.sent, carol.sent, fake.published, worker_a.stats()["broker"]
+
+    alice_sent, bob_sent, carol_sent, published, broker_stats = asyncio.run(run())
+    assert alice_sent == ["hello", "ping"]  # 本機直接送出 + 由另一個 worker 推播
+    assert bob_sent == ["hello"]
+    assert carol_sent == []
+    assert published == 2  # 每則訊息只發布一次
+    assert broker_stats["received_total"] == 1  # 自己發布的訊息不會重複分送
@@ -0,0 +1,29 @@
+import os
+import sys
+
+# Ensure backend package (freelancer_match_backend) is on sys.path for imports during tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import QueuePool
+
+from app.core.db_pool_metrics import PoolMetrics
+
+
+def test_checkout_is_released_after_each_session():
+    engine = create_engine("sqlite://", poolclass=QueuePool)
+    metrics = PoolMetrics()
+    metrics.attach(engine)
+
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        assert metrics.stats()["checked_out"] == 1
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+    stats = metrics.stats()
+    assert stats["checked_out"] == 0
+    assert stats["checkouts_total"] == 2
+    assert stats["peak_checked_out"] == 1
+    assert stats["connections_opened_total"] == 1  # 第二次重用池中的連線
+    engine.dispose()
@@ -0,0 +1,48 @@
+import asyncio
+import os
+import sys
+
+# Ensure backend package (freelancer_match_backend) is on sys.path for imports during tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.group_commit import GroupCommitBatcher
+
+
+def test_concurrent_submits_share_one_batch_in_order():
+    batches = []
+
+    async def write_batch(items):
+        batches.append(list(items))
+        return [item * 10 if item != 3 else ValueError("bad item") for item in items]
+
+    async def run():
+        batcher = GroupCommitBatcher(write_batch, max_delay=0.01, max_batch=100)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(6)), return_exceptions=True)
+        return results, batcher.stats()
+
+    results, stats = asyncio.run(run())
+    assert batches == [[0, 1, 2, 3, 4, 5]]
+    assert results[:3] == [0, 10, 20] and results[4:] == [40, 50]
+    assert isinstance(results[3], ValueError)  # 只有該筆失敗
+    assert stats["batches_total"] == 1 and stats["items_total"] == 6
+
+
+def test_full_batches_and_batch_failure():
+    calls = []
+
+    async def write_batch(items):
+        calls.append(len(items))
+        if 4 in items:
+            raise RuntimeError("commit failed")
+        return items
+
+    async def run():
+        batcher = GroupCommitBatcher(write_batch, max_delay=10, max_batch=3)
+        return await asyncio.wait_for(
+            asyncio.gather(*(batcher.submit(i) for i in range(6)), return_exceptions=True), 5
+        )
+
+    results = asyncio.run(run())
+    assert calls == [3, 3]  # 批次滿了就寫出，不等 max_delay
+    assert results[:3] == [0, 1, 2]
+    assert all(isinstance(result, RuntimeError) for result in results[3:])
@@ -0,0 +1,136 @@
+import asyncio
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+# Ensure backend package (freelancer_match_backend) is on sys.path for imports during tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.job_lists import JobListStore
+from app.utils.recommendation_cache import skill_fingerprint
+from app.utils.recommender import calculate_recommendation_scores
+
+VOCABULARY = ["python", "pyhton", "django", "react", "reactjs", "sql", "mysql", "docker", "go"]
+
+
+def _full_ranking(skills, projects):
+    items = [
+        {"item_id": pid, "skill_names": tags, "item_object": None}
+        for pid, tags in sorted(projects.items())
+    ]
+    return [(r["item_id"], r["score"]) for r in calculate_recommendation_scores(skills, items)]
+
+
+def test_incremental_updates_match_full_recompute():
+    rng = random.Random(7)
+    skills = {"python", "react", "sql"}
+    fingerprint = skill_fingerprint(skills)
+    projects = {f"p{i:03d}": set(rng.sample(VOCABULARY, rng.randint(1, 3))) for i in range(40)}
+
+    store = JobListStore(depth=10, max_entries=10, max_age_seconds=60)
+    initial = {pid: tags for pid, tags in projects.items() if pid < "p020"}
+    ranking = _full_ranking(skills, initial)
+    store.seed("f1", fingerprint, skills, ranking[:10], [pid for pid, _ in ranking])
+
+    # new projects, a skills update and a closed project
+    for pid in sorted(projects):
+        if pid >= "p020":
+            store.project_changed(pid, projects[pid], is_open=True)
+    projects["p003"] = {"pyhton", "mysql"}
+    store.project_changed("p003", projects["p003"], is_open=True)
+    store.project_changed("p005", projects.pop("p005"), is_open=False)
+
+    expected = _full_ranking(skills, projects)
+    job_list = store.get("f1", fingerprint, end=1)
+    assert job_list.total == len(expected)
+    assert job_list.ranked == expected[:len(job_list.ranked)]
+    # pages past the still-valid prefix fall back to a full computation
+    assert store.get("f1", fingerprint, end=len(job_list.ranked) + 1) is None
+
+
+def test_seed_discarded_after_concurrent_change():
+    store = JobListStore(depth=10, max_entries=10, max_age_seconds=60)
+    generation = store.generation
+    store.project_changed("p1", {"python"}, is_open=True)
+    store.seed("f1", "f", {"python"}, [], [], generation=generation)
+    assert store.get("f1", "f", end=1) is None
+
+
+def test_expired_projects_are_removed_on_read():
+    skills = {"python"}
+    fingerprint = skill_fingerprint(skills)
+    now = datetime(2024, 1, 1, 12, 0)
+    store = JobListStore(depth=10, max_entries=10, max_age_seconds=60)
+    store.seed(
+        "f1", fingerprint, skills, [("p1", 1.0), ("p2", 1.0), ("p3", 1.0)], ["p1", "p2", "p3"],
+        deadlines={"p1": now + timedelta(hours=1), "p2": now + timedelta(days=1)}
+    )
+    # p1 deadline extended by an update: the stale heap entry must not remove it
+    store.project_changed("p1", ["python"], is_open=True, deadline=now + timedelta(days=2))
+
+    job_list = store.get("f1", fingerprint, 10, now=now + timedelta(hours=2))
+    assert job_list.ranked == [("p1", 1.0), ("p2", 1.0), ("p3", 1.0)]
+
+    job_list = store.get("f1", fingerprint, 10, now=now + timedelta(days=1, hours=1))
+    assert job_list.ranked == [("p1", 1.0), ("p3", 1.0)]
+    assert job_list.total == 2
+
+
+def test_changes_are_applied_in_the_background():
+    skills = {"python"}
+    fingerprint = skill_fingerprint(skills)
+    store = JobListStore(depth=10, max_entries=1000, max_age_seconds=60)
+    for i in range(600):
+        store.seed(f"f{i}", fingerprint, skills, [], [])
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0)
+
+        ticking = asyncio.create_task(ticker())
+        store.project_changed("p1", ["python"], is_open=True)
+        queued = (store.updates, store.stats()["pending_changes"])  # 寫入端只排入佇列
+        await store.wait_maintained()
+        ticking.cancel()
+        return queued, ticks
+
+    queued, ticks = asyncio.run(run())
+    assert queued == (0, 1)
+    assert store.updates == 600
+    assert ticks >= 2  # 套用期間 event loop 仍可執行其他 task
+    assert store.get("f0", fingerprint, end=1).ranked == [("p1", 1.0)]
+
+
+def test_failed_change_does_not_stop_maintenance(monkeypatch):
+    from app.utils import job_lists as job_lists_module
+
+    skills = {"python"}
+    fingerprint = skill_fingerprint(skills)
+    store = JobListStore(depth=10, max_entries=10, max_age_seconds=60)
+    store.seed("f1", fingerprint, skills, [], [])
+
+    def failing_scores(source, items, **kwargs):
+        if items[0]["item_id"] == "bad":
+            raise ValueError("boom")
+        return calculate_recommendation_scores(source, items, **kwargs)
+
+    monkeypatch.setattr(job_lists_module, "calculate_recommendation_scores", failing_scores)
+
+    async def run():
+        store.project_changed("bad", ["python"], is_open=True)
+        store.project_changed("p1", ["python"], is_open=True)
+        await store.wait_maintained()
+
+    asyncio.run(run())
+    # 失敗的異動之後的異動仍會套用；可能不一致的清單被捨棄，不會回傳過時的排序
+    assert store.stats()["pending_changes"] == 0
+    assert store.get("f1", fingerprint, end=1) is None
+    store.seed("f2", fingerprint, skills, [], [])
+    store.project_changed("p2", ["python"], is_open=True)
+    assert store.get("f2", fingerprint, end=1).ranked == [("p2", 1.0)]
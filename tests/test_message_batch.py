@@ -0,0 +1,69 @@
+import asyncio
+import os
+import sys
+
+# Ensure backend package (freelancer_match_backend) is on sys.path for imports during tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# app.core.config 需要的設定 (測試使用自己的 in-memory 資料庫，不會連到這個位址)
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite://")
+os.environ.setdefault("JWT_SECRET_KEY", "test")
+
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.models import (  # noqa: F401 (註冊所有 table)
+    contract, employer_profile, freelancer_profile, message, notification, project, proposal, skill_tag, user
+)
+from app.models.message import ChatRoom, ChatRoomParticipant, Message
+from app.models.notification import Notification
+from app.schemas.message_schema import MessageIn
+from app.services import message_service
+from app.services.message_service import MessageService
+
+
+def test_batch_write_does_not_load_room_history():
+    async def run():
+        engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with session_factory() as db:
+            db.add(ChatRoom(room_id="room1"))
+            db.add_all([ChatRoomParticipant(room_id="room1", user_id=uid) for uid in ("a", "b")])
+            db.add_all([
+                Message(message_id=f"old{i}", room_id="room1", sender_id="a", content="old") for i in range(20)
+            ])
+            await db.commit()
+
+        statements = []
+        event.listen(
+            engine.sync_engine, "before_cursor_execute",
+            lambda conn, cursor, statement, *args: statements.append(statement)
+        )
+        original = message_service.AsyncSessionLocal
+        message_service.AsyncSessionLocal = session_factory
+        try:
+            results = await MessageService._write_message_batch([
+                ("room1", "a", MessageIn(room_id="room1", content="hello")),
+                ("room1", "b", MessageIn(room_id="room1", content="hi")),
+            ])
+        finally:
+            message_service.AsyncSessionLocal = original
+
+        async with session_factory() as db:
+            counts = (
+                (await db.execute(select(func.count()).select_from(Message))).scalar(),
+                (await db.execute(select(func.count()).select_from(Notification))).scalar(),
+            )
+        await engine.dispose()
+        return results, statements, counts
+
+    results, statements, counts = asyncio.run(run())
+    assert [result.content for result in results] == ["hello", "hi"]
+    assert counts == (22, 2)
+    # 只讀回剛寫入的訊息 (依 message_id)，不依 room_id 載入聊天室的歷史訊息
+    assert not [statement for statement in statements if "messages.room_id IN" in statement]
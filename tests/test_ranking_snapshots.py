@@ -0,0 +1,53 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+# Ensure backend package (freelancer_match_backend) is on sys.path for imports during tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.ranking_snapshots import (
+    RankingSnapshotStore, decode_cursor, encode_cursor, seek_position
+)
+
+
+def test_cursor_round_trip_and_invalid_cursor():
+    cursor = encode_cursor("snap", 10, 2.8571428571428577, 4.5, "p010")
+    assert decode_cursor(cursor) == {
+        "snapshot_id": "snap", "position": 10, "score": 2.8571428571428577,
+        "reputation": 4.5, "item_id": "p010",
+    }
+    for bad in ("", "not-a-cursor", encode_cursor("snap", -1, 1.0, 0.0, "p")):
+        with pytest.raises(ValueError):
+            decode_cursor(bad)
+
+
+def test_seek_position_resumes_after_last_seen_key():
+    def item(item_id, score, reputation):
+        return {"item_id": item_id, "score": score, "item_object": SimpleNamespace(reputation_score=reputation)}
+
+    ranked = [item("f2", 3.0, 1), item("f1", 2.0, 5), item("f3", 2.0, 5), item("f0", 2.0, 1), item("f4", 1.0, 0)]
+    assert seek_position(ranked, 2.0, 5, "f1") == 2
+    # the last seen item no longer exists: resume at the next key in order
+    assert seek_position(ranked, 2.0, 5, "f2") == 2
+    assert seek_position(ranked, 9.0, 0, "x") == 0
+
+
+def test_snapshot_store_is_scoped_to_user_and_kind():
+    store = RankingSnapshotStore(max_entries=1, ttl_seconds=60)
+    snapshot = store.create("jobs", "u1", [("p1", 1.0)], total=1)
+    assert store.get(snapshot.snapshot_id, "jobs", "u1") is snapshot
+    assert store.get(snapshot.snapshot_id, "jobs", "u2") is None
+    assert store.get(snapshot.snapshot_id, "freelancers", "u1") is None
+
+    store.create("jobs", "u1", [], total=0)
+    assert store.get(snapshot.snapshot_id, "jobs", "u1") is None
+
+
+def test_snapshot_is_bound_to_filters():
+    store = RankingSnapshotStore(max_entries=4, ttl_seconds=60)
+    snapshot = store.create("jobs", "u1", [("p1", 1.0)], total=1, filters="遠端")
+    assert store.get(snapshot.snapshot_id, "jobs", "u1", "遠端") is snapshot
+    assert store.get(snapshot.snapshot_id, "jobs", "u1", "實體") is None
+    assert store.get(snapshot.snapshot_id, "jobs", "u1") is None
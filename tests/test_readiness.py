@@ -0,0 +1,26 @@
+import os
+import sys
+
+# Ensure backend package (freelancer_match_backend) is on sys.path for imports during tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.readiness import STATE_FAILED, STATE_READY, WarmupState
+
+
+def test_warmup_state_transitions():
+    state = WarmupState()
+    assert not state.is_ready
+
+    state.begin()
+    state.fail(RuntimeError("db down"))
+    assert state.state == STATE_FAILED
+    assert state.stats()["last_error"] == "RuntimeError: db down"
+
+    state.begin()
+    state.succeed({"indexes": 12.5})
+    stats = state.stats()
+    assert state.is_ready and stats["state"] == STATE_READY
+    assert stats["attempts"] == 2
+    assert stats["last_error"] is None
+    assert stats["steps_ms"] == {"indexes": 12.5}
+    assert stats["duration_seconds"] is not None
@@ -0,0 +1,58 @@
+import os
+import sys
+import types
+
+# Ensure backend package (freelancer_match_backend) is on sys.path for imports during tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils import recommendation_events
+from app.utils.recommendation_cache import KIND_JOBS, RecommendationCache, recommendation_cache, skill_fingerprint
+
+
+def test_hit_requires_same_fingerprint_and_enough_depth():
+    cache = RecommendationCache(max_entries=10, ttl_seconds=60)
+    fingerprint = skill_fingerprint({"python", "django"})
+    cache.put(KIND_JOBS, "u1", fingerprint, [("p1", 2.0), ("p2", 1.0)], total=5)
+
+    assert cache.get(KIND_JOBS, "u1", fingerprint, end=2).ranked[0] == ("p1", 2.0)
+    assert cache.get(KIND_JOBS, "u1", fingerprint, end=3) is None  # not deep enough
+    assert cache.get(KIND_JOBS, "u1", skill_fingerprint({"python"}), end=1) is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_lru_eviction_and_invalidation():
+    cache = RecommendationCache(max_entries=2, ttl_seconds=60)
+    for user_id in ("u1", "u2", "u3"):
+        cache.put(KIND_JOBS, user_id, "f", [], total=0)
+    assert cache.get(KIND_JOBS, "u1", "f", end=1) is None
+    assert cache.stats()["evictions"] == 1
+
+    generation = cache.generation
+    cache.invalidate_kind(KIND_JOBS)
+    # results computed before an invalidation are discarded
+    cache.put(KIND_JOBS, "u2", "f", [], total=0, generation=generation)
+    assert cache.get(KIND_JOBS, "u2", "f", end=1) is None
+
+
+def test_only_recommendation_relevant_project_edits_invalidate_job_caches():
+    project = types.SimpleNamespace(
+        project_id="p-edit", employer_id="e1", title="Old title", status="招募中",
+        work_type="遠端", location=None, budget_min=100, budget_max=200, proposals_deadline=None,
+        skills=[types.SimpleNamespace(tag=types.SimpleNamespace(name="Python"))]
+    )
+    recommendation_events.project_changed(project)
+
+    recommendation_cache.put(KIND_JOBS, "u1", "f", [], total=0)
+    project.title = "New title"
+    recommendation_events.project_changed(project)
+    assert recommendation_cache.get(KIND_JOBS, "u1", "f", end=0) is not None
+
+    project.budget_max = 300  # 影響預算篩選
+    recommendation_events.project_changed(project)
+    assert recommendation_cache.get(KIND_JOBS, "u1", "f", end=0) is None
+
+    project.status = "已關閉"  # 不再招募：不保留 signature
+    recommendation_events.project_changed(project)
+    assert project.project_id not in recommendation_events._project_signatures
+    recommendation_events.project_closed(project.project_id, project.employer_id)
@@ -0,0 +1,38 @@
+import os
+import sys
+
+# Ensure backend package (freelancer_match_backend) is on sys.path for imports during tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.recommendation_metrics import RecommendationMetrics
+
+
+def test_observe_fills_cumulative_buckets():
+    metrics = RecommendationMetrics(buckets=(0.01, 0.1))
+    metrics.observe("jobs.score", 0.005)
+    metrics.observe("jobs.score", 0.05)
+    metrics.observe("jobs.score", 5.0)
+
+    stage = metrics.snapshot()["stages"]["jobs.score"]
+    assert stage["count"] == 3
+    assert stage["max_seconds"] == 5.0
+    assert stage["buckets"] == {"0.01": 1, "0.1": 2, "+Inf": 3}
+
+
+def test_span_and_counters():
+    metrics = RecommendationMetrics()
+    with metrics.span("jobs.load"):
+        pass
+    metrics.count("jobs.candidates", 7)
+    metrics.count("jobs.candidates", 3)
+
+    snapshot = metrics.snapshot()
+    assert snapshot["stages"]["jobs.load"]["count"] == 1
+    assert snapshot["counters"] == {"jobs.candidates": 10}
+
+    text = metrics.to_prometheus()
+    assert 'recommendation_stage_seconds_count{stage="jobs.load"} 1' in text
+    assert 'recommendation_events_total{name="jobs.candidates"} 10' in text
+
+    metrics.reset()
+    assert metrics.snapshot() == {"stages": {}, "counters": {}}
@@ -1,19 +1,14 @@
 import os
 import sys
-import types
 
 # Ensure backend package (freelancer_match_backend) is on sys.path for imports during tests
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.utils.recommender import calculate_recommendation_scores
-
-
-def make_item(item_id, skill_names, reputation_score=0):
-    return {
-        "item_id": item_id,
-        "skill_names": set(skill_names),
-        "item_object": types.SimpleNamespace(reputation_score=reputation_score)
-    }
+from app.utils.recommender import (
+    calculate_recommendation_scores, explain_recommendation_score, familiarity_weight,
+    merge_top_recommendations, score_items, select_top_recommendations, to_skill_weights
+)
+from recommender_helpers import make_item
 
 
 def test_empty_source_returns_empty():
@@ -50,3 +45,73 @@ def test_sorting_and_reputation_tiebreaker():
     # first item should be b (higher reputation)
     assert scored[0]["item_id"] == "b"
     assert scored[1]["item_id"] == "a"
+
+
+def test_top_k_matches_full_ranking_and_total():
+    source = {"python", "reactjs"}
+    items = [
+        make_item("1", ["python"], reputation_score=3.0),
+        make_item("2", ["react"], reputation_score=4.0),
+        make_item("3", ["python", "react"], reputation_score=1.0),
+        make_item("4", ["python"], reputation_score=5.0),
+        make_item("5", ["angular"]),
+    ]
+    full = calculate_recommendation_scores(source, items)
+    top, total = select_top_recommendations(source, items, 2)
+    assert total == len(full) == 4
+    assert [item["item_id"] for item in top] == [item["item_id"] for item in full[:2]]
+    assert select_top_recommendations(source, items, 0) == ([], 4)
+
+    scored_ids = []
+    select_top_recommendations(source, items, 1, scored_ids=scored_ids)
+    assert scored_ids == ["1", "2", "3", "4"]
+
+
+def test_weighted_scores_use_familiarity():
+    items = [make_item("1", ["python"]), make_item("2", ["django"])]
+    # default familiarity (3) keeps the unweighted score
+    assert familiarity_weight(3) == 1.0
+    scored = calculate_recommendation_scores(
+        {"python", "django"}, items,
+        source_weights=to_skill_weights({"python": familiarity_weight(5), "django": familiarity_weight(3)})
+    )
+    assert [(item["item_id"], item["score"]) for item in scored] == [("1", 5 / 3), ("2", 1.0)]
+
+
+def test_merge_top_recommendations_keeps_best_score_per_item():
+    groups = [
+        [{"item_id": "a", "score": 1.0, "item_object": None}, {"item_id": "b", "score": 0.9, "item_object": None}],
+        [{"item_id": "b", "score": 2.0, "item_object": None}, {"item_id": "c", "score": 1.5, "item_object": None}],
+    ]
+    merged = merge_top_recommendations(groups, 2)
+    assert [(item["item_id"], item["score"]) for item in merged] == [("b", 2.0), ("c", 1.5)]
+
+
+def test_explain_contributions_sum_to_score():
+    source = {"python", "django", "javascript"}
+    item = make_item("1", ["python", "javascrpt", "flask"])
+    weights = to_skill_weights({"python": 1.5, "javascript": 0.5})
+    scored = calculate_recommendation_scores(source, [item], source_weights=weights)
+    explanation = explain_recommendation_score(source, item["skill_names"], source_weights=weights)
+
+    assert [e["tag"] for e in explanation["exact"]] == ["python"]
+    assert [(f["source_tag"], f["matched_tag"]) for f in explanation["fuzzy"]] == [("javascript", "javascrpt")]
+    contributions = [e["contribution"] for e in explanation["exact"]] + [f["contribution"] for f in explanation["fuzzy"]]
+    assert abs(sum(contributions) - scored[0]["score"]) < 1e-9
+
+
+def test_scored_items_orders_by_precomputed_keys():
+    from decimal import Decimal
+    items = [
+        make_item("a", ["python"], Decimal("4.50")),
+        make_item("b", ["python"], None),
+        make_item("c", ["go"]),
+        {"item_id": "d", "skill_names": {"python"}, "reputation": 4.9},
+        make_item("e", ["python"], Decimal("4.50")),
+    ]
+    scored = score_items({"python"}, items)
+    assert scored.positions == [0, 1, 3, 4]
+    assert scored.reputations == [4.5, 0.0, 4.9, 4.5]
+    # ties keep the candidate order ("a" before "e")
+    assert [r["item_id"] for r in scored.to_dicts(scored.order())] == ["d", "a", "e", "b"]
+    assert [r["item_id"] for r in scored.to_dicts(scored.order(2))] == ["d", "a"]
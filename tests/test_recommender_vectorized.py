@@ -0,0 +1,79 @@
+import os
+import random
+import sys
+
+import pytest
+
+# Ensure backend package (freelancer_match_backend) is on sys.path for imports during tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils import recommender_vectorized
+from app.utils.recommender import calculate_recommendation_scores, select_top_recommendations, to_skill_weights
+from recommender_helpers import make_item
+
+pytestmark = pytest.mark.skipif(
+    not recommender_vectorized.is_available(), reason="numpy/scipy not installed"
+)
+
+VOCABULARY = [
+    "python", "pyhton", "python3", "django", "flask", "react", "reactjs", "react.js",
+    "vue", "vuejs", "angular", "docker", "kubernetes", "golang", "go", "sql", "mysql",
+]
+
+
+def summarize(scored):
+    return [(item["item_id"], item["score"]) for item in scored]
+
+
+def test_matches_python_engine_on_random_marketplace():
+    rnd = random.Random(42)
+    for _ in range(20):
+        source = set(rnd.sample(VOCABULARY, rnd.randint(1, 5)))
+        items = [
+            make_item(str(i), rnd.sample(VOCABULARY, rnd.randint(0, 5)), rnd.choice([3.0, 4.5, 5.0]))
+            for i in range(200)
+        ]
+        expected = calculate_recommendation_scores(source, items)
+        actual = calculate_recommendation_scores(source, items, engine="numpy")
+        assert summarize(actual) == summarize(expected)
+
+
+def test_reputation_tiebreaker():
+    item_a = make_item("a", ["python"], reputation_score=3.0)
+    item_b = make_item("b", ["python"], reputation_score=5.0)
+    scored = calculate_recommendation_scores({"python"}, [item_a, item_b], engine="numpy")
+    assert [item["item_id"] for item in scored] == ["b", "a"]
+
+
+def test_top_k_matches_full_ranking():
+    rnd = random.Random(7)
+    source = set(rnd.sample(VOCABULARY, 4))
+    items = [
+        make_item(str(i), rnd.sample(VOCABULARY, rnd.randint(0, 4)), rnd.choice([3.0, 5.0]))
+        for i in range(300)
+    ]
+    full = calculate_recommendation_scores(source, items)
+    for k in (0, 1, 10, len(full), len(full) + 5):
+        scored_ids = []
+        top, total = select_top_recommendations(source, items, k, engine="numpy", scored_ids=scored_ids)
+        assert total == len(full)
+        assert summarize(top) == summarize(full[:k])
+        assert sorted(scored_ids, key=int) == sorted((item["item_id"] for item in full), key=int)
+
+
+def test_weighted_scores_match_python_engine():
+    rnd = random.Random(11)
+    weights = [1 / 3, 2 / 3, 1.0, 4 / 3, 5 / 3]
+    for _ in range(20):
+        source = set(rnd.sample(VOCABULARY, rnd.randint(1, 5)))
+        source_weights = to_skill_weights({name: rnd.choice(weights) for name in source})
+        items = []
+        for i in range(200):
+            item = make_item(str(i), rnd.sample(VOCABULARY, rnd.randint(0, 5)), rnd.choice([3.0, 5.0]))
+            if i % 2:
+                item["skill_weights"] = to_skill_weights({name: rnd.choice(weights) for name in item["skill_names"]})
+            items.append(item)
+        for weights_arg in (source_weights, None):
+            expected = calculate_recommendation_scores(source, items, source_weights=weights_arg)
+            actual = calculate_recommendation_scores(source, items, engine="numpy", source_weights=weights_arg)
+            assert summarize(actual) == summarize(expected)
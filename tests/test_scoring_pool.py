@@ -0,0 +1,57 @@
+import asyncio
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Ensure backend package (freelancer_match_backend) is on sys.path for imports during tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.recommender import select_top_recommendations
+from app.utils import scoring_pool
+from app.utils.scoring_pool import _build_payload, _score_payload
+from recommender_helpers import make_item
+
+
+def test_payload_round_trip_matches_inline_scoring():
+    source = {"python", "reactjs"}
+    items = [
+        make_item("a", ["python"], 3.0),
+        make_item("b", ["react", "docker"], 4.0),
+        make_item("c", ["python"], 5.0),
+        make_item("d", ["angular"]),
+    ]
+    expected, expected_total = select_top_recommendations(source, items, 2)
+
+    scored_positions = []
+    ranked, total = _score_payload(_build_payload(source, items, 2, "python"), scored_positions)
+
+    assert total == expected_total
+    assert scored_positions == [0, 1, 2]
+    assert [(items[pos]["item_id"], score) for pos, score in ranked] == [
+        (item["item_id"], item["score"]) for item in expected
+    ]
+
+
+def test_payload_is_built_off_the_event_loop(monkeypatch):
+    items = [make_item("a", ["python"], 1.0), make_item("b", ["django"])]
+    build_threads = []
+
+    def recording_build(*args):
+        build_threads.append(threading.get_ident())
+        return _build_payload(*args)
+
+    monkeypatch.setattr(scoring_pool, "_build_payload", recording_build)
+
+    async def run():
+        pool = scoring_pool.ScoringPool(max_workers=1, inline_threshold=1)
+        pool._executor = ThreadPoolExecutor(1)  # 以 thread 代替子 process (只檢查 payload 的建立)
+        try:
+            return await pool.select_top({"python"}, items, 10), threading.get_ident()
+        finally:
+            pool.shutdown()
+
+    (top, total), loop_thread = asyncio.run(run())
+    assert total == 1 and top[0]["item_id"] == "a"
+    # payload 在 event loop 以外的 thread 建立
+    assert build_threads and loop_thread not in build_threads
@@ -0,0 +1,76 @@
+import os
+import sys
+
+import pytest
+
+# Ensure backend package (freelancer_match_backend) is on sys.path for imports during tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("numpy")
+
+from app.utils.shared_matrix import SharedMatrixStore
+from app.utils.tag_index import SkillTagIndex
+from app.utils.tag_similarity import TagSimilarityTable
+
+TAGS = ["Python", "pyhton", "Django", "React", "ReactJS", "Angular", "SQL", "MySQL"]
+PROJECTS = [("p1", "Python"), ("p1", "Django"), ("p2", "React"), ("p3", "Angular"), ("p4", "mysql")]
+PROFILES = [("f1", "python"), ("f2", "reactjs"), ("f3", "SQL")]
+
+
+def test_shared_matrix_matches_in_process_structures(tmp_path):
+    writer = SharedMatrixStore(str(tmp_path))
+    assert writer.try_acquire_publish_lock()
+    try:
+        writer.publish(TAGS, PROJECTS, PROFILES)
+    finally:
+        writer.release_publish_lock()
+
+    # another worker maps the published generation read-only
+    reader = SharedMatrixStore(str(tmp_path))
+    matrix = reader.open_latest()
+    assert matrix.generation == 1
+    assert dict(matrix.iter_item_tags("project"))["p1"] == {"python", "django"}
+
+    local_table = TagSimilarityTable()
+    local_table.build(TAGS)
+    shared_table = TagSimilarityTable()
+    shared_table.attach_shared(matrix)
+    for a in ("python", "react", "sql", "unknown"):
+        assert shared_table.neighbours(a) == local_table.neighbours(a)
+        for b in ("pyhton", "reactjs", "mysql", "sq1"):
+            assert shared_table.similarity(a, b) == local_table.similarity(a, b)
+    assert shared_table.search("pythonn") == local_table.search("pythonn")
+
+    local_index = SkillTagIndex()
+    local_index.load(PROJECTS, PROFILES)
+    shared_index = SkillTagIndex()
+    shared_index.load_shared(matrix)
+    for skills in ({"python"}, {"react", "sql"}, {"angular", "pyhton"}):
+        assert shared_index.candidate_projects(skills) == local_index.candidate_projects(skills)
+        assert shared_index.candidate_profiles(skills) == local_index.candidate_profiles(skills)
+
+    # incremental changes shadow the shared postings of the changed items
+    shared_index.set_project_tags("p1", ["react"])
+    shared_index.remove_profile("f2")
+    assert shared_index.candidate_projects({"python"}) == set()
+    assert shared_index.candidate_projects({"react"}) == {"p1", "p2"}
+    assert shared_index.candidate_profiles({"react"}) == set()
+
+
+def test_publish_replaces_generation_atomically(tmp_path):
+    store = SharedMatrixStore(str(tmp_path), poll_seconds=0)
+    other = SharedMatrixStore(str(tmp_path), poll_seconds=0)
+    assert other.open_latest() is None
+
+    for _ in range(3):
+        store.publish(TAGS, PROJECTS, PROFILES)
+    first = other.open_latest()
+    assert first.generation == 3
+    assert not other.has_newer()
+
+    store.publish(TAGS, PROJECTS[:1], PROFILES)
+    assert other.has_newer()
+    # the mapping of the replaced generation stays readable
+    assert first.items_for_tag("project", "react") == ["p2"]
+    assert other.open_latest().items_for_tag("project", "react") == []
+    assert len([name for name in os.listdir(tmp_path) if name.startswith("gen-")]) == 2
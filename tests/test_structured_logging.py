@@ -0,0 +1,49 @@
+import json
+import logging
+import os
+import sys
+
+# Ensure backend package (freelancer_match_backend) is on sys.path for imports during tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.structured_logging import (
+    configure_structured_logging, get_structured_logger, parse_module_settings, top_ids
+)
+
+
+def test_fields_are_formatted_lazily(caplog):
+    slog = get_structured_logger("tests.structured.lazy")
+    calls = []
+
+    def expensive():
+        calls.append(1)
+        return ["a", "b"]
+
+    logging.getLogger("tests.structured.lazy").setLevel(logging.WARNING)
+    slog.info("skipped", top_ids=expensive)
+    assert calls == []
+
+    logging.getLogger("tests.structured.lazy").setLevel(logging.INFO)
+    with caplog.at_level(logging.INFO, logger="tests.structured.lazy"):
+        slog.info("emitted", total=3, top_ids=expensive)
+    assert json.loads(caplog.records[-1].getMessage()) == {"event": "emitted", "total": 3, "top_ids": ["a", "b"]}
+    assert calls == [1]
+
+
+def test_sample_rate_uses_longest_module_prefix(caplog):
+    slog = get_structured_logger("tests.structured.sampled.child")
+    try:
+        configure_structured_logging(sample_rates="tests.structured=1,tests.structured.sampled=0")
+        assert slog.sample_rate == 0.0
+        with caplog.at_level(logging.INFO, logger="tests.structured.sampled.child"):
+            slog.info("dropped")
+            slog.warning("always_emitted")
+        assert [record.levelno for record in caplog.records] == [logging.WARNING]
+    finally:
+        configure_structured_logging()
+    assert slog.sample_rate == 1.0
+
+
+def test_helpers():
+    assert parse_module_settings("a=1, b.c = WARNING,,bad") == {"a": "1", "b.c": "WARNING"}
+    assert top_ids([("p1", 3.0), ("p2", 2.0), ("p3", 1.0)], 2, start=1) == ["p2", "p3"]
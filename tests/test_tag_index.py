@@ -0,0 +1,46 @@
+import os
+import sys
+
+# Ensure backend package (freelancer_match_backend) is on sys.path for imports during tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.tag_index import SkillTagIndex
+
+
+def make_index():
+    index = SkillTagIndex()
+    index.load(
+        [("p1", "Python"), ("p1", "Django"), ("p2", "React"), ("p3", "Angular")],
+        [("f1", "python"), ("f2", "reactjs")],
+    )
+    return index
+
+
+def test_exact_and_fuzzy_candidates():
+    index = make_index()
+    # 'reactjs' is a fuzzy neighbour of 'react'; 'angular' shares nothing
+    assert index.candidate_projects({"python", "reactjs"}) == {"p1", "p2"}
+    assert index.candidate_profiles({"react"}) == {"f2"}
+
+
+def test_incremental_updates():
+    index = make_index()
+    index.set_project_tags("p3", ["python"])
+    assert index.candidate_projects({"python"}) == {"p1", "p3"}
+    assert "angular" not in index.tag_projects
+
+    index.remove_project("p1")
+    assert index.candidate_projects({"python", "django"}) == {"p3"}
+
+
+def test_unknown_vocabulary_is_maintained_incrementally():
+    index = make_index()
+    index.candidate_projects({"python"})  # 第一次查詢時建立「不在相似度表中的詞彙」
+
+    index.set_project_tags("p4", ["Terraformx"])
+    assert "terraformx" in index._unknown_names
+    assert index.candidate_projects({"terraform"}) == {"p4"}
+
+    index.remove_project("p4")
+    assert "terraformx" not in index._unknown_names
+    assert index.candidate_projects({"terraform"}) == set()
@@ -0,0 +1,50 @@
+import os
+import random
+import sys
+
+# Ensure backend package (freelancer_match_backend) is on sys.path for imports during tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.tag_similarity import TagSimilarityTable, _get_string_similarity
+
+
+def test_table_matches_levenshtein_above_threshold():
+    table = TagSimilarityTable()
+    table.build(["React", "reactjs", "Vue", "vuejs", "python"])
+
+    assert table.similarity("react", "reactjs") == _get_string_similarity("react", "reactjs")
+    # below the 0.7 threshold is stored as "no match"
+    assert table.similarity("vue", "vuejs") == 0.0
+    assert table.neighbours("reactjs") == {"react": _get_string_similarity("react", "reactjs")}
+    assert table.stats()["hits"] == 2
+    assert table.stats()["misses"] == 0
+
+
+def test_unknown_tags_fall_back_to_levenshtein():
+    table = TagSimilarityTable()
+    table.build(["react"])
+
+    assert table.similarity("react", "reactjs") == _get_string_similarity("react", "reactjs")
+    assert table.stats()["misses"] == 1
+
+
+def test_bk_tree_search_matches_brute_force():
+    rng = random.Random(3)
+    base = ["python", "javascript", "kubernetes", "react", "postgresql", "go", "docker", "figma"]
+    vocabulary = set(base)
+    for _ in range(300):
+        name = list(rng.choice(base))
+        for _ in range(rng.randint(1, 3)):
+            position = rng.randrange(len(name))
+            name[position] = rng.choice("abcdefghijklmnopqrstuvwxyz")
+        vocabulary.add("".join(name))
+
+    table = TagSimilarityTable()
+    table.build(vocabulary)
+    for query in list(vocabulary)[:50] + ["pythn", "reakt", "kubernetis", "x"]:
+        expected = {
+            name: _get_string_similarity(query, name)
+            for name in vocabulary
+            if name != query and _get_string_similarity(query, name) > 0.7
+        }
+        assert table.search(query) == expected
@@ -0,0 +1,92 @@
+import asyncio
+import os
+import sys
+
+# Ensure backend package (freelancer_match_backend) is on sys.path for imports during tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.websocket_manager import ConnectionManager
+
+
+class FakeWebSocket:
+    def __init__(self, fail=False, stalled=False):
+        self.sent = []
+        self.fail = fail
+        self.stalled = stalled
+        self.closed_with = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        if self.fail:
+            raise RuntimeError("closed")
+        if self.stalled:
+            await asyncio.Event().wait()  # 永遠不會完成的慢速用戶端
+        self.sent.append(text)
+
+    async def close(self, code=1000, reason=None):
+        self.closed_with = code
+
+
+def test_indexes_by_room_and_user():
+    manager = ConnectionManager()
+    a1 = manager.register("room1", "alice", FakeWebSocket())
+    a2 = manager.register("room2", "alice", FakeWebSocket())
+    b1 = manager.register("room1", "bob", FakeWebSocket())
+
+    assert {c.connection_id for c in manager.room_connections("room1")} == {a1.connection_id, b1.connection_id}
+    assert {c.connection_id for c in manager.user_connections("alice")} == {a1.connection_id, a2.connection_id}
+    assert [c.connection_id for c in manager.user_connections("alice", room_id="room2")] == [a2.connection_id]
+
+    assert manager.disconnect(a1)
+    assert not manager.disconnect(a1)  # 重複斷開
+    manager.disconnect(a2)
+    assert not manager.is_online("alice")
+    stats = manager.stats()
+    assert {key: stats[key] for key in ("connections", "rooms", "users")} == {"connections": 1, "rooms": 1, "users": 1}
+    assert (stats["peak_connections"], stats["connects_total"], stats["disconnects_total"]) == (3, 3, 2)
+
+
+def test_broadcast_drops_failed_connections():
+    manager = ConnectionManager()
+    ok, broken = FakeWebSocket(), FakeWebSocket(fail=True)
+
+    async def run():
+        await manager.connect("room", "alice", ok)
+        await manager.connect("room", "bob", broken)
+        queued = await manager.broadcast_message("room", "hi")
+        await asyncio.sleep(0.01)  # 讓 writer task 送出
+        return queued
+
+    assert asyncio.run(run()) == 2
+    assert ok.sent == ["hi"]
+    assert [c.user_id for c in manager.room_connections("room")] == ["alice"]
+    assert manager.stats()["messages_sent_total"] == 1
+
+
+def test_slow_consumer_does_not_block_others():
+    for policy in ("drop", "disconnect"):
+        manager = ConnectionManager(queue_size=2, slow_consumer_policy=policy)
+        fast, slow = FakeWebSocket(), FakeWebSocket(stalled=True)
+
+        async def run():
+            await manager.connect("room", "alice", fast)
+            await manager.connect("room", "bob", slow)
+            for i in range(5):
+                await manager.broadcast_message("room", str(i))
+                await asyncio.sleep(0)
+            await asyncio.sleep(0.01)
+
+        asyncio.run(run())
+        stats = manager.stats()
+        assert fast.sent == ["0", "1", "2", "3", "4"]
+        if policy == "drop":
+            # writer 卡在第一則，佇列保留 2 則，其餘丟棄
+            assert manager.is_online("bob")
+            assert stats["messages_dropped_total"] == 2
+            assert stats["max_queue_depth"] == 2
+        else:
+            assert not manager.is_online("bob")
+            assert slow.closed_with == 1013
+            assert stats["slow_consumer_disconnects_total"] == 1